@@ -3,6 +3,8 @@ import os
 import random
 import re
 from gemini_assistant import gemini_assistant
+from ai_parsing import ProjectIdea, TeamSuggestion, parse_model_list, parse_stats
+from knowledge_base import knowledge_base, bullet_list
 
 
 # Removed OpenAI integration - using only Gemini and local fallback
@@ -149,6 +151,12 @@ ai_assistant = EnhancedAIAssistant()
 
 # Removed OpenAI function - now using only Gemini and local fallback
 
+def _best_match(message, kinds, choices):
+    """The indexed snippet most relevant to the message, or a random pick when none match"""
+    matches = knowledge_base.search(message, k=1, kinds=kinds)
+    return matches[0].text if matches else random.choice(choices)
+
+
 def get_local_ai_suggestion(user_message, context=None):
     """
     Comprehensive local AI assistant that can handle any type of question intelligently
@@ -156,7 +164,7 @@ def get_local_ai_suggestion(user_message, context=None):
     message_lower = user_message.lower()
 
     # Quick access to AI assistant data
-    assistant = EnhancedAIAssistant()
+    assistant = ai_assistant
 
     # Greeting and general conversation
     if any(word in message_lower for word in ["hello", "hi", "hey", "greetings"]):
@@ -183,17 +191,23 @@ def get_local_ai_suggestion(user_message, context=None):
             "\n• **Project Passion**: Find people genuinely excited about similar problem spaces or technologies.",
             "\n• **Team Size**: 3-4 people is usually optimal - enough diverse skills, small enough to move fast."
         ]
-        tips.append(f"\n\nAlso, here's a specific tip: {random.choice(assistant.team_tips)}")
+        tips.append(f"\n\nAlso, here's a specific tip: {_best_match(user_message, ('team',), assistant.team_tips)}")
         return "".join(tips)
 
     # Project ideas and brainstorming
     elif any(phrase in message_lower for phrase in
              ["project idea", "what to build", "hackathon project", "brainstorm", "ideas"]):
         categories = list(assistant.project_ideas.keys())
-        selected_category = random.choice(categories)
-        ideas = assistant.project_ideas[selected_category]
+        matches = knowledge_base.search(user_message, k=3, kinds=('project',))
+        if matches:
+            selected_category = matches[0].topic
+            response = "Here are some project ideas that fit what you described:\n\n"
+            ideas = [match.text for match in matches]
+        else:
+            selected_category = random.choice(categories)
+            response = f"Here are some inspiring project ideas in the **{selected_category.replace('_', '/').upper()}** category:\n\n"
+            ideas = assistant.project_ideas[selected_category]
 
-        response = f"Here are some inspiring project ideas in the **{selected_category.replace('_', '/').upper()}** category:\n\n"
         for i, idea in enumerate(ideas[:3], 1):
             response += f"{i}. {idea}\n"
 
@@ -205,12 +219,13 @@ def get_local_ai_suggestion(user_message, context=None):
     elif any(phrase in message_lower for phrase in
              ["hackathon strategy", "time management", "hackathon tips", "how to win", "hackathon advice"]):
         if "time" in message_lower or "timeline" in message_lower:
-            phase = random.choice(["planning", "development", "presentation"])
+            matches = knowledge_base.search(user_message, k=1, kinds=('strategy',))
+            phase = matches[0].topic if matches else random.choice(["planning", "development", "presentation"])
             tips = assistant.timeline_advice[phase]
             response = f"**{phase.upper()} PHASE TIPS:**\n\n"
             for tip in tips:
                 response += f"• {tip}\n"
-            response += f"\nTime management is crucial! Here's a key insight: {random.choice(assistant.pitfall_advice)}"
+            response += f"\nTime management is crucial! Here's a key insight: {_best_match(user_message, ('pitfall',), assistant.pitfall_advice)}"
         else:
             response = "**HACKATHON SUCCESS STRATEGY:**\n\n"
             response += "**1. Team Formation (First 3 hours)**\n"
@@ -270,7 +285,7 @@ def get_local_ai_suggestion(user_message, context=None):
         for tip in tips:
             response += f"• {tip}\n"
 
-        response += f"\n**Key insight:** {random.choice(assistant.pitfall_advice)}"
+        response += f"\n**Key insight:** {_best_match(user_message, ('pitfall',), assistant.pitfall_advice)}"
         return response
 
     # Role-specific advice
@@ -278,7 +293,7 @@ def get_local_ai_suggestion(user_message, context=None):
         for role, advice in assistant.role_advice.items():
             if role in message_lower:
                 response = f"**ADVICE FOR {role.upper()}S:**\n\n{advice}\n\n"
-                response += f"**Bonus tip:** {random.choice(assistant.team_tips)}"
+                response += f"**Bonus tip:** {_best_match(user_message, ('team',), assistant.team_tips)}"
                 return response
 
     # Creative requests and entertainment
@@ -376,7 +391,10 @@ What specific programming topic interests you most?"""
     # General conversation and fallback
     else:
         # Try to extract key concepts and provide relevant advice
-        if "help" in message_lower or "advice" in message_lower:
+        matches = knowledge_base.search(user_message, k=3)
+        if matches:
+            return f"Here's what I know that's relevant:\n\n{bullet_list(matches)}\n\nWant me to go deeper on any of these?"
+        elif "help" in message_lower or "advice" in message_lower:
             return f"I'm here to help! I specialize in hackathon advice, team formation, project ideas, and technical guidance. What specific area would you like to explore?"
         elif "problem" in message_lower or "challenge" in message_lower:
             return "I love tackling challenges! The best approach is usually to break big problems into smaller, manageable pieces. What's the specific challenge you're facing?"
@@ -420,17 +438,19 @@ def get_comprehensive_hackathon_help(query):
     """
     Enhanced AI assistant using Gemini API for comprehensive hackathon guidance
     """
-    return gemini_assistant.generate_response(query, context_type="hackathon")
+    return gemini_assistant.generate_response(query, context_type="hackathon", cache_answer=True)
 
 
-def get_ai_suggestion(query):
+def get_ai_suggestion(query, response_schema=None):
     """
     General AI suggestions using Gemini with local fallback
     """
     # Try Gemini first
     try:
         if gemini_assistant.is_available():
-            return gemini_assistant.generate_response(query, context_type="general")
+            return gemini_assistant.generate_response(query, context_type="general",
+                                                      response_schema=response_schema,
+                                                      cache_answer=response_schema is None)
     except Exception as e:
         print(f"Gemini AI error: {e}")
 
@@ -438,16 +458,18 @@ def get_ai_suggestion(query):
     return get_local_ai_suggestion(query)
 
 
-def get_project_ideas(theme=None):
+def _project_ideas_query(theme=None):
+    if theme:
+        return f"Suggest innovative project ideas for a hackathon with the theme '{theme}'. Provide specific, implementable ideas with brief descriptions."
+    return "Suggest innovative project ideas for hackathons across different categories like AI/ML, web development, mobile apps, social impact, and fintech."
+
+
+def get_project_ideas(theme=None, response_schema=None):
     """
     Get project ideas using Gemini API
     """
-    if theme:
-        query = f"Suggest innovative project ideas for a hackathon with the theme '{theme}'. Provide specific, implementable ideas with brief descriptions."
-    else:
-        query = "Suggest innovative project ideas for hackathons across different categories like AI/ML, web development, mobile apps, social impact, and fintech."
-
-    return gemini_assistant.generate_response(query, context_type="hackathon")
+    return gemini_assistant.generate_response(_project_ideas_query(theme), context_type="hackathon",
+                                              response_schema=response_schema)
 
 
 def get_hackathon_resources():
@@ -483,4 +505,288 @@ def get_hackathon_resources():
             "Codecademy - Interactive coding lessons",
             "FreeCodeCamp - Free coding bootcamp"
         ]
-    }
\ No newline at end of file
+    }
+
+
+async def get_comprehensive_hackathon_help_async(query):
+    """Async variant of get_comprehensive_hackathon_help for the ASGI entry point"""
+    return await gemini_assistant.generate_response_async(query, context_type="hackathon",
+                                                          cache_answer=True)
+
+
+async def get_ai_suggestion_async(query, response_schema=None):
+    """Async variant of get_ai_suggestion for the ASGI entry point"""
+    try:
+        if gemini_assistant.is_available():
+            return await gemini_assistant.generate_response_async(query, context_type="general",
+                                                                  response_schema=response_schema,
+                                                                  cache_answer=response_schema is None)
+    except Exception as e:
+        print(f"Gemini AI error: {e}")
+
+    return get_local_ai_suggestion(query)
+
+
+async def get_project_ideas_async(theme=None, response_schema=None):
+    """Async variant of get_project_ideas for the ASGI entry point"""
+    return await gemini_assistant.generate_response_async(_project_ideas_query(theme),
+                                                          context_type="hackathon",
+                                                          response_schema=response_schema)
+
+
+# Shown when the AI response for /generate-project-ideas is not a JSON list
+FALLBACK_PROJECT_IDEAS = [
+    {
+        "title": "SmartGarden IoT",
+        "description": "Automated plant care system using sensors and AI to optimize watering, lighting, and nutrients for indoor gardens.",
+        "category": "IoT/GreenTech",
+        "difficulty": "Intermediate",
+        "tech_stack": ["Arduino", "Python", "React", "Firebase"],
+        "team_roles": ["IoT Developer", "Web Developer", "Data Scientist"],
+        "features": ["Sensor monitoring", "Mobile alerts", "Growth analytics", "Automated watering"]
+    },
+    {
+        "title": "CommunityFund",
+        "description": "Blockchain-based platform for transparent community fundraising with smart contracts and decentralized voting.",
+        "category": "Blockchain/Social",
+        "difficulty": "Advanced",
+        "tech_stack": ["Solidity", "React", "Web3.js", "IPFS"],
+        "team_roles": ["Blockchain Developer", "Frontend Developer", "UX Designer"],
+        "features": ["Smart contracts", "Voting mechanism", "Fund tracking", "Community dashboard"]
+    },
+    {
+        "title": "AI Meditation Guide",
+        "description": "Personalized meditation app that adapts to user's stress levels and preferences using ML and biometric data.",
+        "category": "Health/AI",
+        "difficulty": "Intermediate",
+        "tech_stack": ["Python", "TensorFlow", "React Native", "HealthKit"],
+        "team_roles": ["AI Developer", "Mobile Developer", "UX Designer", "Health Expert"],
+        "features": ["Stress detection", "Personalized sessions", "Progress tracking",
+                     "Biometric integration"]
+    }
+]
+
+
+def build_project_ideas_prompt(preferences):
+    """Prompt asking for three project ideas as JSON, from the idea form's preferences"""
+    prompt = "Generate 3 innovative hackathon project ideas with the following preferences:\n"
+
+    if preferences.get('technology'):
+        prompt += f"Technology focus: {preferences['technology']}\n"
+    if preferences.get('team_size'):
+        prompt += f"Team size: {preferences['team_size']} members\n"
+    if preferences.get('experience'):
+        prompt += f"Experience level: {preferences['experience']}\n"
+    if preferences.get('duration'):
+        prompt += f"Project duration: {preferences['duration']}\n"
+    if preferences.get('skills'):
+        prompt += f"Skills/interests: {preferences['skills']}\n"
+
+    prompt += """
+For each idea, provide:
+1. Title (creative and catchy)
+2. Description (2-3 sentences)
+3. Category (e.g., Social Impact, FinTech, Health, etc.)
+4. Difficulty level (Beginner, Intermediate, Advanced)
+5. Tech stack (3-5 technologies)
+6. Team roles needed (2-4 roles)
+7. Key features (3-4 main features)
+
+Format as JSON array with this structure:
+[{
+  "title": "Project Name",
+  "description": "Brief description...",
+  "category": "Category",
+  "difficulty": "Level",
+  "tech_stack": ["Tech1", "Tech2", "Tech3"],
+  "team_roles": ["Role1", "Role2", "Role3"],
+  "features": ["Feature1", "Feature2", "Feature3"]
+}]
+"""
+
+    return prompt
+
+
+def team_suggestion_data(participants):
+    """Participant fields sent to the AI for team suggestions"""
+    participant_data = []
+    for p in participants:
+        participant_data.append({
+            "name": p.name,
+            "email": p.email,
+            "role": p.role,
+            "experience_level": p.experience_level,
+            "skills": p.skills if p.skills else [],
+            "interests": p.interests if p.interests else [],
+            "preferred_team_size": p.preferred_team_size or 4,
+            "availability": p.availability
+        })
+    return participant_data
+
+
+def build_team_suggestion_prompt(participant_data):
+    """Prompt asking for 2-3 team combinations as JSON"""
+    prompt = f"""
+Analyze the following {len(participant_data)} hackathon participants and suggest optimal team combinations:
+
+Participants:
+"""
+
+    for p in participant_data:
+        prompt += f"""
+- {p['name']} ({p['role']}, {p['experience_level']})
+  Skills: {', '.join(p['skills'])}
+  Interests: {', '.join(p['interests'])}
+  Preferred team size: {p['preferred_team_size']}
+  Email: {p['email']}
+"""
+
+    prompt += """
+Please provide 2-3 different team combination suggestions. For each suggestion:
+
+1. List the team members
+2. Explain the reasoning (why these people work well together)
+3. Give a compatibility score (0-100%)
+4. Suggest a project idea that matches the team's combined skills
+
+Format as JSON:
+[{
+  "members": [{"name": "...", "role": "...", "experience_level": "...", "email": "...", "skills": [...]}],
+  "reasoning": "Why this team works well together...",
+  "compatibility_score": 85,
+  "project_suggestion": "A brief project idea..."
+}]
+"""
+
+    return prompt
+
+
+def fallback_team_suggestions(participant_data):
+    """Simple role-diversity suggestions, used when the AI gives none"""
+    suggestions = []
+
+    # Create simple suggestions based on role diversity
+    if len(participant_data) >= 2:
+        developers = [p for p in participant_data if p['role'] == 'Developer']
+        designers = [p for p in participant_data if p['role'] == 'Designer']
+        others = [p for p in participant_data if p['role'] not in ['Developer', 'Designer']]
+
+        # Suggestion 1: Mix of roles
+        team1 = []
+        if developers: team1.append(developers[0])
+        if designers: team1.append(designers[0])
+        if len(team1) < 4 and others: team1.extend(others[:2])
+        if len(team1) < 4 and len(developers) > 1: team1.append(developers[1])
+
+        if len(team1) >= 2:
+            suggestions.append({
+                "members": team1,
+                "reasoning": "This team combines different roles for diverse skill coverage and balanced perspectives.",
+                "compatibility_score": 75,
+                "project_suggestion": "A web application that combines technical development with user-focused design."
+            })
+
+        # Suggestion 2: Remaining participants
+        remaining = [p for p in participant_data if p not in team1]
+        if len(remaining) >= 2:
+            suggestions.append({
+                "members": remaining,
+                "reasoning": "This team groups remaining participants with complementary skills and experience levels.",
+                "compatibility_score": 70,
+                "project_suggestion": "A project that leverages the unique combination of skills in this team."
+            })
+
+    return suggestions
+
+
+# Extra generations allowed when a response yields no valid items
+STRUCTURED_RETRIES = 1
+
+
+def _local_fallback(kind):
+    """
+    True when Gemini isn't configured. The local assistant answers in prose,
+    so there is nothing to parse; callers use their fallback items and the
+    response is counted as 'fallback' rather than as a failed parse.
+    """
+    if gemini_assistant.is_available():
+        return False
+    parse_stats.record(kind, 'fallback')
+    return True
+
+
+def _structured_list(generate, model, kind):
+    """Generate and validate a JSON list of ``model``, retrying unusable responses"""
+    if _local_fallback(kind):
+        return []
+    items = parse_model_list(generate(), model, kind)
+    retries = STRUCTURED_RETRIES
+    while not items and retries:
+        retries -= 1
+        parse_stats.record_retry(kind)
+        items = parse_model_list(generate(), model, kind)
+    return [item.model_dump() for item in items]
+
+
+async def _structured_list_async(generate, model, kind):
+    if _local_fallback(kind):
+        return []
+    items = parse_model_list(await generate(), model, kind)
+    retries = STRUCTURED_RETRIES
+    while not items and retries:
+        retries -= 1
+        parse_stats.record_retry(kind)
+        items = parse_model_list(await generate(), model, kind)
+    return [item.model_dump() for item in items]
+
+
+def project_ideas_for(preferences):
+    """Three validated project ideas for the idea form's preferences, or the fallback ideas"""
+    prompt = build_project_ideas_prompt(preferences)
+    ideas = _structured_list(lambda: get_project_ideas(prompt, response_schema=list[ProjectIdea]),
+                             ProjectIdea, 'project_ideas')
+    return ideas or FALLBACK_PROJECT_IDEAS
+
+
+async def project_ideas_for_async(preferences):
+    prompt = build_project_ideas_prompt(preferences)
+    ideas = await _structured_list_async(
+        lambda: get_project_ideas_async(prompt, response_schema=list[ProjectIdea]),
+        ProjectIdea, 'project_ideas')
+    return ideas or FALLBACK_PROJECT_IDEAS
+
+
+def team_suggestions_for(participant_data):
+    """Validated AI team suggestions, or role-diversity suggestions"""
+    prompt = build_team_suggestion_prompt(participant_data)
+    suggestions = _structured_list(lambda: get_ai_suggestion(prompt, response_schema=list[TeamSuggestion]),
+                                   TeamSuggestion, 'team_suggestions')
+    return suggestions or fallback_team_suggestions(participant_data)
+
+
+async def team_suggestions_for_async(participant_data):
+    prompt = build_team_suggestion_prompt(participant_data)
+    suggestions = await _structured_list_async(
+        lambda: get_ai_suggestion_async(prompt, response_schema=list[TeamSuggestion]),
+        TeamSuggestion, 'team_suggestions')
+    return suggestions or fallback_team_suggestions(participant_data)
+
+
+def _index_knowledge(assistant):
+    """Register the canned tips and ideas with the local knowledge base"""
+    knowledge_base.add_many('team', assistant.team_tips)
+    for category, ideas in assistant.project_ideas.items():
+        knowledge_base.add_many('project', ideas, category)
+    for role, advice in assistant.role_advice.items():
+        knowledge_base.add('role', advice, role)
+    for phase, tips in assistant.timeline_advice.items():
+        knowledge_base.add_many('strategy', tips, phase)
+    for area, tips in assistant.technical_tips.items():
+        knowledge_base.add_many('technical', tips, area)
+    knowledge_base.add_many('pitfall', assistant.pitfall_advice)
+    for idea in FALLBACK_PROJECT_IDEAS:
+        knowledge_base.add('project', f"{idea['title']}: {idea['description']} "
+                                      f"(tech stack: {', '.join(idea['tech_stack'])})", idea['category'])
+
+
+_index_knowledge(ai_assistant)
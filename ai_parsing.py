@@ -0,0 +1,225 @@
+import json
+import re
+import threading
+from typing import List
+
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+
+_FENCE = re.compile(r'```(?:json|JSON)?\s*(.*?)(?:```|$)', re.S)
+_OPENING = re.compile(r'[\[{]')
+_decoder = json.JSONDecoder()
+
+# Opening brackets tried when looking for JSON inside prose
+MAX_JSON_STARTS = 20
+
+
+def _as_list(value):
+    """Accept "a, b" or a single string where a list of strings is expected"""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in re.split(r'[,;\n]', value) if part.strip()]
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+class ProjectIdea(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
+    title: str
+    description: str = ''
+    category: str = ''
+    difficulty: str = ''
+    tech_stack: List[str] = Field(default_factory=list)
+    team_roles: List[str] = Field(default_factory=list)
+    features: List[str] = Field(default_factory=list)
+
+    @field_validator('tech_stack', 'team_roles', 'features', mode='before')
+    @classmethod
+    def _lists(cls, value):
+        return _as_list(value)
+
+
+class SuggestedMember(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
+    name: str
+    role: str = ''
+    experience_level: str = ''
+    email: str = ''
+    skills: List[str] = Field(default_factory=list)
+
+    @field_validator('skills', mode='before')
+    @classmethod
+    def _lists(cls, value):
+        return _as_list(value)
+
+
+class TeamSuggestion(BaseModel):
+    model_config = ConfigDict(extra='ignore')
+
+    members: List[SuggestedMember]
+    reasoning: str = ''
+    compatibility_score: float = 0
+    project_suggestion: str = ''
+
+    @field_validator('members', mode='before')
+    @classmethod
+    def _names_as_members(cls, value):
+        if isinstance(value, list):
+            return [{'name': member} if isinstance(member, str) else member for member in value]
+        return value
+
+    @field_validator('compatibility_score', mode='before')
+    @classmethod
+    def _score(cls, value):
+        """Accept "85%" and fractions such as 0.85; clamp to 0-100"""
+        if isinstance(value, str):
+            match = re.search(r'\d+(?:\.\d+)?', value)
+            value = float(match.group()) if match else 0
+        value = float(value or 0)
+        # Only a fraction strictly between 0 and 1 is a 0-1 score; 1 means 1 out of 100
+        if 0 < value < 1:
+            value *= 100
+        return max(0.0, min(100.0, value))
+
+
+def strip_fences(text):
+    """Contents of the first markdown code fence, or the text itself"""
+    match = _FENCE.search(text)
+    return match.group(1) if match else text
+
+
+def _skip_space(text, index):
+    while index < len(text) and text[index] in ' \t\r\n':
+        index += 1
+    return index
+
+
+def _partial_array(text, start):
+    """Decode the complete elements of a JSON array, stopping at the first broken one"""
+    items = []
+    index = _skip_space(text, start + 1)
+    while index < len(text) and text[index] != ']':
+        try:
+            item, index = _decoder.raw_decode(text, index)
+        except ValueError:
+            break
+        items.append(item)
+        index = _skip_space(text, index)
+        if index < len(text) and text[index] == ',':
+            index = _skip_space(text, index + 1)
+    return items
+
+
+def extract_json(text):
+    """
+    Find the JSON value in model output: fences and surrounding prose are
+    ignored, and a truncated array yields its complete elements.
+
+    Returns (value, how) where how is 'clean' (the text was exactly JSON),
+    'extracted' (JSON found after stripping fences or prose), 'partial'
+    (some array elements recovered) or None when nothing parsed.
+    """
+    if not isinstance(text, str) or not text.strip():
+        return None, None
+    try:
+        return json.loads(text), 'clean'
+    except ValueError:
+        pass
+
+    body = strip_fences(text)
+    # Prose may contain stray brackets ("[1]"), so try each opening bracket
+    # until one decodes to an object or a list of objects
+    for attempt, match in enumerate(_OPENING.finditer(body)):
+        if attempt >= MAX_JSON_STARTS:
+            break
+        try:
+            value, _ = _decoder.raw_decode(body, match.start())
+        except ValueError:
+            if match.group() == '[':
+                items = [item for item in _partial_array(body, match.start())
+                         if isinstance(item, dict)]
+                if items:
+                    return items, 'partial'
+            continue
+        if isinstance(value, dict) or (isinstance(value, list) and
+                                       any(isinstance(item, dict) for item in value)):
+            return value, 'extracted'
+    return None, None
+
+
+class ParseStats:
+    """Per-kind counts of how AI responses parsed, for /metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.outcomes = {}  # (kind, outcome) -> count
+        self.retries = {}  # kind -> count
+        self.dropped = {}  # kind -> items failing validation
+
+    def record(self, kind, outcome, dropped=0):
+        with self._lock:
+            self.outcomes[(kind, outcome)] = self.outcomes.get((kind, outcome), 0) + 1
+            if dropped:
+                self.dropped[kind] = self.dropped.get(kind, 0) + dropped
+
+    def record_retry(self, kind):
+        with self._lock:
+            self.retries[kind] = self.retries.get(kind, 0) + 1
+
+    def metric_lines(self):
+        with self._lock:
+            outcomes = dict(self.outcomes)
+            retries = dict(self.retries)
+            dropped = dict(self.dropped)
+        lines = ['# HELP hackhub_ai_parse_total AI responses by parse outcome',
+                 '# TYPE hackhub_ai_parse_total counter']
+        lines.extend(f'hackhub_ai_parse_total{{kind="{kind}",outcome="{outcome}"}} {count}'
+                     for (kind, outcome), count in sorted(outcomes.items()))
+        lines.extend(['# HELP hackhub_ai_parse_retries_total Generations retried after an unusable response',
+                      '# TYPE hackhub_ai_parse_retries_total counter'])
+        lines.extend(f'hackhub_ai_parse_retries_total{{kind="{kind}"}} {count}'
+                     for kind, count in sorted(retries.items()))
+        lines.extend(['# HELP hackhub_ai_parse_dropped_items_total Items failing schema validation',
+                      '# TYPE hackhub_ai_parse_dropped_items_total counter'])
+        lines.extend(f'hackhub_ai_parse_dropped_items_total{{kind="{kind}"}} {count}'
+                     for kind, count in sorted(dropped.items()))
+        return lines
+
+
+parse_stats = ParseStats()
+
+
+def parse_model_list(text, model, kind):
+    """
+    Validate model output as a list of ``model`` items.
+
+    A single object, or an object wrapping the list (``{"ideas": [...]}``),
+    is accepted too. Items that fail validation are dropped rather than
+    failing the whole response. Returns the validated items ([] if none).
+    """
+    value, how = extract_json(text)
+    if isinstance(value, dict):
+        # A wrapper holds a list of objects; a lone item's own list fields hold strings
+        lists = [v for v in value.values()
+                 if isinstance(v, list) and any(isinstance(item, dict) for item in v)]
+        value = lists[0] if lists else [value]
+    if not isinstance(value, list):
+        parse_stats.record(kind, 'failed')
+        return []
+
+    items = []
+    for item in value:
+        try:
+            items.append(model.model_validate(item))
+        except ValidationError:
+            pass
+    dropped = len(value) - len(items)
+    if not items:
+        outcome = 'failed'
+    elif how == 'clean' and not dropped:
+        outcome = 'clean'
+    else:
+        outcome = 'partial' if how == 'partial' or dropped else 'repaired'
+    parse_stats.record(kind, outcome, dropped)
+    return items
@@ -1,7 +1,7 @@
 import os
 import logging
 from flask import Flask
-from database import db
+from database import db, schema_is_current
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Configure logging
@@ -11,9 +11,18 @@ logging.basicConfig(level=logging.DEBUG)
 import os
 template_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'templates'))
 static_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'static'))
-app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
+# INSTANCE_PATH moves runtime state (data version counter, snapshots, rate limit
+# buckets, profiles) out of ./instance, e.g. for tests
+instance_path = os.environ.get("INSTANCE_PATH") or None
+app = Flask(__name__, template_folder=template_dir, static_folder=static_dir,
+            instance_path=instance_path and os.path.abspath(instance_path))
 app.secret_key = os.environ.get("SESSION_SECRET", "hackhub-default-secret-key")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+# Reverse proxies in front of the app; their X-Forwarded-* headers give the
+# client address (per-IP rate limits), scheme and host
+trusted_proxies = int(os.environ.get("TRUSTED_PROXIES", 1))
+app.config["TRUSTED_PROXIES"] = trusted_proxies
+app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies, x_proto=trusted_proxies,
+                        x_host=trusted_proxies)
 
 # Configure the database
 database_url = os.environ.get("DATABASE_URL")
@@ -24,8 +33,89 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
     "pool_pre_ping": True,
 }
+
+# Optional read replica for read-only views (see read_replica.py)
+replica_url = os.environ.get("DATABASE_REPLICA_URL")
+if replica_url and replica_url.strip():
+    app.config["SQLALCHEMY_BINDS"] = {"replica": replica_url}
+app.config["REPLICA_STICKY_SECONDS"] = float(os.environ.get("REPLICA_STICKY_SECONDS", 5.0))
+app.config["REPLICA_MAX_LAG"] = float(os.environ.get("REPLICA_MAX_LAG", 2.0))
 db.init_app(app)
 
+# Hard bounds on team size when /generate-teams follows participants' preferred sizes
+app.config["TEAM_MIN_SIZE"] = int(os.environ.get("TEAM_MIN_SIZE", 2))
+app.config["TEAM_MAX_SIZE"] = int(os.environ.get("TEAM_MAX_SIZE", 6))
+
+# Parallel team optimisation (used when /generate-teams is asked to optimise).
+# It runs every restart, so a seed always gives the same teams; setting
+# TEAM_OPTIMISE_TIME_BUDGET (seconds) caps the search by wall clock instead,
+# and results then vary with machine load.
+app.config["TEAM_OPTIMISE_RESTARTS"] = int(os.environ.get("TEAM_OPTIMISE_RESTARTS", 32))
+app.config["TEAM_OPTIMISE_WORKERS"] = int(os.environ.get("TEAM_OPTIMISE_WORKERS", 0)) or None
+app.config["TEAM_OPTIMISE_TIME_BUDGET"] = float(os.environ.get("TEAM_OPTIMISE_TIME_BUDGET", 0)) or None
+app.config["TEAM_OPTIMISE_SEED"] = int(os.environ.get("TEAM_OPTIMISE_SEED", 42))
+
+# Rendered template fragments kept in memory, keyed by data version
+app.config["FRAGMENT_CACHE_MAX_BYTES"] = int(os.environ.get("FRAGMENT_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+
+# Fingerprinted static assets from `flask build-assets`; set USE_X_SENDFILE=1
+# behind a proxy that can serve files itself
+app.config["USE_X_SENDFILE"] = os.environ.get("USE_X_SENDFILE") == "1"
+if os.environ.get("ASSETS_USE_MANIFEST"):
+    app.config["ASSETS_USE_MANIFEST"] = os.environ["ASSETS_USE_MANIFEST"] == "1"
+
+# Fraction of requests run under cProfile, dumped to PROFILE_DIR (instance/profiles)
+app.config["PROFILE_SAMPLE_RATE"] = float(os.environ.get("PROFILE_SAMPLE_RATE", 0.0))
+app.config["PROFILE_DIR"] = os.environ.get("PROFILE_DIR")
+
+from instrumentation import instrumentation
+instrumentation.init_app(app)
+
+from read_replica import replica_router
+replica_router.init_app(app)
+instrumentation.add_collector(replica_router.metric_lines)
+
+# AI endpoint limits: "burst/requests per minute" per browser session and per IP.
+# RATE_LIMIT_STORE=sqlite shares the buckets between worker processes.
+def _rate_limit(name, default):
+    burst, per_minute = os.environ.get(name, default).split("/")
+    return int(burst), float(per_minute)
+
+app.config["RATE_LIMIT_ENABLED"] = os.environ.get("RATE_LIMIT_ENABLED", "1") == "1"
+app.config["RATE_LIMIT_STORE"] = os.environ.get("RATE_LIMIT_STORE", "memory")
+app.config["RATE_LIMIT_SESSION"] = _rate_limit("RATE_LIMIT_SESSION", "10/20")
+app.config["RATE_LIMIT_IP"] = _rate_limit("RATE_LIMIT_IP", "30/60")
+app.config["AI_MAX_CONCURRENT"] = int(os.environ.get("AI_MAX_CONCURRENT", 16))
+app.config["AI_MAX_QUEUE"] = int(os.environ.get("AI_MAX_QUEUE", 64))
+app.config["AI_MAX_CONCURRENT_ASYNC"] = int(os.environ.get("AI_MAX_CONCURRENT_ASYNC", 256))
+app.config["AI_MAX_QUEUE_ASYNC"] = int(os.environ.get("AI_MAX_QUEUE_ASYNC", 1024))
+app.config["AI_ADMISSION_MAX_WAIT"] = float(os.environ.get("AI_ADMISSION_MAX_WAIT", 2.0))
+
+from rate_limit import rate_limiter
+rate_limiter.init_app(app)
+instrumentation.add_collector(rate_limiter.metric_lines)
+
+# Registrations arriving together are written in one commit (group commit)
+app.config["REGISTRATION_BATCHING"] = os.environ.get("REGISTRATION_BATCHING", "1") == "1"
+app.config["REGISTRATION_BATCH_WINDOW"] = float(os.environ.get("REGISTRATION_BATCH_WINDOW_MS", 5)) / 1000
+app.config["REGISTRATION_BATCH_MAX"] = int(os.environ.get("REGISTRATION_BATCH_MAX", 200))
+
+from registrations import registration_batcher
+registration_batcher.init_app(app)
+instrumentation.add_collector(registration_batcher.metric_lines)
+
+# Reuse AI answers for near-duplicate chat/help questions: cosine similarity (0-1)
+# of TF-IDF word vectors, set on tests/test_semantic_cache.py's calibration pairs
+# and checked on its held-out ones
+app.config["AI_CACHE_ENABLED"] = os.environ.get("AI_CACHE_ENABLED", "1") == "1"
+app.config["AI_CACHE_THRESHOLD"] = float(os.environ.get("AI_CACHE_THRESHOLD", 0.65))
+app.config["AI_CACHE_MAX_ENTRIES"] = int(os.environ.get("AI_CACHE_MAX_ENTRIES", 2000))
+app.config["AI_CACHE_TTL"] = int(os.environ.get("AI_CACHE_TTL", 6 * 3600))
+
+from semantic_cache import answer_cache
+answer_cache.init_app(app)
+instrumentation.add_collector(answer_cache.metric_lines)
+
 # Add custom Jinja2 filters
 import json
 
@@ -41,6 +131,59 @@ def fromjson_filter(value):
 
 # After app and db are configured, now we can safely import models and routes
 with app.app_context():
-    from models import Participant, Team  
+    from models import Event, Participant, Team
     import routes
+    import commands
     db.create_all()
+    # Older databases are migrated explicitly; importing the app never rewrites them
+    if not schema_is_current():
+        print("Database schema is out of date: run `flask upgrade-db`")
+
+    # Data version behind ETags and caches: 'file' is shared by the workers of
+    # one node; 'database' keeps it in the database, for several app nodes
+    app.config["DATA_VERSION_STORE"] = os.environ.get("DATA_VERSION_STORE", "file")
+
+    # Publish participant/team/event changes to live stats streams
+    from data_changes import track_models
+    from data_version import data_version
+    from stats_stream import stats_broker
+    track_models(Participant, Team, Event)
+    data_version.init_app(app)
+    stats_broker.init_app(app, data_version)
+
+    # Participant feature snapshots shared by workers, keyed by the data version
+    from snapshot_store import snapshot_store
+    snapshot_store.init_app(app)
+    instrumentation.add_collector(snapshot_store.metric_lines)
+
+    # Teammate recommendations: LSH tables x bits per code; smaller events are ranked exactly
+    app.config["RECOMMEND_LSH_TABLES"] = int(os.environ.get("RECOMMEND_LSH_TABLES", 8))
+    app.config["RECOMMEND_LSH_BITS"] = int(os.environ.get("RECOMMEND_LSH_BITS", 12))
+    app.config["RECOMMEND_EXACT_BELOW"] = int(os.environ.get("RECOMMEND_EXACT_BELOW", 2000))
+    app.config["RECOMMEND_MAX_CANDIDATES"] = int(os.environ.get("RECOMMEND_MAX_CANDIDATES", 2000))
+    from recommendations import recommender
+    recommender.init_app(app)
+    instrumentation.add_collector(recommender.metric_lines)
+
+    # Place registrants into teams as they sign up, rebalancing every few minutes
+    app.config["STREAMING_ASSIGNMENT"] = os.environ.get("STREAMING_ASSIGNMENT") == "1"
+    app.config["STREAMING_STATE_TTL"] = float(os.environ.get("STREAMING_STATE_TTL", 5.0))
+    app.config["STREAMING_REBALANCE_INTERVAL"] = float(os.environ.get("STREAMING_REBALANCE_INTERVAL", 300))
+    from streaming_assignment import streaming_assigner
+    streaming_assigner.init_app(app)
+    instrumentation.add_collector(streaming_assigner.metric_lines)
+
+    from fragment_cache import fragment_cache
+    fragment_cache.init_app(app)
+    instrumentation.add_collector(fragment_cache.metric_lines)
+
+    from ai_parsing import parse_stats
+    instrumentation.add_collector(parse_stats.metric_lines)
+
+    from assets import asset_manifest
+    asset_manifest.init_app(app)
+
+    # Index the assistants' canned knowledge once for the offline fallbacks
+    import enhanced_ai_assistant
+    from knowledge_base import knowledge_base
+    knowledge_base.build()
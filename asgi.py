@@ -0,0 +1,190 @@
+"""
+ASGI entry point: the AI and streaming routes run natively on the event
+loop, everything else is the Flask app behind a WSGI bridge.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+
+A request waiting on Gemini is a suspended coroutine rather than a busy
+thread, so one process can hold thousands of them. Database work still
+runs in worker threads inside a Flask request context built from the
+incoming request, so config, models, event selection (the Flask session
+cookie) and teardown are exactly those of the WSGI app.
+"""
+import asyncio
+import math
+from functools import wraps
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.wsgi import WSGIMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from werkzeug.exceptions import HTTPException
+
+from app import app as flask_app
+from models import Participant
+from events import current_event
+from stats_stream import stats_broker
+from rate_limit import rate_limiter
+from ai_assistant import get_ai_suggestion_async, get_comprehensive_hackathon_help_async, \
+    project_ideas_for_async, team_suggestion_data, team_suggestions_for_async
+
+app = FastAPI(title='HackHub', docs_url=None, redoc_url=None, openapi_url=None)
+
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def _in_flask_request(request, data, work):
+    """
+    Run ``work()`` in a Flask request context mirroring ``request``, so
+    current_event() sees the same query string, JSON body and session.
+    """
+    with flask_app.test_request_context(request.url.path,
+                                        method=request.method,
+                                        headers=list(request.headers.items()),
+                                        query_string=request.url.query,
+                                        json=data):
+        return work()
+
+
+async def _event_id(request, data=None):
+    """Id of the request's event, resolved like the Flask views do (None if unknown)"""
+    try:
+        event = await asyncio.to_thread(_in_flask_request, request, data, current_event)
+    except HTTPException:
+        return None
+    return event.id
+
+
+def _session_rate_key(request):
+    """The rate-limit key stored in the Flask session cookie, if the client has one"""
+    cookie = request.cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+    if not cookie or serializer is None:
+        return None
+    try:
+        return serializer.loads(cookie).get('rate_key')
+    except Exception:
+        return None
+
+
+def _too_many_requests(message, retry_after):
+    return JSONResponse({'success': False, 'message': message, 'error': message},
+                        status_code=429,
+                        headers={'Retry-After': str(max(1, math.ceil(retry_after)))})
+
+
+def rate_limited(handler):
+    """The Flask views' rate limits and admission control, on the event loop"""
+    @wraps(handler)
+    async def wrapped(request: Request):
+        if not rate_limiter.enabled:
+            return await handler(request)
+
+        client_ip = rate_limiter.client_ip(request.client.host if request.client else None,
+                                           request.headers.get('x-forwarded-for'))
+        wait = rate_limiter.check(_session_rate_key(request), client_ip)
+        if wait:
+            return _too_many_requests('Too many AI requests, please slow down.', wait)
+
+        if not await rate_limiter.async_gate.acquire():
+            rate_limiter.record_rejection('overloaded')
+            return _too_many_requests('The AI assistant is busy, please try again shortly.', 1)
+        rate_limiter.record_admission()
+        try:
+            return await handler(request)
+        finally:
+            rate_limiter.async_gate.release()
+
+    return wrapped
+
+
+@app.post('/api/ai-chat')
+@rate_limited
+async def ai_chat(request: Request):
+    try:
+        data = await _json_body(request)
+        message = data.get('message', '')
+
+        response = await get_ai_suggestion_async(message)
+
+        return {'success': True, 'response': response}
+
+    except Exception as e:
+        print(f"AI Chat Error: {e}")
+        return {'success': False, 'response': f'Sorry, I encountered an error: {str(e)}'}
+
+
+@app.post('/api/ai-help')
+@rate_limited
+async def ai_help(request: Request):
+    try:
+        data = await _json_body(request)
+        query = data.get('query', '')
+
+        response = await get_comprehensive_hackathon_help_async(query)
+
+        return {'success': True, 'response': response, 'query': query}
+
+    except Exception as e:
+        return {'success': False, 'response': f'Sorry, I encountered an error: {str(e)}'}
+
+
+@app.post('/generate-project-ideas')
+@rate_limited
+async def generate_project_ideas(request: Request):
+    try:
+        data = await _json_body(request)
+
+        ideas = await project_ideas_for_async(data)
+
+        return {'success': True, 'ideas': ideas}
+
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+
+@app.post('/ai-suggest-teams')
+@rate_limited
+async def ai_suggest_teams(request: Request):
+    try:
+        data = await _json_body(request)
+
+        def load_participants():
+            event = current_event()
+            participants = Participant.query.filter_by(event_id=event.id, team_id=None).all()
+            return team_suggestion_data(participants)
+
+        try:
+            participant_data = await asyncio.to_thread(_in_flask_request, request, data,
+                                                       load_participants)
+        except HTTPException as e:
+            return JSONResponse({'success': False, 'error': e.description}, status_code=e.code)
+
+        if len(participant_data) < 2:
+            return {'success': False, 'error': 'Need at least 2 participants to suggest teams'}
+
+        suggestions = await team_suggestions_for_async(participant_data)
+
+        return {'success': True, 'suggestions': suggestions}
+
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+
+@app.get('/api/team-stats/stream')
+async def team_stats_stream(request: Request):
+    """Server-sent events: a stats snapshot, then deltas as registrations and teams change"""
+    event_id = await _event_id(request)
+    if event_id is None:
+        return JSONResponse({'success': False, 'message': 'Unknown event'}, status_code=404)
+    return StreamingResponse(stats_broker.stream_async(event_id),
+                             media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# Everything else is served by the Flask app
+app.mount('/', WSGIMiddleware(flask_app))
@@ -0,0 +1,302 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import request, send_from_directory, abort
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Build output lives under the static folder so it is deployable as plain files
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+# Fingerprinted files never change, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Only text assets are worth pre-compressing; images are already compressed
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.map'}
+
+# Served variants, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_CSS_STRING_OR_COMMENT = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+
+# Keywords after which a '/' starts a regular expression rather than a division
+_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+                   'void', 'throw', 'instanceof', 'yield', 'await'}
+
+
+def minify_css(source):
+    """Drop comments and insignificant whitespace, leaving strings untouched"""
+    strings = []
+
+    def stash(match):
+        if match.group(1) is None:
+            return ' '
+        strings.append(match.group(1))
+        return f'\x00{len(strings) - 1}\x00'
+
+    css = _CSS_STRING_OR_COMMENT.sub(stash, source)
+    css = re.sub(r'\s+', ' ', css)
+    # '+' and '-' keep their spaces: calc() needs them
+    css = re.sub(r' ?([{};,>]) ?', r'\1', css)
+    css = re.sub(r': ', ':', css)
+    css = css.replace(';}', '}').strip()
+    return re.sub(r'\x00(\d+)\x00', lambda m: strings[int(m.group(1))], css)
+
+
+def _is_word(char):
+    return char.isalnum() or char in '_$\\' or ord(char) > 127
+
+
+def _minify_js(source, i=0, in_template=False):
+    """
+    Minify from ``source[i]``; inside a template ``${...}`` stop at the
+    closing brace. Returns (output, index after the last consumed char).
+    """
+    out = []
+    last_token = ''
+    depth = 0
+    length = len(source)
+    pending_space = None  # None, ' ' or '\n' seen since the last token
+
+    def emit(token):
+        nonlocal pending_space, last_token
+        if pending_space and out:
+            prev = out[-1][-1]
+            nxt = token[0]
+            if pending_space == '\n':
+                # Line breaks can matter for automatic semicolon insertion, except here
+                if prev not in '{;,([' and nxt not in ')]};,.':
+                    out.append('\n')
+                elif _is_word(prev) and _is_word(nxt):
+                    out.append(' ')
+            elif (_is_word(prev) and _is_word(nxt)) or (prev in '+-' and nxt == prev):
+                out.append(' ')
+        pending_space = None
+        out.append(token)
+        last_token = token
+
+    while i < length:
+        char = source[i]
+
+        if char in ' \t\r\n\f\v':
+            start = i
+            while i < length and source[i] in ' \t\r\n\f\v':
+                i += 1
+            newline = '\n' in source[start:i]
+            pending_space = '\n' if newline or pending_space == '\n' else ' '
+            continue
+
+        if source.startswith('//', i):
+            end = source.find('\n', i)
+            i = length if end < 0 else end
+            pending_space = pending_space or ' '
+            continue
+
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = length if end < 0 else end + 2
+            pending_space = '\n' if '\n' in source[i:end] or pending_space == '\n' else ' '
+            i = end
+            continue
+
+        if char in '"\'':
+            j = i + 1
+            while j < length and source[j] != char:
+                j += 2 if source[j] == '\\' else 1
+            emit(source[i:j + 1])
+            i = j + 1
+            continue
+
+        if char == '`':
+            parts = ['`']
+            j = i + 1
+            while j < length and source[j] != '`':
+                if source[j] == '\\':
+                    parts.append(source[j:j + 2])
+                    j += 2
+                elif source.startswith('${', j):
+                    expression, j = _minify_js(source, j + 2, in_template=True)
+                    parts.append('${' + expression + '}')
+                else:
+                    parts.append(source[j])
+                    j += 1
+            parts.append('`')
+            emit(''.join(parts))
+            i = j + 1
+            continue
+
+        if char == '/' and (not last_token or last_token in _REGEX_KEYWORDS or
+                            (not _is_word(last_token[-1]) and last_token[-1] not in ')]}"\'`')):
+            j = i + 1
+            in_class = False
+            while j < length and (in_class or source[j] != '/'):
+                if source[j] == '\\':
+                    j += 1
+                elif source[j] == '[':
+                    in_class = True
+                elif source[j] == ']':
+                    in_class = False
+                j += 1
+            j += 1
+            while j < length and _is_word(source[j]):
+                j += 1
+            emit(source[i:j])
+            i = j
+            continue
+
+        if _is_word(char):
+            j = i
+            while j < length and (_is_word(source[j]) or source[j] == '.' and
+                                  source[i].isdigit()):
+                j += 1
+            emit(source[i:j])
+            i = j
+            continue
+
+        if in_template:
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                if depth == 0:
+                    return ''.join(out), i + 1
+                depth -= 1
+        emit(char)
+        i += 1
+
+    return ''.join(out).strip(), i
+
+
+def minify_js(source):
+    """
+    Conservative JavaScript minifier: removes comments and indentation and
+    joins lines where a line break cannot change automatic semicolon
+    insertion. Names are left alone.
+    """
+    return _minify_js(source)[0]
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def build_assets(static_folder, hash_length=10):
+    """
+    Minify and fingerprint every file in ``static_folder`` into its ``dist``
+    directory, pre-compress text assets, and write the manifest mapping
+    source paths to built ones. Returns the manifest.
+    """
+    dist_root = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+
+    for directory, subdirs, files in os.walk(static_folder):
+        if os.path.abspath(directory) == os.path.abspath(static_folder):
+            subdirs[:] = [d for d in subdirs if d != DIST_DIR]
+        for name in sorted(files):
+            source_path = os.path.join(directory, name)
+            relative = os.path.relpath(source_path, static_folder).replace(os.sep, '/')
+            stem, ext = os.path.splitext(relative)
+
+            with open(source_path, 'rb') as f:
+                data = f.read()
+            minifier = MINIFIERS.get(ext.lower())
+            if minifier:
+                data = minifier(data.decode('utf-8')).encode('utf-8')
+
+            digest = hashlib.sha256(data).hexdigest()[:hash_length]
+            built = f'{DIST_DIR}/{stem}.{digest}{ext}'
+            built_path = os.path.join(static_folder, built)
+            _write(built_path, data)
+
+            if ext.lower() in COMPRESSIBLE_EXTENSIONS:
+                gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(gzipped) < len(data):
+                    _write(built_path + '.gz', gzipped)
+                if BROTLI_AVAILABLE:
+                    compressed = brotli.compress(data, mode=brotli.MODE_TEXT)
+                    if len(compressed) < len(data):
+                        _write(built_path + '.br', compressed)
+
+            manifest[relative] = built
+
+    _write(os.path.join(dist_root, MANIFEST_NAME),
+           json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+class AssetManifest:
+    """
+    Rewrites ``url_for('static', filename=...)`` to fingerprinted build
+    output and serves it with immutable caching and pre-compressed variants.
+
+    Without a built manifest (or in debug mode) the original files are
+    served as before, so development needs no build step.
+    """
+
+    def __init__(self):
+        self.manifest = {}
+        self._dist_folder = None
+
+    def init_app(self, app):
+        self._dist_folder = os.path.join(app.static_folder, DIST_DIR)
+        app.add_url_rule(f'{app.static_url_path}/{DIST_DIR}/<path:filename>',
+                         endpoint='dist_asset', view_func=self.send_asset)
+        if app.config.get('ASSETS_USE_MANIFEST', not app.debug):
+            self.load()
+        app.url_defaults(self._hashed_static_url)
+
+    def load(self):
+        path = os.path.join(self._dist_folder, MANIFEST_NAME)
+        try:
+            with open(path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = {}
+        except (OSError, ValueError) as e:
+            print(f"Asset manifest error: {e}")
+            self.manifest = {}
+
+    def _hashed_static_url(self, endpoint, values):
+        if endpoint == 'static' and self.manifest:
+            built = self.manifest.get(values.get('filename'))
+            if built:
+                values['filename'] = built
+
+    def send_asset(self, filename):
+        """Serve a built file, preferring a pre-compressed variant the client accepts"""
+        if filename.endswith(('.gz', '.br')) or filename == MANIFEST_NAME:
+            abort(404)
+
+        encoding = None
+        served = filename
+        for name, suffix in ENCODINGS:
+            if name in request.accept_encodings and \
+                    os.path.isfile(os.path.join(self._dist_folder, filename + suffix)):
+                encoding, served = name, filename + suffix
+                break
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(self._dist_folder, served, mimetype=mimetype,
+                                       max_age=31536000, conditional=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+# Global manifest instance
+asset_manifest = AssetManifest()
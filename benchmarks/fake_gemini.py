@@ -0,0 +1,106 @@
+"""
+Local stand-in for the Gemini generateContent API, for load tests.
+
+    python -m benchmarks.fake_gemini --port 8089 --latency 0.8 --jitter 0.3
+
+Point the app at it with GEMINI_BASE_URL=http://127.0.0.1:8089 and any
+GEMINI_API_KEY. Every call sleeps ``latency`` seconds (plus up to
+``jitter``) and returns a canned answer, so load tests measure the app's
+own concurrency rather than the real API's quota.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CANNED_TEXT = ("Great question! Start by agreeing on one core feature your team can demo, "
+               "split the work by strengths, and keep a working build at every checkpoint.")
+
+
+def _payload(text):
+    return {
+        'candidates': [{
+            'content': {'role': 'model', 'parts': [{'text': text}]},
+            'finishReason': 'STOP',
+            'index': 0
+        }],
+        'usageMetadata': {'promptTokenCount': 0, 'candidatesTokenCount': len(text.split()),
+                          'totalTokenCount': len(text.split())},
+        'modelVersion': 'fake-gemini'
+    }
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeGemini/1.0'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        settings = self.server.settings
+        with settings['lock']:
+            settings['calls'] += 1
+        time.sleep(settings['latency'] + random.uniform(0, settings['jitter']))
+
+        if settings['error_rate'] and random.random() < settings['error_rate']:
+            self._send_json(503, {'error': {'code': 503, 'message': 'Fake overload',
+                                            'status': 'UNAVAILABLE'}})
+            return
+
+        if ':streamGenerateContent' in self.path:
+            words = CANNED_TEXT.split(' ')
+            chunks = [' '.join(words[i:i + 8]) + ' ' for i in range(0, len(words), 8)]
+            body = ''.join(f"data: {json.dumps(_payload(chunk))}\r\n\r\n" for chunk in chunks)
+            self._send(200, body.encode(), 'text/event-stream')
+        elif ':generateContent' in self.path:
+            self._send_json(200, _payload(CANNED_TEXT))
+        else:
+            self._send_json(404, {'error': {'code': 404, 'message': 'Unknown method'}})
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode(), 'application/json')
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_fake_gemini(port=0, latency=0.5, jitter=0.0, error_rate=0.0):
+    """Serve in a background thread; returns the server (``server.server_port`` is bound)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeGeminiHandler)
+    server.daemon_threads = True
+    server.settings = {'latency': latency, 'jitter': jitter, 'error_rate': error_rate,
+                       'calls': 0, 'lock': threading.Lock()}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fake Gemini API server')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.5, help='Seconds per call')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random seconds per call')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of calls answered with 503')
+    args = parser.parse_args(argv)
+
+    server = start_fake_gemini(args.port, args.latency, args.jitter, args.error_rate)
+    print(f"Fake Gemini listening on http://127.0.0.1:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
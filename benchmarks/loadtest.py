@@ -0,0 +1,372 @@
+"""
+HTTP load test of scripted user journeys against one app node.
+
+    python -m benchmarks.loadtest --users 200 --duration 60 --workers 4 --threads 8
+
+Starts a fake Gemini server and the app under gunicorn on a fresh SQLite
+database (or targets a running server with ``--url``), seeds participants,
+then runs virtual users, each looping one journey with think time:
+
+  register   - load the form, submit a registration
+  dashboard  - poll /api/team-stats (revalidating its ETag), view teams
+  chat       - ask the AI assistant via /api/ai-chat and /api/ai-help
+  organiser  - trigger /generate-teams
+
+With ``--url``, start the server with GEMINI_BASE_URL pointing at
+``python -m benchmarks.fake_gemini`` so chat traffic is exercised.
+
+The server started here runs with RATE_LIMIT_ENABLED=0 so that the
+virtual users, who all come from one IP, measure capacity rather than the
+AI rate limits. Against ``--url`` any 429 responses are counted per route
+as ``rate_limited``, separately from errors.
+
+Reports p50/p95/p99 latency, throughput, errors and rate-limited requests
+per route, as a table on stderr and JSON on stdout (or ``--output``).
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.fake_gemini import start_fake_gemini
+from benchmarks.synthetic import generate_participants
+
+DEFAULT_MIX = 'register=2,dashboard=5,chat=3,organiser=0.05'
+
+CHAT_MESSAGES = [
+    'How should we split work in a four person team?',
+    'What can we build with React and a public health dataset?',
+    'Any tips for a three minute demo?',
+    'How do I deploy a Flask app quickly?'
+]
+
+_email_counter = itertools.count(1)
+
+
+class Recorder:
+    """Thread-safe latency samples per route"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}  # route -> list of seconds
+        self.errors = {}  # route -> count
+        self.rate_limited = {}  # route -> count of 429 responses
+
+    def record(self, route, seconds, ok, rate_limited=False):
+        with self._lock:
+            self.samples.setdefault(route, []).append(seconds)
+            if rate_limited:
+                self.rate_limited[route] = self.rate_limited.get(route, 0) + 1
+            elif not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+    def summary(self, elapsed):
+        report = {}
+        for route, samples in sorted(self.samples.items()):
+            ordered = sorted(samples)
+            report[route] = {
+                'requests': len(ordered),
+                'errors': self.errors.get(route, 0),
+                'rate_limited': self.rate_limited.get(route, 0),
+                'throughput_rps': round(len(ordered) / elapsed, 2),
+                'p50_ms': round(_percentile(ordered, 50) * 1000, 1),
+                'p95_ms': round(_percentile(ordered, 95) * 1000, 1),
+                'p99_ms': round(_percentile(ordered, 99) * 1000, 1),
+                'max_ms': round(ordered[-1] * 1000, 1)
+            }
+        return report
+
+
+def _percentile(ordered, percent):
+    """Nearest-rank percentile of a sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, int(round(percent / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Client:
+    """Keep-alive HTTP client for one virtual user, with a cookie jar of one session"""
+
+    def __init__(self, base_url, recorder, timeout=120):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.recorder = recorder
+        self.timeout = timeout
+        self.cookie = None
+        self.connection = None
+
+    def request(self, route, method, path, body=None, headers=None, ok_statuses=(200,)):
+        headers = dict(headers or {})
+        if self.cookie:
+            headers['Cookie'] = self.cookie
+        start = time.perf_counter()
+        status, response_headers = None, {}
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port,
+                                                             timeout=self.timeout)
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+            status = response.status
+            response_headers = {k.lower(): v for k, v in response.getheaders()}
+            cookie = response_headers.get('set-cookie')
+            if cookie:
+                self.cookie = cookie.split(';', 1)[0]
+            if response_headers.get('connection', '').lower() == 'close':
+                self.close()
+        except (OSError, http.client.HTTPException):
+            self.close()
+        self.recorder.record(route, time.perf_counter() - start, status in ok_statuses,
+                             rate_limited=status == 429)
+        return status, response_headers
+
+    def get(self, route, path, **kwargs):
+        return self.request(route, 'GET', path, **kwargs)
+
+    def post_form(self, route, path, fields, **kwargs):
+        return self.request(route, 'POST', path, body=urlencode(fields),
+                            headers={'Content-Type': 'application/x-www-form-urlencoded'},
+                            **kwargs)
+
+    def post_json(self, route, path, payload, **kwargs):
+        return self.request(route, 'POST', path, body=json.dumps(payload),
+                            headers={'Content-Type': 'application/json'}, **kwargs)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def register_journey(client, rng):
+    client.get('GET /register', '/register')
+    participant = generate_participants(1, seed=rng.randrange(1 << 30))[0]
+    number = next(_email_counter)
+    client.post_form('POST /register', '/register', {
+        'name': participant['name'],
+        'email': f"load{number}.{os.getpid()}.{rng.randrange(1 << 30)}@example.com",
+        'role': participant['role'],
+        'experience_level': participant['experience_level'],
+        'skills': ', '.join(participant['skills']),
+        'interests': ', '.join(participant['interests']),
+        'preferred_team_size': participant['preferred_team_size'],
+        'availability': participant['availability']
+    }, ok_statuses=(302, 303))
+
+
+def dashboard_journey(client, rng, state):
+    headers = {'If-None-Match': state['etag']} if state.get('etag') else None
+    _, response_headers = client.get('GET /api/team-stats', '/api/team-stats', headers=headers,
+                                     ok_statuses=(200, 304))
+    state['etag'] = response_headers.get('etag', state.get('etag'))
+    if rng.random() < 0.2:
+        client.get('GET /teams-view', '/teams-view')
+
+
+def chat_journey(client, rng):
+    if rng.random() < 0.7:
+        client.post_json('POST /api/ai-chat', '/api/ai-chat',
+                         {'message': rng.choice(CHAT_MESSAGES)})
+    else:
+        client.post_json('POST /api/ai-help', '/api/ai-help',
+                         {'query': rng.choice(CHAT_MESSAGES)})
+
+
+def organiser_journey(client, rng):
+    client.post_json('POST /generate-teams', '/generate-teams', {})
+
+
+JOURNEYS = {
+    'register': register_journey,
+    'dashboard': dashboard_journey,
+    'chat': chat_journey,
+    'organiser': organiser_journey
+}
+
+
+def run_user(base_url, journey, recorder, deadline, think_time, seed):
+    rng = random.Random(seed)
+    client = Client(base_url, recorder)
+    state = {}
+    try:
+        while time.monotonic() < deadline:
+            if journey == 'dashboard':
+                dashboard_journey(client, rng, state)
+            else:
+                JOURNEYS[journey](client, rng)
+            time.sleep(rng.uniform(0.5, 1.5) * think_time)
+    finally:
+        client.close()
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in JOURNEYS:
+            raise SystemExit(f"Unknown journey: {name}")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def assign_journeys(users, weights):
+    """Split ``users`` across journeys in proportion to their weights (at least one each)"""
+    total = sum(weights.values())
+    counts = {name: max(1, round(users * weight / total)) for name, weight in weights.items()}
+    return [name for name, count in counts.items() for _ in range(count)]
+
+
+def seed_database(database_url, participants, seed):
+    """Create the schema and a base population before the server starts"""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    script = (
+        "import json, sys\n"
+        "from sqlalchemy import insert\n"
+        "from app import app, db\n"
+        "from models import Participant\n"
+        "from events import get_default_event\n"
+        "from benchmarks.synthetic import generate_participants\n"
+        "with app.app_context():\n"
+        "    event = get_default_event()\n"
+        f"    rows = generate_participants({participants}, {seed}, event_id=event.id)\n"
+        "    if rows:\n"
+        "        db.session.execute(insert(Participant), rows)\n"
+        "    db.session.commit()\n"
+    )
+    subprocess.run([sys.executable, '-c', script], env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+
+
+def start_server(port, workers, threads, database_url, gemini_url):
+    gunicorn = shutil.which('gunicorn')
+    if gunicorn is None:
+        raise SystemExit("gunicorn is not installed; start the app yourself and pass --url")
+    env = dict(os.environ, DATABASE_URL=database_url, GEMINI_BASE_URL=gemini_url,
+               GEMINI_API_KEY=os.environ.get('GEMINI_API_KEY', 'load-test-key'),
+               RATE_LIMIT_ENABLED='0')
+    return subprocess.Popen(
+        [gunicorn, 'main:app', '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+         '--threads', str(threads), '--timeout', '300', '--log-level', 'warning'],
+        env=env)
+
+
+def wait_until_ready(base_url, timeout=60):
+    parts = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=2)
+            connection.request('GET', '/api/hackathon-resources')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.25)
+    raise SystemExit(f"Server at {base_url} did not become ready")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load-test scripted user journeys')
+    parser.add_argument('--users', type=int, default=50, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds of load')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='journey=weight,...')
+    parser.add_argument('--think-time', type=float, default=1.0,
+                        help='Mean seconds a user waits between journeys')
+    parser.add_argument('--url', help='Target a running server instead of starting gunicorn')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per gunicorn worker')
+    parser.add_argument('--participants', type=int, default=500,
+                        help='Participants seeded before the run')
+    parser.add_argument('--gemini-latency', type=float, default=0.8)
+    parser.add_argument('--gemini-jitter', type=float, default=0.4)
+    parser.add_argument('--gemini-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', help='Write JSON results here (default: stdout)')
+    args = parser.parse_args(argv)
+
+    weights = parse_mix(args.mix)
+    gemini = start_fake_gemini(0, args.gemini_latency, args.gemini_jitter, args.gemini_error_rate)
+    gemini_url = f'http://127.0.0.1:{gemini.server_port}'
+
+    server = None
+    workdir = None
+    base_url = args.url
+    try:
+        if base_url is None:
+            workdir = tempfile.mkdtemp(prefix='hackhub-load-')
+            database_url = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+            seed_database(database_url, args.participants, args.seed)
+            server = start_server(args.port, args.workers, args.threads, database_url, gemini_url)
+            base_url = f'http://127.0.0.1:{args.port}'
+        wait_until_ready(base_url)
+
+        recorder = Recorder()
+        journeys = assign_journeys(args.users, weights)
+        started = time.monotonic()
+        deadline = started + args.duration
+        threads = [
+            threading.Thread(target=run_user,
+                             args=(base_url, journey, recorder, deadline, args.think_time,
+                                   args.seed * 100003 + i),
+                             daemon=True)
+            for i, journey in enumerate(journeys)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        gemini.shutdown()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    routes = recorder.summary(elapsed)
+    report = {
+        'config': {
+            'users': len(journeys),
+            'journeys': {name: journeys.count(name) for name in weights},
+            'duration': round(elapsed, 2),
+            'workers': args.workers if args.url is None else None,
+            'threads': args.threads if args.url is None else None,
+            'gemini_latency': args.gemini_latency,
+            'gemini_jitter': args.gemini_jitter,
+            'gemini_calls': gemini.settings['calls']
+        },
+        'total_requests': sum(r['requests'] for r in routes.values()),
+        'throughput_rps': round(sum(r['requests'] for r in routes.values()) / elapsed, 2),
+        'routes': routes
+    }
+
+    print(f"{'route':<26} {'reqs':>6} {'err':>5} {'429':>5} {'rps':>7} {'p50':>8} {'p95':>8} "
+          f"{'p99':>8}", file=sys.stderr)
+    for route, stats in routes.items():
+        print(f"{route:<26} {stats['requests']:>6} {stats['errors']:>5} {stats['rate_limited']:>5} "
+              f"{stats['throughput_rps']:>7} {stats['p50_ms']:>8} {stats['p95_ms']:>8} "
+              f"{stats['p99_ms']:>8}", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+"""
+Team-matching benchmarks over seeded synthetic participants.
+
+Run from the repository root:
+
+    python -m benchmarks.matcher --output bench.json
+    python -m benchmarks.matcher --sizes 100,1000 --compare bench.json
+
+Each size times the matcher stages on their own (feature matrix, KMeans,
+_balance_teams, suggest_team_for_participant, scoring a newcomer against
+every team as StreamingAssigner does) and, up to ``--e2e-max``
+participants, a full POST /generate-teams against a temporary SQLite
+database. Results are JSON, so runs on different commits can be compared.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_participants, snapshot_rows
+
+DEFAULT_SIZES = (100, 1000, 5000, 10000, 50000)
+
+# Sizes above this are timed once; KMeans alone takes about a minute at 50k
+SINGLE_RUN_ABOVE = 10000
+
+# Participants placed by each suggest_team_for_participant timing
+SUGGEST_SAMPLE = 20
+
+# Newcomers scored against every team by each streaming_gains timing
+PLACE_SAMPLE = 20
+
+
+def _time(function, repeat):
+    """Wall times of ``repeat`` calls and the last call's result"""
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+    return times, result
+
+
+def _record(results, size, stage, times, **extra):
+    entry = {
+        'size': size,
+        'stage': stage,
+        'seconds': [round(t, 6) for t in times],
+        'min': round(min(times), 6),
+        'median': round(statistics.median(times), 6)
+    }
+    entry.update(extra)
+    results.append(entry)
+    print(f"{size:>7} {stage:<28} median {entry['median']:.4f}s", file=sys.stderr)
+
+
+def bench_stages(size, seed, repeat, results):
+    """Time the matcher's stages in isolation on one snapshot"""
+    from sklearn.cluster import KMeans
+    from participant_snapshot import ParticipantSnapshot
+    from team_matcher import TeamMatcher
+
+    participants = generate_participants(size, seed)
+    snapshot = ParticipantSnapshot.from_rows(snapshot_rows(participants))
+    matcher = TeamMatcher()
+    target_team_size = 4
+    num_teams = max(1, size // target_team_size)
+
+    times, features = _time(lambda: matcher._create_feature_matrix(snapshot), repeat)
+    _record(results, size, 'create_feature_matrix', times, shape=list(features.shape))
+
+    def cluster():
+        return KMeans(n_clusters=num_teams, random_state=42, n_init='auto').fit_predict(features)
+
+    times, labels = _time(cluster, repeat)
+    _record(results, size, 'kmeans', times, clusters=num_teams)
+
+    clustered = matcher._teams_from_labels(snapshot, labels, num_teams)
+    times, teams = _time(lambda: matcher._balance_teams(copy.deepcopy(clustered), target_team_size),
+                         repeat)
+    _record(results, size, 'balance_teams', times, teams=len(teams))
+
+    team_rows = {number: snapshot.rows_for(team['participant_ids'])
+                 for number, team in enumerate(teams, 1)}
+    sample = np.random.default_rng(seed).choice(size, min(SUGGEST_SAMPLE, size), replace=False)
+
+    def suggest():
+        return [matcher.suggest_team_for_participant(snapshot, int(row), team_rows)
+                for row in sample]
+
+    times, _ = _time(suggest, repeat)
+    _record(results, size, 'suggest_team_for_participant',
+            [t / len(sample) for t in times], per='call', calls=len(sample))
+
+    # Seat everyone in the balanced teams, then score sampled participants as newcomers
+    from types import SimpleNamespace
+    from streaming_assignment import _EventTeams
+
+    team_of = {pid: number for number, team in enumerate(teams, 1) for pid in team['participant_ids']}
+    seated = ParticipantSnapshot.from_rows(
+        row[:-1] + (team_of.get(row[0]),) for row in snapshot_rows(participants))
+    state = _EventTeams(seated, np.arange(1, len(teams) + 1), 2, 6)
+    every_team = np.arange(len(teams))
+    sample = np.random.default_rng(seed).choice(size, min(PLACE_SAMPLE, size), replace=False)
+    newcomers = [SimpleNamespace(**participants[row]) for row in sample]
+
+    def place():
+        return [state.gains(every_team, state.profile(newcomer)) for newcomer in newcomers]
+
+    times, _ = _time(place, repeat)
+    _record(results, size, 'streaming_gains',
+            [t / len(sample) for t in times], per='call', calls=len(sample))
+
+
+def bench_generate_teams(sizes, seed, repeat, results):
+    """Time POST /generate-teams end to end against a temporary SQLite database"""
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        from sqlalchemy import insert
+        from app import app, db
+        from models import Event, Participant
+
+        client = app.test_client()
+        for size in sizes:
+            times = []
+            for run in range(repeat):
+                with app.app_context():
+                    event = Event(name=f'Bench {size}-{run}', slug=f'bench-{size}-{run}')
+                    db.session.add(event)
+                    db.session.flush()
+                    db.session.execute(insert(Participant),
+                                       generate_participants(size, seed, event_id=event.id))
+                    db.session.commit()
+                    slug = event.slug
+
+                start = time.perf_counter()
+                response = client.post('/generate-teams', json={'event': slug})
+                times.append(time.perf_counter() - start)
+                if not response.get_json().get('success'):
+                    raise RuntimeError(f"/generate-teams failed: {response.get_json()}")
+            _record(results, size, 'generate_teams_e2e', times,
+                    server_timing=response.headers.get('Server-Timing'))
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current):
+    """Print median ratios (current / baseline) for stages present in both runs"""
+    previous = {(r['size'], r['stage']): r['median'] for r in baseline['results']}
+    print(f"{'size':>7} {'stage':<28} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for result in current['results']:
+        before = previous.get((result['size'], result['stage']))
+        if before:
+            print(f"{result['size']:>7} {result['stage']:<28} {before:>10.4f} "
+                  f"{result['median']:>10.4f} {result['median'] / before:>7.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Comma-separated participant counts')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3,
+                        help=f'Runs per stage (sizes above {SINGLE_RUN_ABOVE} run once)')
+    parser.add_argument('--e2e-max', type=int, default=10000,
+                        help='Largest size for the /generate-teams benchmark (0 to skip)')
+    parser.add_argument('--output', '-o', help='Write JSON results here (default: stdout)')
+    parser.add_argument('--compare', help='Earlier results JSON to compare against')
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = []
+    for size in sizes:
+        bench_stages(size, args.seed, 1 if size > SINGLE_RUN_ABOVE else args.repeat, results)
+
+    e2e_sizes = [size for size in sizes if size <= args.e2e_max]
+    if e2e_sizes:
+        bench_generate_teams(e2e_sizes, args.seed, args.repeat, results)
+
+    import sklearn
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'seed': args.seed,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scikit_learn': sklearn.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count()
+        },
+        'results': results
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
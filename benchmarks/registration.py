@@ -0,0 +1,138 @@
+"""
+Registration throughput with and without group commit.
+
+Run from the repository root:
+
+    python -m benchmarks.registration --output registration.json
+    python -m benchmarks.registration --concurrency 1,16,64 --count 2000
+
+Each run starts a fresh event in a temporary SQLite database and has
+``--concurrency`` threads POST /simple_register until ``--count``
+participants (plus ``--duplicate-rate`` repeated emails) have been sent.
+It then reports registrations per second and latency percentiles, first
+with REGISTRATION_BATCHING off (one commit per request) and then on.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.synthetic import generate_participants
+
+
+def _form(participant):
+    return {
+        'name': participant['name'],
+        'email': participant['email'],
+        'role': participant['role'],
+        'experience_level': participant['experience_level'],
+        'skills': ', '.join(participant['skills']),
+        'interests': ', '.join(participant['interests']),
+        'preferred_team_size': str(participant['preferred_team_size']),
+        'availability': participant['availability']
+    }
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(app, db, batching, concurrency, count, duplicate_rate, seed):
+    from models import Event, Participant
+    from registrations import registration_batcher
+
+    registration_batcher.enabled = batching
+    slug = f"bench-{'batched' if batching else 'single'}-{concurrency}-{time.time_ns()}"
+    with app.app_context():
+        db.session.add(Event(name=slug, slug=slug))
+        db.session.commit()
+
+    participants = generate_participants(count, seed)
+    forms = [_form(p) for p in participants]
+    forms += forms[:int(count * duplicate_rate)]
+    next_form = iter(range(len(forms)))
+    claim = threading.Lock()
+    latencies = []
+    failures = []
+
+    def worker():
+        client = app.test_client()
+        while True:
+            with claim:
+                index = next(next_form, None)
+            if index is None:
+                return
+            start = time.perf_counter()
+            response = client.post(f'/simple_register?event={slug}', data=forms[index])
+            latencies.append(time.perf_counter() - start)
+            if response.status_code not in (200, 302):
+                failures.append(response.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        event = Event.query.filter_by(slug=slug).one()
+        stored = Participant.query.filter_by(event_id=event.id).count()
+
+    result = {
+        'batching': batching,
+        'concurrency': concurrency,
+        'requests': len(forms),
+        'stored': stored,
+        'failures': len(failures),
+        'seconds': round(elapsed, 4),
+        'registrations_per_second': round(len(forms) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2),
+        'p95_ms': round(_percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2)
+    }
+    print(f"batching={'on ' if batching else 'off'} concurrency={concurrency:<4} "
+          f"{result['registrations_per_second']:>8.1f} reg/s  p50 {result['p50_ms']:.1f}ms  "
+          f"p95 {result['p95_ms']:.1f}ms  stored {stored}/{count}  failures {len(failures)}",
+          file=sys.stderr)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', default='1,16,64',
+                        help='Comma-separated numbers of concurrent clients')
+    parser.add_argument('--count', type=int, default=1000, help='Distinct participants per run')
+    parser.add_argument('--duplicate-rate', type=float, default=0.05,
+                        help='Fraction of participants who submit the form twice')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', help='Write JSON results here (default: stdout)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        from app import app, db
+        app.config['RATE_LIMIT_ENABLED'] = False
+
+        results = []
+        for concurrency in [int(c) for c in args.concurrency.split(',') if c.strip()]:
+            for batching in (False, True):
+                results.append(run(app, db, batching, concurrency, args.count,
+                                   args.duplicate_rate, args.seed))
+
+    text = json.dumps({'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Seeded synthetic participants with realistic role, experience and skill mixes.
+
+The same (count, seed) always yields the same participants, so benchmark
+runs on different commits see identical input.
+"""
+import random
+
+# Registration form roles, weighted like a typical student hackathon
+ROLE_WEIGHTS = {
+    'Developer': 45,
+    'Designer': 14,
+    'Data Scientist': 12,
+    'Product Manager': 9,
+    'Business': 8,
+    'Marketing': 6,
+    'Other': 6
+}
+
+EXPERIENCE_WEIGHTS = {
+    'Beginner': 45,
+    'Intermediate': 38,
+    'Advanced': 17
+}
+
+# Skills each role tends to list, most common first
+ROLE_SKILLS = {
+    'Developer': ['Python', 'JavaScript', 'React', 'Node.js', 'SQL', 'Git', 'Java', 'TypeScript',
+                  'Docker', 'AWS', 'C++', 'Go', 'Flutter', 'Kotlin', 'Swift', 'Rust', 'GraphQL',
+                  'Kubernetes', 'Firebase', 'MongoDB'],
+    'Designer': ['Figma', 'UI/UX', 'Adobe XD', 'Photoshop', 'Illustrator', 'Prototyping',
+                 'User Research', 'CSS', 'HTML', 'Sketch', 'Blender'],
+    'Data Scientist': ['Python', 'Pandas', 'Machine Learning', 'SQL', 'TensorFlow', 'PyTorch',
+                       'Statistics', 'R', 'Data Visualization', 'NLP', 'Computer Vision',
+                       'scikit-learn'],
+    'Product Manager': ['Product Strategy', 'Agile', 'User Research', 'Roadmapping', 'Jira',
+                        'Figma', 'SQL', 'Presentation', 'Analytics'],
+    'Business': ['Pitching', 'Business Model', 'Market Research', 'Finance', 'Excel',
+                 'Presentation', 'Sales', 'Strategy'],
+    'Marketing': ['Social Media', 'Content Writing', 'SEO', 'Branding', 'Analytics',
+                  'Presentation', 'Canva', 'Copywriting'],
+    'Other': ['Python', 'Excel', 'Presentation', 'Arduino', 'Hardware', 'Research', 'Writing']
+}
+
+INTERESTS = ['AI/ML', 'Web Development', 'Mobile Apps', 'HealthTech', 'FinTech', 'EdTech',
+             'Sustainability', 'Blockchain', 'Gaming', 'IoT', 'Social Impact', 'Cybersecurity',
+             'AR/VR', 'Developer Tools', 'Robotics']
+
+# Skills listed per participant grows with experience
+SKILL_COUNT_RANGE = {
+    'Beginner': (1, 3),
+    'Intermediate': (2, 5),
+    'Advanced': (3, 8)
+}
+
+TEAM_SIZE_WEIGHTS = {2: 5, 3: 25, 4: 50, 5: 20}
+
+AVAILABILITY_WEIGHTS = {'Full-time': 70, 'Part-time': 20, 'Weekend': 10}
+
+
+def _weighted(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _zipf_sample(rng, pool, count):
+    """Pick ``count`` distinct items, favouring the front of ``pool``"""
+    weights = [1.0 / (rank + 1) for rank in range(len(pool))]
+    chosen = []
+    candidates = list(pool)
+    while candidates and len(chosen) < count:
+        pick = rng.choices(range(len(candidates)), weights=weights[:len(candidates)])[0]
+        chosen.append(candidates.pop(pick))
+        weights.pop(pick)
+    return chosen
+
+
+def generate_participants(count, seed=0, event_id=None):
+    """
+    ``count`` participant dicts with the Participant model's fields.
+
+    About one in five participants also lists a skill from another role,
+    so clusters overlap the way real registrations do.
+    """
+    rng = random.Random(seed)
+    participants = []
+    for i in range(count):
+        role = _weighted(rng, ROLE_WEIGHTS)
+        level = _weighted(rng, EXPERIENCE_WEIGHTS)
+        low, high = SKILL_COUNT_RANGE[level]
+        skills = _zipf_sample(rng, ROLE_SKILLS[role], rng.randint(low, high))
+        if rng.random() < 0.2:
+            other = ROLE_SKILLS[_weighted(rng, ROLE_WEIGHTS)]
+            extra = rng.choice(other)
+            if extra not in skills:
+                skills.append(extra)
+
+        participant = {
+            'name': f'Participant {i + 1}',
+            'email': f'participant{i + 1}.{seed}@example.com',
+            'role': role,
+            'experience_level': level,
+            'skills': skills,
+            'interests': rng.sample(INTERESTS, rng.randint(1, 3)),
+            'preferred_team_size': _weighted(rng, TEAM_SIZE_WEIGHTS),
+            'availability': _weighted(rng, AVAILABILITY_WEIGHTS)
+        }
+        if event_id is not None:
+            participant['event_id'] = event_id
+        participants.append(participant)
+    return participants
+
+
+def snapshot_rows(participants):
+    """Rows for ParticipantSnapshot.from_rows, with ids numbered from 1 and no teams"""
+    return [(i + 1, p['role'], p['experience_level'], p['skills'], p['interests'],
+             p['preferred_team_size'], None)
+            for i, p in enumerate(participants)]
@@ -0,0 +1,111 @@
+"""
+Capacity-constrained team assignment against KMeans plus _balance_teams.
+
+Run from the repository root:
+
+    python -m benchmarks.team_sizes --output team_sizes.json
+    python -m benchmarks.team_sizes --sizes 1000,10000 --min-size 3 --max-size 5
+
+For each size the same seeded participants go through
+create_balanced_teams (KMeans to teams of 4, then _balance_teams, with and
+without refinement) and create_capacitated_teams (preferred sizes within
+[--min-size, --max-size], with and without refinement). Each method
+reports wall time, teams outside the size bounds, participants left
+unassigned, how far team sizes are from what members asked for, and the
+mean balance score recomputed from the final membership.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import generate_participants, snapshot_rows
+
+DEFAULT_SIZES = (1000, 10000)
+
+
+def _methods(matcher, min_size, max_size):
+    return {
+        'kmeans_balance': lambda s: matcher.create_balanced_teams(s, 4, refine=False),
+        'kmeans_balance_refine': lambda s: matcher.create_balanced_teams(s, 4),
+        'capacitated': lambda s: matcher.create_capacitated_teams(s, min_size, max_size,
+                                                                   refine=False),
+        'capacitated_refine': lambda s: matcher.create_capacitated_teams(s, min_size, max_size),
+    }
+
+
+def evaluate(matcher, snapshot, teams, min_size, max_size):
+    """Constraint violations and balance of a set of generated teams"""
+    sizes = np.array([len(team['participant_ids']) for team in teams])
+    rows = [snapshot.rows_for(team['participant_ids']) for team in teams]
+    member_rows = np.concatenate(rows)
+    member_sizes = np.repeat(sizes, sizes)
+    misfit = np.abs(snapshot.preferred_team_size[member_rows] - member_sizes)
+    # _balance_teams moves members without rescoring, so score the final teams here
+    scores = [matcher._calculate_balance_score(snapshot, team_rows) for team_rows in rows]
+    return {
+        'teams': len(teams),
+        'smallest_team': int(sizes.min()),
+        'largest_team': int(sizes.max()),
+        'teams_out_of_bounds': int(np.count_nonzero((sizes < min_size) | (sizes > max_size))),
+        'unassigned': len(snapshot) - int(sizes.sum()),
+        'preferred_size_met': round(float(np.mean(misfit == 0)), 4),
+        'mean_size_misfit': round(float(misfit.mean()), 4),
+        'mean_balance_score': round(float(np.mean(scores)), 4)
+    }
+
+
+def run(size, seed, repeat, min_size, max_size):
+    from participant_snapshot import ParticipantSnapshot
+    from team_matcher import TeamMatcher
+
+    snapshot = ParticipantSnapshot.from_rows(snapshot_rows(generate_participants(size, seed)))
+    matcher = TeamMatcher()
+    results = []
+    for method, create in _methods(matcher, min_size, max_size).items():
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            teams = create(snapshot)
+            times.append(time.perf_counter() - start)
+
+        result = {'size': size, 'method': method, 'median_seconds': round(statistics.median(times), 4)}
+        result.update(evaluate(matcher, snapshot, teams, min_size, max_size))
+        results.append(result)
+        print(f"{size:>7} {method:<22} {result['median_seconds']:>8.3f}s  "
+              f"out of bounds {result['teams_out_of_bounds']:>4}  "
+              f"unassigned {result['unassigned']:>3}  "
+              f"size met {result['preferred_size_met']:.1%}  "
+              f"balance {result['mean_balance_score']:.3f}", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Comma-separated participant counts')
+    parser.add_argument('--min-size', type=int, default=2, help='Smallest allowed team')
+    parser.add_argument('--max-size', type=int, default=6, help='Largest allowed team')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per method')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', help='Write JSON results here (default: stdout)')
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in [int(size) for size in args.sizes.split(',') if size.strip()]:
+        results.extend(run(size, args.seed, args.repeat, args.min_size, args.max_size))
+
+    text = json.dumps({'min_size': args.min_size, 'max_size': args.max_size,
+                       'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+import sys
+
+import click
+from app import app, db
+from database import upgrade_schema
+from assets import build_assets, asset_manifest, BROTLI_AVAILABLE
+from exports import export_chunks, ExportError, EXPORT_FORMATS
+from events import adopt_unscoped_rows, find_event, refresh_balance_scores, run_matching_parallel
+from models import Event
+
+
+def _resolve_event(key):
+    event = find_event(key)
+    if event is None:
+        raise click.ClickException(f"Unknown event: {key}")
+    return event
+
+
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Bring an older database up to the current schema and scope its rows to the default event"""
+    db.create_all()
+    upgrade_schema()
+    adopt_unscoped_rows()
+    click.echo("Database schema is up to date")
+
+
+@app.cli.command('export')
+@click.argument('kind', type=click.Choice(['participants', 'teams']))
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_FORMATS)), default='csv',
+              help='Output format')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), default=None,
+              help='File to write (defaults to stdout)')
+@click.option('--event', 'event_key', default=None,
+              help='Event id or slug (defaults to all events)')
+def export_command(kind, fmt, output, event_key):
+    """Stream participants or teams to a file or stdout"""
+    event_id = _resolve_event(event_key).id if event_key else None
+    try:
+        chunks = export_chunks(kind, fmt, event_id)
+    except ExportError as e:
+        raise click.ClickException(str(e))
+
+    binary = fmt == 'parquet'
+    if output:
+        stream = open(output, 'wb' if binary else 'w', newline='' if not binary else None)
+    else:
+        stream = sys.stdout.buffer if binary else sys.stdout
+
+    try:
+        for chunk in chunks:
+            stream.write(chunk)
+    finally:
+        if output:
+            stream.close()
+
+
+@app.cli.command('generate-teams')
+@click.option('--event', 'event_keys', multiple=True, required=True,
+              help='Event id or slug; repeat to match several events')
+@click.option('--workers', type=int, default=None,
+              help='Events matched concurrently (defaults to one per CPU)')
+@click.option('--team-size', type=int, default=None,
+              help='Fixed team size (default: preferred sizes within TEAM_MIN_SIZE..TEAM_MAX_SIZE)')
+@click.option('--optimise', is_flag=True,
+              help='Use the parallel multi-restart search for each event')
+def generate_teams_command(event_keys, workers, team_size, optimise):
+    """Form teams for one or more events in parallel"""
+    event_ids = [_resolve_event(key).id for key in event_keys]
+    results = run_matching_parallel(app, event_ids, max_workers=workers,
+                                    target_team_size=team_size, optimise=optimise)
+    for event_key, event_id in zip(event_keys, event_ids):
+        click.echo(f"{event_key}: {results[event_id]}")
+
+
+@app.cli.command('refresh-scores')
+@click.option('--event', 'event_keys', multiple=True,
+              help='Event id or slug; repeat for several (defaults to all events)')
+def refresh_scores_command(event_keys):
+    """Recompute every team's stored balance score from its current members"""
+    events = [_resolve_event(key) for key in event_keys] or Event.query.order_by(Event.id).all()
+    for event in events:
+        updated = refresh_balance_scores(event.id)
+        db.session.commit()
+        click.echo(f"{event.slug}: {updated} teams rescored")
+
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Minify, fingerprint and pre-compress everything under static/"""
+    manifest = build_assets(app.static_folder)
+    asset_manifest.load()
+    click.echo(f"Built {len(manifest)} assets into {app.static_folder}/dist")
+    if not BROTLI_AVAILABLE:
+        click.echo("brotli is not installed; only gzip variants were written")
+
+
+@app.cli.command('sync-replica')
+def sync_replica_command():
+    """Copy the primary SQLite database to the SQLite read replica (local testing)"""
+    from read_replica import sync_sqlite_replica
+    if 'replica' not in app.config.get('SQLALCHEMY_BINDS', {}):
+        raise click.ClickException('No replica configured; set DATABASE_REPLICA_URL')
+    with app.app_context():
+        try:
+            path = sync_sqlite_replica()
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    click.echo(f"Replica updated: {path}")
@@ -0,0 +1,76 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Passed to listeners when a bulk statement changed rows of unknown events
+ALL_EVENTS = None
+
+_listeners = []
+_tracked_models = ()
+
+
+def on_commit(callback):
+    """
+    Register ``callback(event_ids)`` to run after a commit that wrote
+    tracked models. ``event_ids`` is a set of affected event ids, or
+    ALL_EVENTS when a bulk UPDATE/DELETE made the events unknowable or a
+    model without an ``event_id`` (such as Event itself) was written.
+    """
+    _listeners.append(callback)
+    return callback
+
+
+def track_models(*models):
+    """Start reporting commits that insert, update or delete these models"""
+    global _tracked_models
+    _tracked_models = tuple(models)
+
+    if not event.contains(Session, 'after_flush', _collect_flushed):
+        event.listen(Session, 'after_flush', _collect_flushed)
+        event.listen(Session, 'do_orm_execute', _collect_bulk)
+        event.listen(Session, 'after_commit', _notify)
+        event.listen(Session, 'after_rollback', _discard)
+
+
+def record_changes(session, event_ids):
+    """
+    Report rows of these events written with Core statements on the
+    session's connection, which the ORM flush hooks don't see.
+    """
+    _pending(session).update(event_ids)
+
+
+def _pending(session):
+    return session.info.setdefault('changed_events', set())
+
+
+def _collect_flushed(session, flush_context):
+    changed = _pending(session)
+    for instance in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(instance, _tracked_models):
+            changed.add(getattr(instance, 'event_id', ALL_EVENTS))
+
+
+def _collect_bulk(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or
+            orm_execute_state.is_insert):
+        return
+    for mapper in orm_execute_state.all_mappers:
+        if mapper.class_ in _tracked_models:
+            _pending(orm_execute_state.session).add(ALL_EVENTS)
+            return
+
+
+def _notify(session):
+    changed = session.info.pop('changed_events', None)
+    if not changed:
+        return
+    event_ids = ALL_EVENTS if ALL_EVENTS in changed else frozenset(changed)
+    for callback in _listeners:
+        try:
+            callback(event_ids)
+        except Exception as e:
+            print(f"Change listener error: {e}")
+
+
+def _discard(session):
+    session.info.pop('changed_events', None)
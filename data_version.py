@@ -0,0 +1,200 @@
+import hashlib
+import mmap
+import os
+import socket
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import formatdate
+from functools import wraps
+
+from flask import g, has_request_context, request, session, make_response
+from sqlalchemy import insert, select, update
+from data_changes import on_commit
+from database import db, database_identity
+from models import DataVersionCounter
+
+try:
+    import fcntl
+except ImportError:  # Windows: the counter is still shared, bumps are only locked per process
+    fcntl = None
+
+# Counter layout in the shared file: version, unix time of the last bump
+_LAYOUT = struct.Struct('<Qd')
+# Followed by the number of commits that changed data, plus one per process start
+_COMMITS = struct.Struct('<Q')
+_FILE_SIZE = _LAYOUT.size + _COMMITS.size
+
+
+class DataVersion:
+    """
+    Write counter for participant and team data, shared by every worker.
+
+    With DATA_VERSION_STORE = 'file' (the default) the counter lives in a
+    small memory-mapped file under the instance directory, so reading it
+    is a memory access rather than a query, and a commit in one gunicorn
+    worker is seen by all of them. Workers on other hosts don't share it,
+    so deployments with several app nodes set DATA_VERSION_STORE =
+    'database': the counter is then a row of the data_version table,
+    bumped after each commit and read once per request.
+
+    ``identity`` names the database and, for the file store, the node;
+    ETags carry it so that versions of different counters never compare
+    equal.
+    """
+
+    def __init__(self):
+        self._map = None
+        self._fd = None
+        self._engine = None
+        self._lock = threading.Lock()
+        self._local = [0, time.time()]
+        self._local_commits = 0
+        self.identity = 'local'
+
+    def init_app(self, app):
+        if app.config.get('DATA_VERSION_STORE', 'file') == 'database':
+            self._engine = db.engine
+            self.identity = database_identity()
+            with self._engine.begin() as connection:
+                if connection.execute(select(DataVersionCounter.id)).first() is None:
+                    connection.execute(insert(DataVersionCounter).values(
+                        id=1, version=0, commits=0, modified=time.time()))
+        else:
+            os.makedirs(app.instance_path, exist_ok=True)
+            path = os.path.join(app.instance_path, 'data_version')
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            with self._exclusive():
+                if os.fstat(self._fd).st_size < _FILE_SIZE:
+                    os.ftruncate(self._fd, _FILE_SIZE)
+            self._map = mmap.mmap(self._fd, _FILE_SIZE)
+            node = f"{database_identity()}:{socket.gethostname()}:{os.path.abspath(path)}"
+            self.identity = hashlib.sha1(node.encode()).hexdigest()[:12]
+
+        # Writes made while this process was down must not validate old ETags
+        # or reuse derived data, so a start counts as a commit
+        self._advance()
+        on_commit(self.bump)
+
+    @contextmanager
+    def _exclusive(self):
+        """Lock the counter file against other worker processes"""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _row(self):
+        """(version, modified, commits) from the database store, read once per request"""
+        if has_request_context() and '_data_version' in g:
+            return g._data_version
+        with self._engine.connect() as connection:
+            row = tuple(connection.execute(select(
+                DataVersionCounter.version, DataVersionCounter.modified,
+                DataVersionCounter.commits).where(DataVersionCounter.id == 1)).one())
+        if has_request_context():
+            g._data_version = row
+        return row
+
+    def current(self):
+        """(version, last-modified unix time)"""
+        if self._engine is not None:
+            return self._row()[:2]
+        if self._map is None:
+            return tuple(self._local)
+        return _LAYOUT.unpack_from(self._map)
+
+    def commits(self):
+        """
+        Number of commits that changed participant or team data, plus one
+        per process start (writes made while the app was down aren't seen).
+        It lives beside the version in the shared store, so it can key
+        derived data persisted on disk.
+        """
+        if self._engine is not None:
+            return self._row()[2]
+        if self._map is None:
+            return self._local_commits
+        return _COMMITS.unpack_from(self._map, _LAYOUT.size)[0]
+
+    def bump(self, event_ids=None):
+        """Advance the version; registered to run after commits touching tracked models"""
+        self._advance()
+
+    def _advance(self):
+        if self._engine is not None:
+            with self._engine.begin() as connection:
+                connection.execute(update(DataVersionCounter).where(DataVersionCounter.id == 1).values(
+                    version=DataVersionCounter.version + 1,
+                    commits=DataVersionCounter.commits + 1,
+                    modified=time.time()))
+            if has_request_context():
+                g.pop('_data_version', None)
+            return
+        with self._lock:
+            if self._map is None:
+                self._local = [self._local[0] + 1, time.time()]
+                self._local_commits += 1
+                return
+            with self._exclusive():
+                version, _ = _LAYOUT.unpack_from(self._map)
+                _LAYOUT.pack_into(self._map, 0, version + 1, time.time())
+                commits, = _COMMITS.unpack_from(self._map, _LAYOUT.size)
+                _COMMITS.pack_into(self._map, _LAYOUT.size, commits + 1)
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since:
+        return int(last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+
+def _not_modified_response(etag, last_modified, cache_control):
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.headers['Last-Modified'] = formatdate(last_modified, usegmt=True)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def conditional_on_data_version(view):
+    """
+    Serve a view with an ETag and Last-Modified derived from the data
+    version, answering revalidations with 304 before the view runs, so no
+    query or serialisation happens while nothing has changed.
+
+    The tag includes the counter's identity (see DataVersion) and the
+    requested event key (query string or session), read without touching
+    the database. Requests carrying flashed messages
+    always render, so the messages are shown and consumed.
+    """
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        version, last_modified = data_version.current()
+        event_key = request.args.get('event') or session.get('event_id') or 'default'
+        etag = f"v{version}-{data_version.identity}-e{event_key}"
+        cache_control = 'private, no-cache'
+
+        if '_flashes' not in session and _not_modified(etag, last_modified):
+            return _not_modified_response(etag, last_modified, cache_control)
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            response.set_etag(etag)
+            response.headers['Last-Modified'] = formatdate(last_modified, usegmt=True)
+            response.headers['Cache-Control'] = cache_control
+            response.vary.add('Cookie')
+        return response
+
+    return wrapped
+
+
+# Global counter instance
+data_version = DataVersion()
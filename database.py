@@ -1,7 +1,153 @@
+import hashlib
+
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import MetaData, UniqueConstraint, inspect, text
+from sqlalchemy.sql.expression import UpdateBase
 from sqlalchemy.orm import DeclarativeBase
 
+# SQLALCHEMY_BINDS key of the optional read replica
+REPLICA_BIND = 'replica'
+
+
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
\ No newline at end of file
+
+class RoutingSession(Session):
+    """
+    Sends queries to the read replica while a view marked read-only by
+    read_replica.replica_reads runs. Flushes and INSERT/UPDATE/DELETE
+    statements always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not isinstance(clause, UpdateBase)
+                and has_request_context() and g.get('read_replica')):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(model_class=Base, session_options={'class_': RoutingSession})
+
+
+def database_identity(engine=None):
+    """Short stable name for the database ``engine`` (the primary by default) points at"""
+    url = (engine or db.engine).url.render_as_string(hide_password=True)
+    return hashlib.sha1(url.encode()).hexdigest()[:12]
+
+
+def _missing_columns(inspector, table):
+    existing_columns = {c['name'] for c in inspector.get_columns(table.name)}
+    return [column for column in table.columns if column.name not in existing_columns]
+
+
+def _unique_changes(inspector, table):
+    """
+    (stale, missing) uniqueness rules of an existing table: stale are
+    (kind, name, columns) for rules in the database the model no longer
+    declares, e.g. UNIQUE(email) from before participants were scoped to
+    events; missing are the model's named UniqueConstraints not yet there.
+    """
+    declared = {frozenset(column.name for column in constraint.columns)
+                for constraint in table.constraints
+                if isinstance(constraint, UniqueConstraint)}
+    declared |= {frozenset(column.name for column in index.columns)
+                 for index in table.indexes if index.unique}
+    declared |= {frozenset([column.name]) for column in table.columns if column.unique}
+
+    existing = [('constraint', unique['name'], frozenset(unique['column_names']))
+                for unique in inspector.get_unique_constraints(table.name)]
+    existing += [('index', index['name'], frozenset(index['column_names']))
+                 for index in inspector.get_indexes(table.name) if index['unique']]
+
+    stale = [rule for rule in existing if rule[2] not in declared]
+    existing_columns = {columns for _, _, columns in existing}
+    missing = [constraint for constraint in table.constraints
+               if isinstance(constraint, UniqueConstraint) and constraint.name
+               and frozenset(column.name for column in constraint.columns) not in existing_columns]
+    return stale, missing
+
+
+def schema_is_current():
+    """True if every model table exists with all of its columns, indexes and unique rules"""
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables or _missing_columns(inspector, table):
+            return False
+        existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+        if any(index.name not in existing_indexes for index in table.indexes):
+            return False
+        if any(_unique_changes(inspector, table)):
+            return False
+    return True
+
+
+def _rebuild_sqlite_table(connection, table):
+    """
+    SQLite cannot drop a constraint, so copy the rows into a table created
+    from the model and swap it in (SQLite's documented procedure).
+    """
+    inspector = inspect(connection)
+    existing_columns = {c['name'] for c in inspector.get_columns(table.name)}
+    columns = ', '.join(f'"{column.name}"' for column in table.columns
+                        if column.name in existing_columns)
+    for index in inspector.get_indexes(table.name):
+        connection.execute(text(f'DROP INDEX "{index["name"]}"'))
+
+    # A scratch copy of the schema, so foreign keys resolve without
+    # touching db.metadata
+    metadata = MetaData()
+    for model_table in db.metadata.sorted_tables:
+        model_table.to_metadata(metadata)
+    new_name = f'_{table.name}_new'
+    table.to_metadata(metadata, name=new_name).create(connection)
+    connection.execute(text(
+        f'INSERT INTO "{new_name}" ({columns}) SELECT {columns} FROM "{table.name}"'))
+    connection.execute(text(f'DROP TABLE "{table.name}"'))
+    connection.execute(text(f'ALTER TABLE "{new_name}" RENAME TO "{table.name}"'))
+
+
+def upgrade_schema():
+    """
+    Bring tables created by older versions up to the models. db.create_all()
+    only creates missing tables, so older databases are patched in place
+    here (by `flask upgrade-db`, never on import): nullable columns and
+    indexes are added, unique rules the models no longer declare are
+    dropped (SQLite rebuilds the table for that) and new named unique
+    constraints are created as unique indexes.
+    """
+    engine = db.engine
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            for column in _missing_columns(inspector, table):
+                if not column.nullable:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(
+                    f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
+            stale, missing = _unique_changes(inspector, table)
+            if stale and engine.dialect.name == 'sqlite':
+                _rebuild_sqlite_table(connection, table)
+                continue
+            for kind, name, _ in stale:
+                if kind == 'index':
+                    connection.execute(text(f'DROP INDEX "{name}"'))
+                else:
+                    connection.execute(text(f'ALTER TABLE "{table.name}" DROP CONSTRAINT "{name}"'))
+            for constraint in missing:
+                column_names = ', '.join(f'"{column.name}"' for column in constraint.columns)
+                connection.execute(text(f'CREATE UNIQUE INDEX IF NOT EXISTS "{constraint.name}" '
+                                        f'ON "{table.name}" ({column_names})'))
+
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
@@ -5,6 +5,7 @@ import re
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from gemini_assistant import gemini_assistant
+from knowledge_base import knowledge_base, bullet_list
 
 
 class ConversationContext:
@@ -98,6 +99,9 @@ class AdvancedAIAssistant:
         self.technical_solutions = self._load_technical_solutions()
         self.team_psychology = self._load_team_psychology_insights()
         self.presentation_frameworks = self._load_presentation_frameworks()
+        self.tech_ideas = self._load_tech_ideas()
+        self.role_team_advice = self._load_role_team_advice()
+        self.tech_area_advice = self._load_tech_area_advice()
 
         # Dynamic response generators
         self.response_generators = {
@@ -193,6 +197,8 @@ Please provide a thoughtful, actionable response that:
             for i, idea in enumerate(tech_focused_ideas[:3], 1):
                 response += f"{i}. **{idea['title']}**: {idea['description']}\n"
                 response += f"   *Tech stack: {', '.join(idea['tech_stack'])}*\n\n"
+        else:
+            response += self._relevant_section(message, "Ideas that fit what you described", ('project',))
 
         # Add general project framework advice
         response += "\n**Project Selection Framework:**\n"
@@ -228,6 +234,8 @@ Please provide a thoughtful, actionable response that:
             response += f"**For {role}s specifically:**\n"
             response += self._get_role_specific_team_advice(role) + "\n\n"
 
+        response += self._relevant_section(message, "Tips for your situation", ('team', 'role'))
+
         response += "What's your role and experience level? I can give you more targeted team-building advice."
 
         return response
@@ -253,6 +261,8 @@ Please provide a thoughtful, actionable response that:
                 response += f"• {self._get_tech_specific_advice(area)}\n"
             response += "\n"
 
+        response += self._relevant_section(message, "From the playbook", ('technical',))
+
         response += "**General Technical Tips:**\n"
         response += "• Start with the simplest possible version that works\n"
         response += "• Use tools and libraries you're comfortable with\n"
@@ -294,6 +304,8 @@ Please provide a thoughtful, actionable response that:
         response += "• Celebrate small wins - maintain team morale\n"
         response += "• Remember: done is better than perfect\n\n"
 
+        response += self._relevant_section(message, "Relevant to your question", ('strategy', 'pitfall'))
+
         response += "What stage are you at in your hackathon? I can provide more specific guidance based on your current situation."
 
         return response
@@ -332,6 +344,8 @@ Please provide a thoughtful, actionable response that:
         response += "• Show personality - passion is contagious\n"
         response += "• Prepare for questions about team, tech choices, and scaling\n\n"
 
+        response += self._relevant_section(message, "Frameworks worth a look", ('presentation',))
+
         response += "What aspect of your presentation needs the most work? I can help you refine your pitch!"
 
         return response
@@ -360,12 +374,21 @@ Please provide a thoughtful, actionable response that:
         response += "• **Team dynamics** - formation, communication, and collaboration\n"
         response += "• **Competition strategy** - planning, execution, and presentation\n\n"
 
+        response += self._relevant_section(message, "Some things that might help", None)
+
         response += "What's the specific challenge or question that's on your mind right now?"
 
         return response
 
     # Helper methods for enhanced functionality
 
+    def _relevant_section(self, message: str, heading: str, kinds: Optional[tuple], k: int = 3) -> str:
+        """Top knowledge base matches for the message as a bulleted section, or ''"""
+        matches = knowledge_base.search(message, k=k, kinds=kinds)
+        if not matches:
+            return ""
+        return f"**{heading}:**\n{bullet_list(matches)}\n\n"
+
     def _get_time_greeting(self) -> str:
         """Get appropriate greeting based on time of day"""
         hour = datetime.now().hour
@@ -496,9 +519,9 @@ Please provide a thoughtful, actionable response that:
                                     "Performance results"]
         }
 
-    def _get_tech_focused_ideas(self, technologies: List[str]) -> List[Dict]:
-        """Generate project ideas focused on specific technologies"""
-        tech_ideas = {
+    def _load_tech_ideas(self) -> Dict:
+        """Load project ideas keyed by the technology they focus on"""
+        return {
             'ai': [
                 {
                     "title": "Smart Study Companion",
@@ -527,28 +550,32 @@ Please provide a thoughtful, actionable response that:
             ]
         }
 
+    def _get_tech_focused_ideas(self, technologies: List[str]) -> List[Dict]:
+        """Generate project ideas focused on specific technologies"""
         ideas = []
         for tech in technologies:
-            if tech in tech_ideas:
-                ideas.extend(tech_ideas[tech])
+            if tech in self.tech_ideas:
+                ideas.extend(self.tech_ideas[tech])
 
         return ideas[:3]  # Return top 3 relevant ideas
 
-    def _get_role_specific_team_advice(self, role: str) -> str:
-        """Get team formation advice specific to user's role"""
-        role_advice = {
+    def _load_role_team_advice(self) -> Dict:
+        """Load team formation advice by role"""
+        return {
             "developer": "Look for a designer to handle UI/UX and a business person to validate market fit. Your technical skills are valuable - use them to assess project feasibility.",
             "designer": "Partner with developers who appreciate good design and product people who understand user experience. Your visual and UX skills will differentiate your team's solution.",
             "product_manager": "Find developers who can execute your vision and designers who can bring it to life. Your strategic thinking and user focus will guide the team to build something people actually want.",
             "data_scientist": "Team up with developers who can integrate your models and business people who understand the problem domain. Your analytical skills can provide unique insights."
         }
 
-        return role_advice.get(role.lower(),
+    def _get_role_specific_team_advice(self, role: str) -> str:
+        """Get team formation advice specific to user's role"""
+        return self.role_team_advice.get(role.lower(),
                                "Bring your unique skills and look for complementary team members who share your passion for the problem you want to solve.")
 
-    def _get_tech_specific_advice(self, area: str) -> str:
-        """Get specific advice for technical areas"""
-        advice = {
+    def _load_tech_area_advice(self) -> Dict:
+        """Load advice for technical areas"""
+        return {
             "frontend": "Use CSS frameworks like Tailwind or Bootstrap for rapid styling. Focus on user experience over visual perfection.",
             "backend": "Keep your API simple and well-documented. Use established patterns and don't over-engineer.",
             "database": "Design your schema on paper first. Use migrations and keep backups of sample data.",
@@ -556,13 +583,41 @@ Please provide a thoughtful, actionable response that:
             "mobile": "Test on real devices frequently. Use cross-platform frameworks to maximize reach with limited time."
         }
 
-        return advice.get(area, "Start simple, test often, and focus on core functionality first.")
+    def _get_tech_specific_advice(self, area: str) -> str:
+        """Get specific advice for technical areas"""
+        return self.tech_area_advice.get(area, "Start simple, test often, and focus on core functionality first.")
 
 
 # Global enhanced assistant instance
 enhanced_ai = AdvancedAIAssistant()
 
 
+def _index_knowledge(assistant: AdvancedAIAssistant):
+    """Register the assistant's knowledge bases with the local knowledge base"""
+    for key, template in assistant.project_templates.items():
+        knowledge_base.add('project', f"{template['title']}: {template['description']} "
+                                      f"(tech stack: {', '.join(template['tech_stack'])}; "
+                                      f"timeline: {template['timeline']})", key)
+    for tech, ideas in assistant.tech_ideas.items():
+        for idea in ideas:
+            knowledge_base.add('project', f"{idea['title']}: {idea['description']} "
+                                          f"(tech stack: {', '.join(idea['tech_stack'])})", tech)
+    for topic, solution in assistant.technical_solutions.items():
+        knowledge_base.add('technical', solution, topic)
+    for area, advice in assistant.tech_area_advice.items():
+        knowledge_base.add('technical', advice, area)
+    for group, styles in assistant.team_psychology.items():
+        for style, description in styles.items():
+            knowledge_base.add('team', f"{style.title()} {group.replace('_', ' ')[:-1]}: {description}", group)
+    for role, advice in assistant.role_team_advice.items():
+        knowledge_base.add('role', advice, role)
+    for name, steps in assistant.presentation_frameworks.items():
+        knowledge_base.add('presentation', f"{name.replace('_', ' ').title()} pitch: {' → '.join(steps)}", name)
+
+
+_index_knowledge(enhanced_ai)
+
+
 def get_enhanced_ai_response(query: str, context_data: Optional[Dict] = None) -> str:
     """Get enhanced AI response with context awareness"""
     return enhanced_ai.generate_response(query, context_data)
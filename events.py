@@ -0,0 +1,230 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from flask import request, session, abort, current_app
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models import Event, Participant, Team
+from snapshot_store import snapshot_store
+from team_matcher import TeamMatcher, team_balance_scores
+from instrumentation import timed
+from read_replica import primary_reads
+
+DEFAULT_EVENT_SLUG = 'main'
+
+# Team size for the fixed-size clustering when none is given
+DEFAULT_TEAM_SIZE = 4
+
+
+def get_default_event():
+    """
+    Return the default event, creating it on first use. A miss is looked up
+    again and created on the primary: the replica may not have it yet.
+    """
+    event = Event.query.filter_by(slug=DEFAULT_EVENT_SLUG).first()
+    if event is not None:
+        return event
+
+    with primary_reads():
+        event = Event.query.filter_by(slug=DEFAULT_EVENT_SLUG).first()
+        if event is None:
+            event = Event(name='HackHub', slug=DEFAULT_EVENT_SLUG)
+            db.session.add(event)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Another worker created it first
+                db.session.rollback()
+                event = Event.query.filter_by(slug=DEFAULT_EVENT_SLUG).one()
+        # Load the committed row here, not lazily from the replica later
+        db.session.refresh(event)
+    return event
+
+
+def adopt_unscoped_rows():
+    """Move participants and teams created before events existed into the default event"""
+    event = get_default_event()
+    Participant.query.filter(Participant.event_id.is_(None)) \
+        .update({Participant.event_id: event.id}, synchronize_session=False)
+    Team.query.filter(Team.event_id.is_(None)) \
+        .update({Team.event_id: event.id}, synchronize_session=False)
+    db.session.commit()
+
+
+def find_event(key):
+    """Look an event up by numeric id or slug"""
+    if key is None or str(key).strip() == '':
+        return None
+    key = str(key).strip()
+    if key.isdigit():
+        return db.session.get(Event, int(key))
+    return Event.query.filter_by(slug=key).first()
+
+
+def current_event():
+    """
+    Resolve the event a request is scoped to.
+
+    An explicit ``event`` (id or slug) in the query string, form or JSON body
+    wins and is remembered in the session; otherwise the session's event or
+    the default event is used.
+    """
+    key = request.args.get('event') or request.form.get('event')
+    if key is None and request.is_json:
+        key = (request.get_json(silent=True) or {}).get('event')
+
+    if key is not None:
+        event = find_event(key)
+        if event is None:
+            abort(404)
+        session['event_id'] = event.id
+        return event
+
+    if 'event_id' in session:
+        event = db.session.get(Event, session['event_id'])
+        if event is not None:
+            return event
+        session.pop('event_id', None)
+
+    return get_default_event()
+
+
+def event_stats(event_id):
+    """Role, experience and team-size distributions for one event via indexed aggregates"""
+    role_counts = dict(
+        db.session.query(Participant.role, func.count(Participant.id))
+        .filter(Participant.event_id == event_id)
+        .group_by(Participant.role).all())
+
+    experience_counts = dict(
+        db.session.query(Participant.experience_level, func.count(Participant.id))
+        .filter(Participant.event_id == event_id)
+        .group_by(Participant.experience_level).all())
+
+    member_counts = db.session.query(Participant.team_id, func.count(Participant.id).label('size')) \
+        .filter(Participant.event_id == event_id, Participant.team_id.isnot(None)) \
+        .group_by(Participant.team_id).subquery()
+    team_sizes = {}
+    for size, count in db.session.query(func.coalesce(member_counts.c.size, 0), func.count(Team.id)) \
+            .outerjoin(member_counts, member_counts.c.team_id == Team.id) \
+            .filter(Team.event_id == event_id) \
+            .group_by(func.coalesce(member_counts.c.size, 0)).all():
+        team_sizes[str(size)] = count
+
+    total_participants = sum(role_counts.values())
+    unassigned = Participant.query.filter_by(event_id=event_id, team_id=None).count()
+
+    return {
+        'event_id': event_id,
+        'role_distribution': role_counts,
+        'experience_distribution': experience_counts,
+        'team_size_distribution': team_sizes,
+        'total_participants': total_participants,
+        'total_teams': sum(team_sizes.values()),
+        'unassigned_participants': unassigned
+    }
+
+
+def run_matching(event_id, target_team_size=None, optimise=False):
+    """
+    Form teams from one event's unassigned participants and persist them.
+
+    Without a ``target_team_size`` teams follow participants' preferred
+    sizes within TEAM_MIN_SIZE..TEAM_MAX_SIZE; with one, every team is
+    clustered towards that size. ``optimise`` runs the matcher's parallel
+    multi-restart search (configured by the TEAM_OPTIMISE_* settings)
+    instead of a single clustering. Returns the number of teams created.
+    The caller owns the transaction.
+    """
+    with timed('matcher.snapshot'):
+        snapshot = snapshot_store.event_snapshot(event_id).unassigned()
+    if len(snapshot) < 2:
+        return 0
+
+    matcher = TeamMatcher()
+    config = current_app.config
+    if optimise:
+        generated_teams = matcher.optimise_teams(
+            snapshot,
+            target_team_size or DEFAULT_TEAM_SIZE,
+            restarts=config['TEAM_OPTIMISE_RESTARTS'],
+            workers=config['TEAM_OPTIMISE_WORKERS'],
+            time_budget=config['TEAM_OPTIMISE_TIME_BUDGET'],
+            seed=config['TEAM_OPTIMISE_SEED'])
+    elif target_team_size:
+        generated_teams = matcher.create_balanced_teams(snapshot, target_team_size)
+    else:
+        generated_teams = matcher.create_capacitated_teams(
+            snapshot, config['TEAM_MIN_SIZE'], config['TEAM_MAX_SIZE'])
+
+    teams_created = 0
+    assignments = []
+    for team_data in generated_teams:
+        team = Team(
+            event_id=event_id,
+            name=team_data['name'],
+            description=team_data['description'],
+            balance_score=team_data['balance_score'],
+            tech_stack=team_data['suggested_tech_stack']
+        )
+        db.session.add(team)
+        db.session.flush()  # Get team ID
+
+        assignments.extend({'id': participant_id, 'team_id': team.id}
+                           for participant_id in team_data['participant_ids'])
+        teams_created += 1
+
+    # One executemany UPDATE by primary key instead of loading each participant
+    if assignments:
+        db.session.execute(update(Participant), assignments)
+
+    return teams_created
+
+
+def refresh_balance_scores(event_id):
+    """
+    Recompute the stored balance score of every team in an event from its
+    current members, in one batched pass. Returns the number of teams
+    updated. The caller owns the transaction.
+    """
+    team_ids = np.array(db.session.execute(
+        select(Team.id).where(Team.event_id == event_id).order_by(Team.id)).scalars().all(),
+        dtype=np.int64)
+    if not len(team_ids):
+        return 0
+
+    snapshot = snapshot_store.event_snapshot(event_id)
+    labels = np.searchsorted(team_ids, snapshot.team_ids)
+    known = (snapshot.team_ids >= 0) & (labels < len(team_ids))
+    known[known] = team_ids[labels[known]] == snapshot.team_ids[known]
+    labels = np.where(known, labels, -1)
+
+    scores = team_balance_scores(labels, len(team_ids), snapshot.role_codes,
+                                 snapshot.experience, snapshot.skills)
+    db.session.execute(update(Team), [
+        {'id': team_id, 'balance_score': score}
+        for team_id, score in zip(team_ids.tolist(), np.round(scores, 3).tolist())])
+    return len(team_ids)
+
+
+def run_matching_parallel(app, event_ids, max_workers=None, target_team_size=None, optimise=False):
+    """
+    Run matching for several events concurrently, one session per worker.
+
+    Returns a dict of event id -> teams created, or the error message for
+    events whose matching failed (those are rolled back independently).
+    """
+    def match_one(event_id):
+        with app.app_context():
+            try:
+                created = run_matching(event_id, target_team_size, optimise)
+                db.session.commit()
+                return created
+            except Exception as e:
+                db.session.rollback()
+                return f'Error generating teams: {str(e)}'
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(match_one, event_ids)
+        return dict(zip(event_ids, results))
@@ -0,0 +1,257 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+from database import db
+from models import Participant, Team
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    PARQUET_AVAILABLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PARQUET_AVAILABLE = False
+
+
+# Rows fetched per round-trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+PARTICIPANT_FIELDS = [
+    'id', 'event_id', 'name', 'email', 'role', 'experience_level', 'skills', 'interests',
+    'preferred_team_size', 'availability', 'github_url', 'linkedin_url',
+    'team_id', 'created_at'
+]
+
+TEAM_FIELDS = [
+    'id', 'event_id', 'name', 'description', 'project_idea', 'tech_stack',
+    'balance_score', 'created_at'
+]
+
+# Member columns that repeat the team's own values
+TEAM_SCOPED_FIELDS = {'team_id', 'event_id'}
+
+# Flat team export: one row per (team, member), member columns prefixed
+TEAM_MEMBER_FIELDS = TEAM_FIELDS + [
+    f'member_{field}' for field in PARTICIPANT_FIELDS if field not in TEAM_SCOPED_FIELDS
+]
+
+LIST_FIELDS = {'skills', 'interests', 'tech_stack', 'member_skills',
+               'member_interests'}
+
+
+class ExportError(ValueError):
+    """Raised for an unknown export kind or an unavailable format"""
+
+
+def _stream(statement):
+    """Execute a Core select on a server-side cursor, yielding row mappings"""
+    result = db.session.execute(
+        statement.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+    for partition in result.mappings().partitions():
+        yield from partition
+
+
+def _serialisable(row):
+    """Convert datetimes to ISO strings so every format sees plain values"""
+    created_at = row.get('created_at')
+    if created_at is not None and hasattr(created_at, 'isoformat'):
+        row['created_at'] = created_at.isoformat()
+    member_created = row.get('member_created_at')
+    if member_created is not None and hasattr(member_created, 'isoformat'):
+        row['member_created_at'] = member_created.isoformat()
+    return row
+
+
+def iter_participants(event_id=None):
+    """Yield one dict per participant, in id order"""
+    participant = Participant.__table__
+    statement = select(*[participant.c[f] for f in PARTICIPANT_FIELDS]) \
+        .order_by(participant.c.id)
+    if event_id is not None:
+        statement = statement.where(participant.c.event_id == event_id)
+    for row in _stream(statement):
+        yield _serialisable(dict(row))
+
+
+def _team_member_rows(event_id=None):
+    """Single joined scan of teams and their members, ordered by team"""
+    team = Team.__table__
+    participant = Participant.__table__
+    columns = [team.c[f] for f in TEAM_FIELDS] + [
+        participant.c[f].label(f'member_{f}')
+        for f in PARTICIPANT_FIELDS if f not in TEAM_SCOPED_FIELDS
+    ]
+    statement = select(*columns) \
+        .select_from(team.outerjoin(participant, participant.c.team_id == team.c.id)) \
+        .order_by(team.c.id, participant.c.id)
+    if event_id is not None:
+        statement = statement.where(team.c.event_id == event_id)
+    for row in _stream(statement):
+        yield _serialisable(dict(row))
+
+
+def iter_team_members(event_id=None):
+    """Yield one flat dict per (team, member); empty teams yield one row"""
+    yield from _team_member_rows(event_id)
+
+
+def iter_teams(event_id=None):
+    """Yield one dict per team with a nested ``members`` list.
+
+    Rows arrive ordered by team id, so only the team currently being
+    assembled is held in memory.
+    """
+    current = None
+    for row in _team_member_rows(event_id):
+        if current is None or current['id'] != row['id']:
+            if current is not None:
+                yield current
+            current = {field: row[field] for field in TEAM_FIELDS}
+            current['members'] = []
+        if row['member_id'] is not None:
+            current['members'].append({
+                field: row[f'member_{field}']
+                for field in PARTICIPANT_FIELDS if field not in TEAM_SCOPED_FIELDS
+            })
+    if current is not None:
+        yield current
+
+
+def _csv_value(field, value):
+    if field in LIST_FIELDS and value is not None:
+        return json.dumps(value)
+    return value
+
+
+def csv_chunks(rows, fields):
+    """Encode rows as CSV, yielding roughly one chunk per cursor batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_csv_value(f, row.get(f)) for f in fields])
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def jsonl_chunks(rows):
+    """Encode rows as JSON Lines, yielding roughly one chunk per cursor batch"""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row))
+        if len(lines) >= EXPORT_CHUNK_SIZE:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose contents are handed off and discarded"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _parquet_schema(fields):
+    columns = []
+    for field in fields:
+        if field in LIST_FIELDS:
+            columns.append((field, pa.list_(pa.string())))
+        elif field.endswith('id') or field.endswith('team_size'):
+            columns.append((field, pa.int64()))
+        elif field == 'balance_score':
+            columns.append((field, pa.float64()))
+        else:
+            columns.append((field, pa.string()))
+    return pa.schema(columns)
+
+
+def parquet_chunks(rows, fields):
+    """Encode rows as Parquet, flushing one row group per cursor batch"""
+    if not PARQUET_AVAILABLE:
+        raise ExportError("Parquet export requires the pyarrow package")
+
+    schema = _parquet_schema(fields)
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    def flush(batch):
+        columns = {field: [row.get(field) for row in batch] for field in fields}
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        return sink.drain()
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= EXPORT_CHUNK_SIZE:
+            yield flush(batch)
+            batch = []
+    if batch:
+        yield flush(batch)
+    writer.close()
+    yield sink.drain()
+
+
+def export_chunks(kind, fmt, event_id=None):
+    """
+    Return a generator of encoded chunks for an export.
+
+    Args:
+        kind (str): "participants" or "teams"
+        fmt (str): one of EXPORT_FORMATS
+        event_id (int): restrict the export to one event (all events if None)
+
+    Teams are exported nested (one line per team) as JSONL and flattened
+    (one row per member) as CSV and Parquet.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown export format: {fmt}")
+    if fmt == 'parquet' and not PARQUET_AVAILABLE:
+        raise ExportError("Parquet export requires the pyarrow package")
+
+    if kind == 'participants':
+        rows, fields = iter_participants(event_id), PARTICIPANT_FIELDS
+    elif kind == 'teams':
+        if fmt == 'jsonl':
+            return jsonl_chunks(iter_teams(event_id))
+        rows, fields = iter_team_members(event_id), TEAM_MEMBER_FIELDS
+    else:
+        raise ExportError(f"Unknown export kind: {kind}")
+
+    if fmt == 'csv':
+        return csv_chunks(rows, fields)
+    if fmt == 'jsonl':
+        return jsonl_chunks(rows)
+    return parquet_chunks(rows, fields)
@@ -0,0 +1,168 @@
+import threading
+from collections import OrderedDict
+
+from flask import request, session
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from data_version import data_version
+
+
+class FragmentCache:
+    """
+    LRU cache of rendered template fragments, bounded by total size.
+
+    Keys combine the fragment name, the data version, the request's event
+    key and any extra vary values, so a write to participants or teams
+    makes every fragment render fresh exactly once.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (markup, size)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = {}
+        self._misses = {}
+        self._evictions = 0
+
+    def init_app(self, app):
+        self.max_bytes = app.config.get('FRAGMENT_CACHE_MAX_BYTES', self.max_bytes)
+        app.jinja_env.add_extension(FragmentCacheExtension)
+
+    def key(self, name, vary=()):
+        version, _ = data_version.current()
+        event_key = request.args.get('event') or session.get('event_id') or 'default'
+        return (name, version, str(event_key)) + tuple(vary)
+
+    def get_or_render(self, name, vary, render):
+        key = self.key(name, vary)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits[name] = self._hits.get(name, 0) + 1
+                return entry[0]
+            self._misses[name] = self._misses.get(name, 0) + 1
+
+        # Render outside the lock; concurrent misses for one key both render
+        markup = Markup(render())
+        size = len(markup.encode('utf-8'))
+        if size > self.max_bytes:
+            return markup
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (markup, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+        return markup
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss counts per fragment and overall memory use"""
+        with self._lock:
+            hits = sum(self._hits.values())
+            misses = sum(self._misses.values())
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                'evictions': self._evictions,
+                'fragments': {
+                    name: {'hits': self._hits.get(name, 0), 'misses': self._misses.get(name, 0)}
+                    for name in sorted(set(self._hits) | set(self._misses))
+                }
+            }
+
+    def metric_lines(self):
+        """Cache stats as Prometheus exposition lines"""
+        stats = self.stats()
+        lines = [
+            '# HELP hackhub_fragment_cache_bytes Memory held by cached fragments',
+            '# TYPE hackhub_fragment_cache_bytes gauge',
+            f'hackhub_fragment_cache_bytes {stats["bytes"]}',
+            '# HELP hackhub_fragment_cache_evictions_total Fragments evicted to stay under the size limit',
+            '# TYPE hackhub_fragment_cache_evictions_total counter',
+            f'hackhub_fragment_cache_evictions_total {stats["evictions"]}',
+            '# HELP hackhub_fragment_cache_lookups_total Fragment cache lookups by result',
+            '# TYPE hackhub_fragment_cache_lookups_total counter',
+        ]
+        for name, counts in stats['fragments'].items():
+            for result, key in (('hit', 'hits'), ('miss', 'misses')):
+                lines.append(f'hackhub_fragment_cache_lookups_total'
+                             f'{{fragment="{name}",result="{result}"}} {counts[key]}')
+        return lines
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Adds ``{% cache "name" [, vary ...] %}...{% endcache %}`` to templates.
+
+    Cached fragments must not contain per-user content such as flashed
+    messages; they are shared by every visitor of the same event.
+    """
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render_cached', [nodes.List(args)]),
+                               [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, args, caller):
+        return fragment_cache.get_or_render(args[0], args[1:], caller)
+
+
+class LazyValue:
+    """
+    Defers a query until a template actually uses its result, so a view
+    whose fragments are all cached runs no queries.
+    """
+
+    _unset = object()
+
+    def __init__(self, load):
+        self._load = load
+        self._value = self._unset
+
+    @property
+    def value(self):
+        if self._value is self._unset:
+            self._value = self._load()
+        return self._value
+
+    def __iter__(self):
+        return iter(self.value)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def __str__(self):
+        return str(self.value)
+
+    def __getattr__(self, name):
+        return getattr(self.value, name)
+
+
+# Global cache instance
+fragment_cache = FragmentCache()
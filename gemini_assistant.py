@@ -1,6 +1,10 @@
 import os
 import json
 
+from instrumentation import timed
+from semantic_cache import answer_cache
+from knowledge_base import knowledge_base, bullet_list
+
 try:
     from google import genai
     from google.genai import types
@@ -31,7 +35,10 @@ class GeminiAIAssistant:
 
         if self.api_key and len(self.api_key.strip()) > 0:
             try:
-                self.client = genai.Client(api_key=self.api_key.strip())
+                # GEMINI_BASE_URL points the client at a proxy or a local stand-in
+                base_url = os.environ.get("GEMINI_BASE_URL")
+                http_options = types.HttpOptions(base_url=base_url) if base_url else None
+                self.client = genai.Client(api_key=self.api_key.strip(), http_options=http_options)
                 self.model = "gemini-2.0-flash-exp"
                 print(f"✅ Gemini AI initialized successfully with model: {self.model}")
             except Exception as e:
@@ -47,52 +54,94 @@ class GeminiAIAssistant:
         """Check if Gemini API is available"""
         return self.client is not None and self.api_key is not None
 
-    def generate_response(self, user_query, context_type="general"):
+    def generate_response(self, user_query, context_type="general", response_schema=None,
+                          cache_answer=False):
         """
         Generate intelligent response using Gemini AI
 
         Args:
             user_query (str): The user's question or prompt
             context_type (str): Type of context - "general", "hackathon", "technical", etc.
+            response_schema: optional pydantic model (or list of one) to request JSON output for
+            cache_answer (bool): reuse and store answers via the semantic answer cache;
+                only for raw user questions, since templated prompts all look alike
 
         Returns:
             str: AI-generated response
         """
-        if not self.is_available():
+        if cache_answer:
+            cached = answer_cache.get(user_query, context_type)
+            if cached is not None:
+                return cached
+
+        if not self.is_available() or not GENAI_AVAILABLE or not types:
             return self._get_fallback_response(user_query, context_type)
 
         try:
-            # Create context-specific system prompt
-            system_prompt = self._get_system_prompt(context_type)
-
-            # Generate response using Gemini
-            if not GENAI_AVAILABLE or not types:
-                return self._get_fallback_response(user_query, context_type)
-
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=[
-                    types.Content(
-                        role="user",
-                        parts=[types.Part(text=f"{system_prompt}\n\nUser Query: {user_query}")]
-                    )
-                ],
-                config=types.GenerateContentConfig(
-                    temperature=0.7,
-                    max_output_tokens=1000,
-                    stop_sequences=["END_RESPONSE"]
-                )
-            )
+            with timed('gemini'):
+                response = self.client.models.generate_content(
+                    **self._request(user_query, context_type, response_schema))
+            return self._response_text(response, user_query, context_type, cache_answer)
 
-            if response and response.text:
-                return response.text.strip()
-            else:
-                return self._get_fallback_response(user_query, context_type)
+        except Exception as e:
+            print(f"Gemini API Error: {e}")
+            return self._get_fallback_response(user_query, context_type)
+
+    async def generate_response_async(self, user_query, context_type="general", response_schema=None,
+                                      cache_answer=False):
+        """
+        Same as generate_response, but awaits the Gemini call on the event loop
+        instead of blocking a thread, for the ASGI entry point.
+        """
+        if cache_answer:
+            cached = answer_cache.get(user_query, context_type)
+            if cached is not None:
+                return cached
+
+        if not self.is_available() or not GENAI_AVAILABLE or not types:
+            return self._get_fallback_response(user_query, context_type)
+
+        try:
+            with timed('gemini'):
+                response = await self.client.aio.models.generate_content(
+                    **self._request(user_query, context_type, response_schema))
+            return self._response_text(response, user_query, context_type, cache_answer)
 
         except Exception as e:
             print(f"Gemini API Error: {e}")
             return self._get_fallback_response(user_query, context_type)
 
+    def _request(self, user_query, context_type, response_schema=None):
+        """Arguments for generate_content with a context-specific system prompt"""
+        system_prompt = self._get_system_prompt(context_type)
+        config = {
+            'temperature': 0.7,
+            'max_output_tokens': 1000,
+            'stop_sequences': ["END_RESPONSE"]
+        }
+        if response_schema is not None:
+            # Structured output mode: the model returns JSON matching the schema
+            config['response_mime_type'] = 'application/json'
+            config['response_schema'] = response_schema
+        return {
+            'model': self.model,
+            'contents': [
+                types.Content(
+                    role="user",
+                    parts=[types.Part(text=f"{system_prompt}\n\nUser Query: {user_query}")]
+                )
+            ],
+            'config': types.GenerateContentConfig(**config)
+        }
+
+    def _response_text(self, response, user_query, context_type, cache_answer=False):
+        if response and response.text:
+            text = response.text.strip()
+            if cache_answer:
+                answer_cache.put(user_query, context_type, text)
+            return text
+        return self._get_fallback_response(user_query, context_type)
+
     def _get_system_prompt(self, context_type):
         """Get system prompt based on context type"""
 
@@ -128,16 +177,19 @@ You're genuinely curious about people and ideas. Whether someone wants to brains
 You bring relevant knowledge to bear naturally, make connections between different domains, and often help people see their questions or challenges from new angles. You might share an interesting example, draw parallels to other fields, or ask a thoughtful question that opens up new possibilities."""
 
     def _get_fallback_response(self, user_query, context_type):
-        """Provide intelligent fallback responses when Gemini API is unavailable"""
+        """Answer from the local knowledge base when Gemini is unavailable"""
+        kinds = ('technical', 'project') if context_type == "technical" else None
+        matches = knowledge_base.search(user_query, k=4, kinds=kinds)
+        if matches:
+            return f"""I can't reach my full AI model right now, but here's what I know that's most relevant to your question:
 
-        # Instead of keyword matching, provide a thoughtful, human-like response
-        return f"""I'm here and ready to help! You mentioned "{user_query}" and I'm thinking about how I can be most useful to you right now.
+{bullet_list(matches)}
 
-The great thing is, I can adapt to whatever you need - whether you're wrestling with a technical challenge, brainstorming ideas, trying to figure out team dynamics, or just want to explore some interesting concepts together.
+Ask again in a little while for a more tailored answer, or tell me more about what you're working on."""
 
-I notice you're on HackHub, so you might be thinking about hackathons or project development. But honestly, I'm curious about what's actually on your mind. What's the real challenge or question you're working through?
+        return """I can't reach my full AI model right now, but I can still help with the basics.
 
-Sometimes the best conversations start when we just dive into what you're actually thinking about, rather than me guessing from keywords. What's going on?"""
+I know a lot about hackathon team formation, project ideas, technical setup, strategy and pitching. Try asking about one of those - for example "how do I find teammates?" or "tips for my demo" - and I'll share what I have."""
 
 
 # Global instance
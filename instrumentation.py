@@ -0,0 +1,222 @@
+import cProfile
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds (seconds) of the latency histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, values)} {total}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        names = self.labels + ('le',)
+        with self._lock:
+            for values, (counts, total, count) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{_format_labels(names, values + (bound,))} {bucket_count}')
+                lines.append(f'{self.name}_bucket{_format_labels(names, values + ("+Inf",))} {count}')
+                lines.append(f'{self.name}_sum{_format_labels(self.labels, values)} {total:.6f}')
+                lines.append(f'{self.name}_count{_format_labels(self.labels, values)} {count}')
+        return lines
+
+
+class Instrumentation:
+    """
+    Per-request timing: wall time, database queries, and named phases such
+    as Gemini calls or matcher steps.
+
+    Each request gets a Server-Timing header summarising its phases, and
+    totals accumulate in Prometheus metrics for ``/metrics``. Metrics are
+    per process; under gunicorn scrape each worker or sum in Prometheus.
+    """
+
+    def __init__(self):
+        self.requests = Counter('hackhub_requests_total', 'Requests served',
+                                ('endpoint', 'method', 'status'))
+        self.request_duration = Histogram('hackhub_request_duration_seconds',
+                                          'Request wall time', ('endpoint', 'method'))
+        self.db_queries = Counter('hackhub_db_queries_total', 'Database queries executed',
+                                  ('endpoint',))
+        self.db_seconds = Counter('hackhub_db_query_seconds_total',
+                                  'Time spent executing database queries', ('endpoint',))
+        self.phase_duration = Histogram('hackhub_phase_duration_seconds',
+                                        'Time spent in named phases (Gemini calls, matcher steps)',
+                                        ('phase',))
+        self._collectors = []
+        self.profile_rate = 0.0
+        self.profile_dir = None
+
+    def init_app(self, app):
+        self.profile_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+        self.profile_dir = app.config.get('PROFILE_DIR') or \
+            os.path.join(app.instance_path, 'profiles')
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        if not event.contains(Engine, 'before_cursor_execute', _before_query):
+            event.listen(Engine, 'before_cursor_execute', _before_query)
+            event.listen(Engine, 'after_cursor_execute', _after_query)
+            event.listen(Engine, 'handle_error', _failed_query)
+
+    def add_collector(self, collect):
+        """Register ``collect()`` returning extra exposition lines for /metrics"""
+        self._collectors.append(collect)
+
+    def render(self):
+        """All metrics in Prometheus text exposition format"""
+        lines = []
+        for metric in (self.requests, self.request_duration, self.db_queries,
+                       self.db_seconds, self.phase_duration):
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                lines.extend(collect())
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+        return '\n'.join(lines) + '\n'
+
+    @contextmanager
+    def timed(self, phase):
+        """Time a block as ``phase``, in this request's Server-Timing and in /metrics"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.phase_duration.observe(elapsed, phase)
+            if has_request_context() and hasattr(g, '_timings'):
+                phases = g._timings['phases']
+                total, count = phases.get(phase, (0.0, 0))
+                phases[phase] = (total + elapsed, count + 1)
+
+    def _start_request(self):
+        g._timings = {'start': time.perf_counter(), 'phases': {}, 'db_count': 0, 'db_time': 0.0}
+        if self.profile_rate and random.random() < self.profile_rate:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:  # Another profiler is already active in this thread
+                return
+            g._profiler = profiler
+
+    def _finish_request(self, response):
+        timings = g.pop('_timings', None)
+        if timings is None:
+            return response
+        elapsed = time.perf_counter() - timings['start']
+        endpoint = request.endpoint or 'unmatched'
+
+        profiler = g.pop('_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            self._dump_profile(profiler, endpoint)
+
+        self.requests.inc(endpoint, request.method, response.status_code)
+        self.request_duration.observe(elapsed, endpoint, request.method)
+        if timings['db_count']:
+            self.db_queries.inc(endpoint, amount=timings['db_count'])
+            self.db_seconds.inc(endpoint, amount=timings['db_time'])
+
+        entries = [f'db;dur={timings["db_time"] * 1000:.1f};desc="{timings["db_count"]} queries"']
+        for phase, (total, count) in timings['phases'].items():
+            name = phase.replace('.', '-')
+            entries.append(f'{name};dur={total * 1000:.1f}' +
+                           (f';desc="{count} calls"' if count > 1 else ''))
+        entries.append(f'total;dur={elapsed * 1000:.1f}')
+        response.headers.add('Server-Timing', ', '.join(entries))
+        return response
+
+    def _dump_profile(self, profiler, endpoint):
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{endpoint}-{os.getpid()}-{random.randrange(1 << 16):04x}.prof"
+            profiler.dump_stats(os.path.join(self.profile_dir, name))
+        except OSError as e:
+            print(f"Profile dump error: {e}")
+
+
+def _before_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_query(conn, cursor, statement, parameters, context, executemany):
+    _finish_query(conn)
+
+
+def _failed_query(context):
+    # after_cursor_execute doesn't run for a statement that raised
+    if context.connection is not None:
+        _finish_query(context.connection)
+
+
+def _finish_query(conn):
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_request_context():
+        timings = g.get('_timings')
+        if timings is not None:
+            timings['db_count'] += 1
+            timings['db_time'] += elapsed
+
+
+# Global instrumentation instance
+instrumentation = Instrumentation()
+timed = instrumentation.timed
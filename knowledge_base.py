@@ -0,0 +1,107 @@
+import threading
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from text_terms import tokenize
+
+Snippet = namedtuple('Snippet', 'kind topic text score')
+
+
+class KnowledgeBase:
+    """
+    In-memory BM25 index over the assistants' canned knowledge: tips,
+    project ideas, technical solutions and presentation frameworks.
+
+    Modules register snippets with add() when imported; build() turns them
+    into an inverted index once (app startup, or lazily on first search).
+    A search touches only the postings of the query's terms, so top-k takes
+    tens of microseconds and suits the offline fallback at full request rate.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}  # (kind, text) -> topic, in insertion order
+        self._index = None  # (snippets, postings, kind masks), swapped in whole by build()
+
+    def add(self, kind, text, topic=''):
+        with self._lock:
+            self._entries.setdefault((kind, text), topic)
+            self._index = None
+
+    def add_many(self, kind, texts, topic=''):
+        for text in texts:
+            self.add(kind, text, topic)
+
+    def build(self):
+        """Build the inverted index over everything added so far"""
+        with self._lock:
+            entries = list(self._entries.items())
+        snippets = [(kind, topic, text) for (kind, text), topic in entries]
+
+        documents = [Counter(tokenize(f'{topic.replace("_", " ")} {text}')) for kind, topic, text in snippets]
+        lengths = np.array([sum(doc.values()) for doc in documents], dtype=float)
+        average = lengths.mean() if len(lengths) else 1.0
+
+        by_term = {}
+        for doc_id, doc in enumerate(documents):
+            for term, count in doc.items():
+                by_term.setdefault(term, []).append((doc_id, count))
+
+        count = len(snippets)
+        postings = {}
+        for term, hits in by_term.items():
+            ids = np.array([doc_id for doc_id, _ in hits])
+            tf = np.array([tf for _, tf in hits], dtype=float)
+            idf = np.log(1 + (count - len(hits) + 0.5) / (len(hits) + 0.5))
+            norm = self.K1 * (1 - self.B + self.B * lengths[ids] / average)
+            postings[term] = (ids, idf * tf * (self.K1 + 1) / (tf + norm))
+
+        kinds = {}
+        for doc_id, (kind, _, _) in enumerate(snippets):
+            kinds.setdefault(kind, np.zeros(count, dtype=bool))[doc_id] = True
+
+        index = (snippets, postings, kinds)
+        with self._lock:
+            if len(self._entries) == count:
+                self._index = index
+        return index
+
+    def search(self, query, k=3, kinds=None):
+        """The ``k`` best-matching snippets (optionally only of ``kinds``), best first"""
+        index = self._index or self.build()
+        snippets, postings, kind_masks = index
+        if not snippets or not query:
+            return []
+
+        scores = np.zeros(len(snippets))
+        for term in set(tokenize(query)):
+            posting = postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+        if kinds is not None:
+            mask = np.zeros(len(snippets), dtype=bool)
+            for kind in kinds:
+                if kind in kind_masks:
+                    mask |= kind_masks[kind]
+            scores[~mask] = 0
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind='stable')]
+        return [Snippet(*snippets[i], float(scores[i])) for i in matched]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def bullet_list(snippets):
+    return "\n".join(f"• {snippet.text}" for snippet in snippets)
+
+
+# Global knowledge base
+knowledge_base = KnowledgeBase()
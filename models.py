@@ -3,10 +3,44 @@ from sqlalchemy import JSON
 from database import db
 
 
+class Event(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    slug = db.Column(db.String(60), unique=True, nullable=False)
+    description = db.Column(db.Text)
+    starts_at = db.Column(db.DateTime)
+    ends_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    participants = db.relationship('Participant', backref='event', lazy=True)
+    teams = db.relationship('Team', backref='event', lazy=True)
+
+    def __init__(self, **kwargs):
+        """Initialize Event with keyword arguments"""
+        super().__init__(**kwargs)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'slug': self.slug,
+            'description': self.description,
+            'starts_at': self.starts_at.isoformat() if self.starts_at else None,
+            'ends_at': self.ends_at.isoformat() if self.ends_at else None
+        }
+
+
 class Participant(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'email', name='uq_participant_event_email'),
+        db.Index('ix_participant_event_team', 'event_id', 'team_id'),
+        db.Index('ix_participant_event_role', 'event_id', 'role'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=True)
     name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(120), unique=True, nullable=False)
+    email = db.Column(db.String(120), nullable=False)
     role = db.Column(db.String(50), nullable=False)  # Developer, Designer, PM, etc.
     experience_level = db.Column(db.String(20), nullable=False)  # Beginner, Intermediate, Advanced
     skills = db.Column(JSON, nullable=False)  # List of skills
@@ -35,12 +69,18 @@ class Participant(db.Model):
             'availability': self.availability,
             'github_url': self.github_url,
             'linkedin_url': self.linkedin_url,
+            'event_id': self.event_id,
             'team_id': self.team_id
         }
 
 
 class Team(db.Model):
+    __table_args__ = (
+        db.Index('ix_team_event', 'event_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     project_idea = db.Column(db.Text)
@@ -66,6 +106,7 @@ class Team(db.Model):
             participants_list = []
         return {
             'id': self.id,
+            'event_id': self.event_id,
             'name': self.name,
             'description': self.description,
             'project_idea': self.project_idea,
@@ -76,4 +117,11 @@ class Team(db.Model):
         }
 
 
+class DataVersionCounter(db.Model):
+    """The data version shared by every node when DATA_VERSION_STORE is 'database'"""
+    __tablename__ = 'data_version'
 
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+    commits = db.Column(db.BigInteger, nullable=False, default=0)
+    modified = db.Column(db.Float, nullable=False, default=0.0)  # Unix time of the last bump
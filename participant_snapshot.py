@@ -0,0 +1,222 @@
+import json
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# Numeric experience levels used throughout matching
+EXPERIENCE_SCORES = {
+    'Beginner': 1,
+    'Intermediate': 2,
+    'Advanced': 3
+}
+
+# Columns read for a snapshot, in row order
+SNAPSHOT_COLUMNS = ('id', 'role', 'experience_level', 'skills', 'interests',
+                    'preferred_team_size', 'team_id')
+
+# Arrays written by ParticipantSnapshot.save, one .npy file each
+_ARRAYS = ('ids', 'role_codes', 'experience', 'preferred_team_size', 'team_ids')
+_MATRICES = ('skills', 'interests')
+SNAPSHOT_FORMAT = 1
+
+
+def _csr_from_lists(lists, vocabulary):
+    """Encode lists of strings as a count CSR matrix, growing ``vocabulary``"""
+    codes = {}
+    for i, name in enumerate(vocabulary):
+        codes[name] = i
+    indptr = np.zeros(len(lists) + 1, dtype=np.int64)
+    indices = []
+    for row, values in enumerate(lists):
+        for value in values or ():
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(vocabulary)
+                vocabulary.append(value)
+            indices.append(code)
+        indptr[row + 1] = len(indices)
+    matrix = csr_matrix((np.ones(len(indices), dtype=np.int32),
+                         np.array(indices, dtype=np.int32), indptr),
+                        shape=(len(lists), len(vocabulary)))
+    matrix.sum_duplicates()
+    return matrix
+
+
+def _compact(matrix, names):
+    """Drop vocabulary entries no row uses; returns (matrix, names)"""
+    used = np.unique(matrix.indices)
+    remap = np.full(len(names), -1, dtype=matrix.indices.dtype)
+    remap[used] = np.arange(len(used), dtype=matrix.indices.dtype)
+    compacted = csr_matrix((matrix.data, remap[matrix.indices], matrix.indptr),
+                           shape=(matrix.shape[0], len(used)))
+    return compacted, [names[i] for i in used]
+
+
+class ParticipantSnapshot:
+    """
+    Columnar, read-only view of a set of participants for matching.
+
+    Roles and experience are integer-coded NumPy arrays; skills and
+    interests are CSR count matrices over per-snapshot vocabularies. Row i
+    of every column describes the participant with id ``ids[i]``.
+    """
+
+    def __init__(self, ids, role_codes, role_names, experience, skills, skill_names,
+                 interests, interest_names, preferred_team_size, team_ids):
+        self.ids = ids
+        self.role_codes = role_codes
+        self.role_names = role_names
+        self.experience = experience
+        self.skills = skills
+        self.skill_names = skill_names
+        self.interests = interests
+        self.interest_names = interest_names
+        self.preferred_team_size = preferred_team_size
+        self.team_ids = team_ids  # -1 for participants without a team
+        self._index = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a snapshot from (id, role, experience_level, skills, interests, preferred_team_size, team_id) rows"""
+        rows = list(rows)
+        role_names = []
+        role_lookup = {}
+        role_codes = np.empty(len(rows), dtype=np.int32)
+        experience = np.empty(len(rows), dtype=np.int8)
+        ids = np.empty(len(rows), dtype=np.int64)
+        preferred = np.empty(len(rows), dtype=np.int16)
+        team_ids = np.empty(len(rows), dtype=np.int64)
+
+        for i, (pid, role, level, _, _, team_size, team_id) in enumerate(rows):
+            ids[i] = pid
+            code = role_lookup.get(role)
+            if code is None:
+                code = role_lookup[role] = len(role_names)
+                role_names.append(role)
+            role_codes[i] = code
+            experience[i] = EXPERIENCE_SCORES.get(level, 1)
+            preferred[i] = team_size or 4
+            team_ids[i] = team_id if team_id is not None else -1
+
+        skill_names = []
+        interest_names = []
+        skills = _csr_from_lists([row[3] for row in rows], skill_names)
+        interests = _csr_from_lists([row[4] for row in rows], interest_names)
+
+        return cls(ids, role_codes, role_names, experience, skills, skill_names,
+                   interests, interest_names, preferred, team_ids)
+
+    @classmethod
+    def from_participants(cls, participants):
+        """Build a snapshot from Participant objects (or anything with the same attributes)"""
+        return cls.from_rows(
+            tuple(getattr(p, column, None) for column in SNAPSHOT_COLUMNS)
+            for p in participants)
+
+    @classmethod
+    def load(cls, event_id=None, unassigned_only=False):
+        """Build a snapshot from one column-only query, without loading ORM objects"""
+        from sqlalchemy import select
+        from database import db
+        from models import Participant
+
+        columns = [getattr(Participant, column) for column in SNAPSHOT_COLUMNS]
+        statement = select(*columns).order_by(Participant.id)
+        if event_id is not None:
+            statement = statement.where(Participant.event_id == event_id)
+        if unassigned_only:
+            statement = statement.where(Participant.team_id.is_(None))
+        return cls.from_rows(db.session.execute(statement).all())
+
+    def select(self, rows):
+        """A snapshot of some rows, with vocabularies trimmed to what those rows use"""
+        rows = np.asarray(rows, dtype=np.int64)
+        used_roles, role_codes = np.unique(self.role_codes[rows], return_inverse=True)
+        skills, skill_names = _compact(self.skills[rows], self.skill_names)
+        interests, interest_names = _compact(self.interests[rows], self.interest_names)
+        return ParticipantSnapshot(self.ids[rows], role_codes.astype(np.int32),
+                                   [self.role_names[code] for code in used_roles],
+                                   self.experience[rows], skills, skill_names,
+                                   interests, interest_names,
+                                   self.preferred_team_size[rows], self.team_ids[rows])
+
+    def unassigned(self):
+        """The participants without a team"""
+        return self.select(np.flatnonzero(self.team_ids < 0))
+
+    def save(self, directory):
+        """Write the columns as .npy files plus a JSON vocabulary file, for open()"""
+        os.makedirs(directory, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f'{name}.npy'), getattr(self, name))
+        for name in _MATRICES:
+            matrix = getattr(self, name)
+            for part in ('data', 'indices', 'indptr'):
+                np.save(os.path.join(directory, f'{name}_{part}.npy'), getattr(matrix, part))
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({'format': SNAPSHOT_FORMAT,
+                       'role_names': self.role_names,
+                       'skill_names': self.skill_names,
+                       'interest_names': self.interest_names}, f)
+
+    @classmethod
+    def open(cls, directory):
+        """
+        Map a snapshot written by save() read-only. The arrays are backed by
+        the page cache, so processes opening the same files share memory.
+        """
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('format') != SNAPSHOT_FORMAT:
+            raise FileNotFoundError(f'{directory} holds an old snapshot format')
+
+        def mapped(name):
+            return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+
+        columns = {name: mapped(name) for name in _ARRAYS}
+        for name, names_key in zip(_MATRICES, ('skill_names', 'interest_names')):
+            matrix = csr_matrix((mapped(f'{name}_data'), mapped(f'{name}_indices'),
+                                 mapped(f'{name}_indptr')),
+                                shape=(len(columns['ids']), len(meta[names_key])), copy=False)
+            matrix.has_canonical_format = True  # saved after sum_duplicates
+            columns[name] = matrix
+
+        return cls(columns['ids'], columns['role_codes'], meta['role_names'], columns['experience'],
+                   columns['skills'], meta['skill_names'], columns['interests'],
+                   meta['interest_names'], columns['preferred_team_size'], columns['team_ids'])
+
+    def index_of(self, participant_id):
+        """Row of a participant id, or None"""
+        if self._index is None:
+            self._index = {int(pid): i for i, pid in enumerate(self.ids)}
+        return self._index.get(int(participant_id))
+
+    def rows_for(self, participant_ids):
+        """Rows of a list of participant ids, in the same order"""
+        return np.array([self.index_of(pid) for pid in participant_ids], dtype=np.int64)
+
+    def skill_codes(self, row):
+        """Skill vocabulary ids held by one participant"""
+        return self.skills.indices[self.skills.indptr[row]:self.skills.indptr[row + 1]]
+
+    def profile(self, row):
+        """(role code, experience, {skill id: count}, skill total) tally profile for one row"""
+        start, end = self.skills.indptr[row], self.skills.indptr[row + 1]
+        counts = self.skills.data[start:end]
+        return (int(self.role_codes[row]),
+                int(self.experience[row]),
+                dict(zip(self.skills.indices[start:end].tolist(), counts.tolist())),
+                int(counts.sum()))
+
+    def team_rows(self):
+        """Map of team id -> array of member rows, for participants already in teams"""
+        assigned = np.flatnonzero(self.team_ids >= 0)
+        if len(assigned) == 0:
+            return {}
+        order = assigned[np.argsort(self.team_ids[assigned], kind='stable')]
+        teams, starts = np.unique(self.team_ids[order], return_index=True)
+        return {int(team): rows for team, rows in zip(teams, np.split(order, starts[1:]))}
@@ -0,0 +1,295 @@
+import asyncio
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from functools import wraps
+
+from flask import request, session, jsonify
+
+
+class MemoryBucketStore:
+    """Token buckets in this process's memory; each worker limits on its own"""
+
+    # Buckets untouched this long are full again and can be forgotten
+    PRUNE_AFTER = 3600
+
+    def __init__(self):
+        self._buckets = {}  # key -> (tokens, updated)
+        self._lock = threading.Lock()
+        self._next_prune = time.monotonic() + self.PRUNE_AFTER
+
+    def take(self, key, capacity, refill_per_second, cost=1.0):
+        """Spend ``cost`` tokens if available. Returns seconds to wait, 0 if allowed"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (cost - tokens) / refill_per_second
+
+            if now >= self._next_prune:
+                self._next_prune = now + self.PRUNE_AFTER
+                stale = now - self.PRUNE_AFTER
+                self._buckets = {k: v for k, v in self._buckets.items() if v[1] >= stale}
+        return wait
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a SQLite file, shared by every worker process on the
+    node. Each take is one short IMMEDIATE transaction.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS buckets '
+                               '(key TEXT PRIMARY KEY, tokens REAL, updated REAL)')
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            self._local.connection = connection
+        return connection
+
+    def take(self, key, capacity, refill_per_second, cost=1.0):
+        """Spend ``cost`` tokens if available. Returns seconds to wait, 0 if allowed"""
+        now = time.time()
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT tokens, updated FROM buckets WHERE key = ?',
+                                     (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - updated) * refill_per_second)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / refill_per_second
+            connection.execute('INSERT OR REPLACE INTO buckets (key, tokens, updated) '
+                               'VALUES (?, ?, ?)', (key, tokens, now))
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return wait
+
+
+class AdmissionGate:
+    """
+    Caps concurrent AI requests in a process. Requests beyond the cap wait
+    up to ``max_wait`` seconds for a slot, and at most ``max_queue`` may
+    wait at once; the rest are turned away immediately.
+    """
+
+    def __init__(self, max_concurrent=16, max_queue=64, max_wait=2.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.active = 0
+
+    def acquire(self):
+        """True once a slot is held; False if the queue is full or the wait timed out"""
+        if self._slots.acquire(blocking=False):
+            with self._lock:
+                self.active += 1
+            return True
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                return False
+            self.waiting += 1
+        try:
+            admitted = self._slots.acquire(timeout=self.max_wait)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        if admitted:
+            with self._lock:
+                self.active += 1
+        return admitted
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+        self._slots.release()
+
+
+class AsyncAdmissionGate:
+    """AdmissionGate for the ASGI entry point's event loop"""
+
+    def __init__(self, max_concurrent=256, max_queue=1024, max_wait=2.0):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._slots = None  # Created on first use, inside the running loop
+        self.waiting = 0
+        self.active = 0
+
+    async def acquire(self):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        if not self._slots.locked():
+            await self._slots.acquire()
+            self.active += 1
+            return True
+        if self.waiting >= self.max_queue:
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.max_wait)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        return True
+
+    def release(self):
+        self.active -= 1
+        self._slots.release()
+
+
+class RateLimiter:
+    """
+    Token-bucket limits per browser session and per client IP for the AI
+    endpoints, plus an admission gate bounding how many run at once.
+
+    Limits are (burst, requests per minute) pairs from the RATE_LIMIT_*
+    settings. With RATE_LIMIT_STORE = 'sqlite' the buckets live in
+    instance/rate_limits.sqlite and are shared by all workers.
+    """
+
+    def __init__(self):
+        self.store = MemoryBucketStore()
+        self.session_limit = (10, 20)
+        self.ip_limit = (30, 60)
+        self.gate = AdmissionGate()
+        self.async_gate = AsyncAdmissionGate()
+        self.enabled = True
+        self.trusted_proxies = 1
+        self._lock = threading.Lock()
+        self.rejected = {}  # reason -> count
+        self.admitted = 0
+
+    def init_app(self, app):
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.session_limit = app.config.get('RATE_LIMIT_SESSION', self.session_limit)
+        self.ip_limit = app.config.get('RATE_LIMIT_IP', self.ip_limit)
+        self.trusted_proxies = app.config.get('TRUSTED_PROXIES', self.trusted_proxies)
+        if app.config.get('RATE_LIMIT_STORE') == 'sqlite':
+            os.makedirs(app.instance_path, exist_ok=True)
+            self.store = SQLiteBucketStore(os.path.join(app.instance_path, 'rate_limits.sqlite'))
+        max_wait = app.config.get('AI_ADMISSION_MAX_WAIT', 2.0)
+        self.gate = AdmissionGate(app.config.get('AI_MAX_CONCURRENT', 16),
+                                  app.config.get('AI_MAX_QUEUE', 64), max_wait)
+        self.async_gate = AsyncAdmissionGate(app.config.get('AI_MAX_CONCURRENT_ASYNC', 256),
+                                             app.config.get('AI_MAX_QUEUE_ASYNC', 1024), max_wait)
+
+    def check(self, session_key, ip):
+        """
+        Seconds the client must wait before its next AI request, 0 if
+        allowed now. A request rejected by its session bucket doesn't spend
+        a token from its IP bucket.
+        """
+        for scope, key, (burst, per_minute) in (('session', session_key, self.session_limit),
+                                                ('ip', ip, self.ip_limit)):
+            if key is None:
+                continue
+            wait = self.store.take(f'{scope}:{key}', burst, per_minute / 60.0)
+            if wait:
+                self.record_rejection(scope)
+                return wait
+        return 0.0
+
+    def client_ip(self, remote_addr, forwarded_for):
+        """
+        The client address as ProxyFix derives it for the WSGI app: with
+        ``trusted_proxies`` proxies in front, the address that many entries
+        from the end of X-Forwarded-For.
+        """
+        if self.trusted_proxies and forwarded_for:
+            hops = [hop.strip() for hop in forwarded_for.split(',')]
+            if len(hops) >= self.trusted_proxies:
+                return hops[-self.trusted_proxies]
+        return remote_addr
+
+    def record_rejection(self, reason):
+        with self._lock:
+            self.rejected[reason] = self.rejected.get(reason, 0) + 1
+
+    def record_admission(self):
+        with self._lock:
+            self.admitted += 1
+
+    def limit(self, view):
+        """Decorator for Flask views: 429 when over a limit or when the gate is full"""
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if not self.enabled:
+                return view(*args, **kwargs)
+
+            if 'rate_key' not in session:
+                session['rate_key'] = uuid.uuid4().hex
+            wait = self.check(session['rate_key'], request.remote_addr)
+            if wait:
+                return too_many_requests('Too many AI requests, please slow down.', wait)
+
+            if not self.gate.acquire():
+                self.record_rejection('overloaded')
+                return too_many_requests('The AI assistant is busy, please try again shortly.', 1)
+            self.record_admission()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                self.gate.release()
+
+        return wrapped
+
+    def metric_lines(self):
+        """Admission and rejection counts as Prometheus exposition lines"""
+        with self._lock:
+            rejected = dict(self.rejected)
+            admitted = self.admitted
+        lines = [
+            '# HELP hackhub_ai_admitted_total AI requests admitted',
+            '# TYPE hackhub_ai_admitted_total counter',
+            f'hackhub_ai_admitted_total {admitted}',
+            '# HELP hackhub_ai_rejected_total AI requests answered with 429, by reason',
+            '# TYPE hackhub_ai_rejected_total counter',
+        ]
+        lines.extend(f'hackhub_ai_rejected_total{{reason="{reason}"}} {count}'
+                     for reason, count in sorted(rejected.items()))
+        lines.extend([
+            '# HELP hackhub_ai_in_flight AI requests running or waiting for a slot',
+            '# TYPE hackhub_ai_in_flight gauge',
+            f'hackhub_ai_in_flight{{state="active"}} {self.gate.active + self.async_gate.active}',
+            f'hackhub_ai_in_flight{{state="waiting"}} {self.gate.waiting + self.async_gate.waiting}',
+        ])
+        return lines
+
+
+def too_many_requests(message, retry_after):
+    response = jsonify({'success': False, 'message': message, 'error': message})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+# Global limiter instance
+rate_limiter = RateLimiter()
+rate_limited = rate_limiter.limit
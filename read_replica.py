@@ -0,0 +1,114 @@
+import sqlite3
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import g, request, session
+
+from database import db, REPLICA_BIND
+from data_version import data_version
+from instrumentation import Counter
+
+WRITE_METHODS = frozenset(('POST', 'PUT', 'PATCH', 'DELETE'))
+
+
+class ReplicaRouter:
+    """
+    Routes read-only views to the read replica (the 'replica' entry of
+    SQLALCHEMY_BINDS, set from DATABASE_REPLICA_URL) when it is safe to.
+
+    A view reads from the primary instead when:
+
+    * the browser session made a write request in the last
+      ``sticky_seconds`` (read-your-writes), or
+    * any data changed in the last ``max_lag`` seconds, so the replica may
+      not have it yet. Fragment caches and ETags are keyed by the data
+      version, so a stale replica read must not be stored under a new one.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.sticky_seconds = 5.0
+        self.max_lag = 2.0
+        self.reads = Counter('hackhub_db_read_routing_total',
+                             'Read-only requests by database used and why', ('target', 'reason'))
+
+    def init_app(self, app):
+        self.enabled = REPLICA_BIND in app.config.get('SQLALCHEMY_BINDS', {})
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', self.sticky_seconds)
+        self.max_lag = app.config.get('REPLICA_MAX_LAG', self.max_lag)
+        app.after_request(self._remember_write)
+
+    def _remember_write(self, response):
+        if self.enabled and request.method in WRITE_METHODS and response.status_code < 400:
+            session['read_primary_until'] = time.time() + self.sticky_seconds
+        return response
+
+    def _target(self):
+        """('replica' or 'primary', reason) for the current request"""
+        now = time.time()
+        sticky_until = session.get('read_primary_until')
+        if sticky_until is not None:
+            if sticky_until > now:
+                return 'primary', 'own_write'
+            session.pop('read_primary_until')
+        if now - data_version.current()[1] < self.max_lag:
+            return 'primary', 'recent_write'
+        return 'replica', 'read_only'
+
+    def replica_reads(self, view):
+        """Decorator for views that only read: their queries may go to the replica"""
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if self.enabled:
+                target, reason = self._target()
+                g.read_replica = target == 'replica'
+                self.reads.inc(target, reason)
+            return view(*args, **kwargs)
+
+        return wrapped
+
+    def metric_lines(self):
+        return self.reads.render()
+
+
+@contextmanager
+def primary_reads():
+    """
+    Send the block's queries to the primary even inside a replica_reads
+    view, for lookups whose miss leads to a write (the replica may not
+    have the row yet, and it must be read back from where it was written)
+    """
+    previous = g.get('read_replica')
+    g.read_replica = False
+    try:
+        yield
+    finally:
+        g.read_replica = previous
+
+
+def sync_sqlite_replica():
+    """
+    Copy the primary SQLite database over the replica, for trying replica
+    routing locally with two SQLite files. Returns the replica path.
+    """
+    primary = db.engines[None].url
+    replica = db.engines[REPLICA_BIND].url
+    if primary.get_backend_name() != 'sqlite' or replica.get_backend_name() != 'sqlite':
+        raise ValueError('sync only works between two SQLite databases; '
+                         'use your database\'s own replication otherwise')
+
+    db.engines[REPLICA_BIND].dispose()
+    source = sqlite3.connect(primary.database)
+    target = sqlite3.connect(replica.database)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+    return replica.database
+
+
+# Global router instance
+replica_router = ReplicaRouter()
+replica_reads = replica_router.replica_reads
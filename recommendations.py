@@ -0,0 +1,243 @@
+import threading
+import zlib
+
+import numpy as np
+from scipy.sparse import csr_matrix, hstack, vstack
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from data_version import data_version
+from instrumentation import Counter, Histogram
+from participant_snapshot import ParticipantSnapshot, SNAPSHOT_COLUMNS
+from snapshot_store import snapshot_store
+
+SIMILAR = 'similar'
+COMPLEMENTARY = 'complementary'
+MODES = (SIMILAR, COMPLEMENTARY)
+
+# Hashed skill and interest term columns, and one-hot role slots
+TERM_DIMS = 1024
+ROLE_SLOTS = 64
+
+CANDIDATE_BUCKETS = (10, 50, 100, 500, 1000, 2000, 5000, 20000)
+
+_analyzer = TfidfVectorizer(stop_words='english').build_analyzer()
+
+
+def _term_matrix(names, columns):
+    """Rows of hashed word columns for skill or interest names; ``columns`` caches words"""
+    indptr, indices = [0], []
+    for name in names:
+        for token in _analyzer(name):
+            column = columns.get(token)
+            if column is None:
+                column = columns[token] = zlib.crc32(token.encode()) % TERM_DIMS
+            indices.append(column)
+        indptr.append(len(indices))
+    return csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr),
+                      shape=(len(names), TERM_DIMS))
+
+
+class _HashTables:
+    """Random-hyperplane LSH: ``tables`` hash tables of ``bits``-bit sign codes"""
+
+    def __init__(self, dims, tables, bits, seed):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((dims, tables * bits)).astype(np.float32)
+        self.tables = tables
+        self.bits = bits
+        self.weights = 1 << np.arange(bits, dtype=np.int64)
+        self.buckets = [{} for _ in range(tables)]
+
+    def codes(self, vectors):
+        signs = np.asarray(vectors @ self.planes) > 0
+        return signs.reshape(-1, self.tables, self.bits) @ self.weights
+
+    def add(self, vectors, first_row):
+        for offset, row_codes in enumerate(self.codes(vectors)):
+            for table, code in zip(self.buckets, row_codes.tolist()):
+                table.setdefault(code, []).append(first_row + offset)
+
+    def candidates(self, vector, limit):
+        """Rows sharing a bucket with ``vector``; the ``limit`` sharing most if there are more"""
+        hits = [np.asarray(table.get(code, ()), dtype=np.int64)
+                for table, code in zip(self.buckets, self.codes(vector)[0].tolist())]
+        rows, collisions = np.unique(np.concatenate(hits), return_counts=True)
+        if len(rows) > limit:
+            rows = rows[np.argpartition(-collisions, limit - 1)[:limit]]
+        return rows
+
+
+class _EventIndex:
+    """Participant vectors and hash tables for one event, grown as people register"""
+
+    def __init__(self, tables, bits):
+        self.lock = threading.Lock()
+        self.key = None  # data version commit count last synced at
+        self.last_id = 0
+        self.ids = np.empty(0, dtype=np.int64)
+        self.rows = {}  # participant id -> row
+        self.roles = np.empty(0, dtype=np.int32)
+        self.role_slots = {}
+        self.term_columns = {}
+        self.blocks = []  # (profile, skill, interest) matrices added since the last stack
+        self.profiles = self.skills = self.interests = None
+        dims = 2 * TERM_DIMS + ROLE_SLOTS + 1
+        self.similar = _HashTables(dims, tables, bits, seed=1)
+        self.complementary = _HashTables(TERM_DIMS, tables, bits, seed=2)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, snapshot):
+        """Index a snapshot's participants that are not indexed yet"""
+        rows = np.flatnonzero(snapshot.ids > self.last_id)
+        if not len(rows):
+            return
+        snapshot = snapshot.select(rows)
+
+        skills = normalize(snapshot.skills @ _term_matrix(snapshot.skill_names, self.term_columns))
+        interests = normalize(snapshot.interests @
+                              _term_matrix(snapshot.interest_names, self.term_columns))
+        slots = np.array([self.role_slots.setdefault(name, len(self.role_slots)) % ROLE_SLOTS
+                          for name in snapshot.role_names], dtype=np.int32)
+        roles = slots[snapshot.role_codes]
+        role_vectors = csr_matrix((np.ones(len(roles), dtype=np.float32), roles,
+                                   np.arange(len(roles) + 1)), shape=(len(roles), ROLE_SLOTS))
+        experience = csr_matrix(((snapshot.experience.astype(np.float32) - 1) / 2).reshape(-1, 1))
+        profiles = normalize(hstack([skills, interests, role_vectors, experience], format='csr'))
+
+        first_row = len(self.ids)
+        self.similar.add(profiles, first_row)
+        self.complementary.add(interests, first_row)
+        self.blocks.append((profiles, skills, interests))
+        self.ids = np.concatenate([self.ids, snapshot.ids])
+        self.roles = np.concatenate([self.roles, roles])
+        self.rows.update((int(pid), first_row + i) for i, pid in enumerate(snapshot.ids))
+        self.last_id = int(snapshot.ids[-1])
+
+    def matrices(self):
+        if self.blocks:
+            stacked = [m for m in (self.profiles, self.skills, self.interests) if m is not None]
+            parts = list(zip(*self.blocks))
+            if stacked:
+                parts = [(current,) + new for current, new in zip(stacked, parts)]
+            self.profiles, self.skills, self.interests = (vstack(p, format='csr') for p in parts)
+            self.blocks = []
+        return self.profiles, self.skills, self.interests
+
+
+class ParticipantRecommender:
+    """
+    Teammate recommendations from an approximate nearest-neighbour index.
+
+    Each participant is a sparse vector of hashed skill and interest words,
+    a role one-hot and an experience level: the same features TeamMatcher
+    clusters on, hashed instead of fitted so that adding someone never
+    changes anyone else's vector. Random-hyperplane LSH tables put similar
+    vectors in the same buckets, and a lookup re-ranks only the rows that
+    share buckets with the participant, which keeps it to milliseconds at
+    tens of thousands of participants. Events smaller than ``exact_below``
+    are ranked exhaustively.
+
+    "similar" ranks by cosine over the whole profile. "complementary" looks
+    up shared interests, keeps people in other roles and prefers those
+    whose skills overlap least.
+
+    Indexes are per event and per process. The first lookup builds one from
+    the event's snapshot; after that, once the data version moves, only
+    participants with ids above the last indexed one are read and hashed in.
+    """
+
+    def __init__(self):
+        self.tables = 8
+        self.bits = 12
+        self.exact_below = 2000
+        self.max_candidates = 2000
+        self._lock = threading.Lock()
+        self._indexes = {}
+        self.lookups = Counter('hackhub_recommendations_total',
+                               'Teammate recommendation lookups by mode and search', ('mode', 'search'))
+        self.candidates = Histogram('hackhub_recommendation_candidates',
+                                    'Participants re-ranked per recommendation lookup',
+                                    buckets=CANDIDATE_BUCKETS)
+
+    def init_app(self, app):
+        self.tables = app.config.get('RECOMMEND_LSH_TABLES', self.tables)
+        self.bits = app.config.get('RECOMMEND_LSH_BITS', self.bits)
+        self.exact_below = app.config.get('RECOMMEND_EXACT_BELOW', self.exact_below)
+        self.max_candidates = app.config.get('RECOMMEND_MAX_CANDIDATES', self.max_candidates)
+
+    def _event_index(self, event_id):
+        with self._lock:
+            index = self._indexes.get(event_id)
+            if index is None:
+                index = self._indexes[event_id] = _EventIndex(self.tables, self.bits)
+        return index
+
+    def _sync(self, index, event_id):
+        key = data_version.commits()
+        if index.key == key:
+            return
+        if index.key is None:
+            index.add(snapshot_store.event_snapshot(event_id))
+        else:
+            from sqlalchemy import select
+            from database import db
+            from models import Participant
+
+            columns = [getattr(Participant, column) for column in SNAPSHOT_COLUMNS]
+            statement = (select(*columns)
+                         .where(Participant.event_id == event_id, Participant.id > index.last_id)
+                         .order_by(Participant.id))
+            rows = db.session.execute(statement).all()
+            if rows:
+                index.add(ParticipantSnapshot.from_rows(rows))
+        index.key = key
+
+    def recommend(self, event_id, participant_id, mode=SIMILAR, limit=10):
+        """[(participant id, score)] best first, or None if the participant isn't in the event"""
+        index = self._event_index(event_id)
+        with index.lock:
+            self._sync(index, event_id)
+            row = index.rows.get(int(participant_id))
+            if row is None:
+                return None
+            profiles, skills, interests = index.matrices()
+
+            exact = len(index) < self.exact_below
+            if mode == COMPLEMENTARY:
+                query = interests[row]
+                rows = (np.arange(len(index)) if exact else
+                        index.complementary.candidates(query, self.max_candidates))
+                rows = rows[index.roles[rows] != index.roles[row]]
+                shared = np.asarray((interests[rows] @ query.T).todense()).ravel()
+                overlap = np.asarray((skills[rows] @ skills[row].T).todense()).ravel()
+                keep = shared > 0
+                rows, scores = rows[keep], shared[keep] - 0.5 * overlap[keep]
+            else:
+                query = profiles[row]
+                rows = (np.arange(len(index)) if exact else
+                        index.similar.candidates(query, self.max_candidates))
+                rows = rows[rows != row]
+                scores = np.asarray((profiles[rows] @ query.T).todense()).ravel()
+            ids = index.ids
+
+        self.lookups.inc(mode, 'exact' if exact else 'lsh')
+        self.candidates.observe(len(rows))
+        if len(rows) > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        return [(int(ids[rows[i]]), round(float(scores[i]), 4)) for i in order]
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def metric_lines(self):
+        return self.lookups.render() + self.candidates.render()
+
+
+# Global recommender
+recommender = ParticipantRecommender()
@@ -0,0 +1,195 @@
+import os
+import queue
+import threading
+import time
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from database import db
+from data_changes import record_changes
+from instrumentation import Counter, Histogram
+
+CREATED = 'created'
+DUPLICATE = 'duplicate'
+# Queued but not yet written when the request stopped waiting
+PENDING = 'pending'
+
+# Dialects with INSERT ... ON CONFLICT DO NOTHING ... RETURNING
+_UPSERT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 200, 500)
+
+
+class _Pending:
+    __slots__ = ('values', 'done', 'result', 'error')
+
+    def __init__(self, values):
+        self.values = values
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RegistrationBatcher:
+    """
+    Group commit for participant registrations.
+
+    Request threads hand their row to a writer thread and wait. The writer
+    collects whatever arrives within ``window`` seconds (up to
+    ``max_batch`` rows) and writes it as one multi-row INSERT ... ON
+    CONFLICT DO NOTHING in a single commit, so a surge of sign-ups takes
+    one SQLite write lock per batch instead of one per person. RETURNING tells which rows went in; every other row is a
+    duplicate. If a batch fails, its rows are retried one by one so a bad
+    row only fails its own request.
+
+    Batches only form from requests in flight at the same time in one
+    process, so this helps threaded (or gevent) workers; a sync worker
+    serves one request at a time and always writes batches of one.
+
+    With REGISTRATION_BATCHING off, rows are written the same way in the
+    request thread, one per commit.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = True
+        self.window = 0.005
+        self.max_batch = 200
+        self.timeout = 10.0
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.registrations = Counter('hackhub_registrations_total',
+                                     'Registration attempts by result', ('result',))
+        self.batch_sizes = Histogram('hackhub_registration_batch_size',
+                                     'Registrations written per commit', buckets=BATCH_SIZE_BUCKETS)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('REGISTRATION_BATCHING', True)
+        self.window = app.config.get('REGISTRATION_BATCH_WINDOW', self.window)
+        self.max_batch = app.config.get('REGISTRATION_BATCH_MAX', self.max_batch)
+
+    def register(self, values):
+        """
+        Insert a participant row (a dict of Participant columns). Returns
+        CREATED, or DUPLICATE if the event already has that email; raises
+        if the row could not be written.
+
+        Batched rows are written by the writer thread's transaction, not
+        the caller's, so the session must hold no unsaved changes. When the
+        writer takes longer than ``timeout`` the row stays queued and
+        PENDING is returned: it will still be written, and registering it
+        again is safe (it comes back as DUPLICATE once it is in).
+        """
+        pending = _Pending(values)
+        if self.enabled:
+            if db.engine.dialect.name == 'sqlite':
+                # Release the request's read transaction (nothing to commit):
+                # an open SQLite reader would block the writer's commit
+                db.session.rollback()
+            self._writer_queue().put(pending)
+            if not pending.done.wait(self.timeout):
+                return PENDING
+        else:
+            self._write([pending])
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _writer_queue(self):
+        # Started on first use, and again in each forked worker process
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, args=(self._queue,), daemon=True,
+                                 name='registration-writer').start()
+            return self._queue
+
+    def _run(self, pending_queue):
+        while True:
+            batch = [pending_queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(pending_queue.get(timeout=remaining) if remaining > 0
+                                 else pending_queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self.app.app_context():
+                self._write(batch)
+
+    def _write(self, batch):
+        self.batch_sizes.observe(len(batch))
+        try:
+            self._insert(batch)
+        except Exception as e:
+            db.session.rollback()
+            if len(batch) == 1:
+                self._fail(batch[0], e)
+            else:
+                for pending in batch:
+                    try:
+                        self._insert([pending])
+                    except Exception as row_error:
+                        db.session.rollback()
+                        self._fail(pending, row_error)
+        finally:
+            for pending in batch:
+                self.registrations.inc(pending.result or 'error')
+                pending.done.set()
+
+    @staticmethod
+    def _fail(pending, error):
+        message = str(error).lower()
+        if isinstance(error, IntegrityError) and ('unique' in message or 'duplicate' in message):
+            # Only reachable on dialects without ON CONFLICT, where the
+            # unique constraint is what reports the duplicate
+            pending.result = DUPLICATE
+        else:
+            pending.error = error
+
+    def _insert(self, batch):
+        """Insert the batch in one statement and commit; sets each row's result"""
+        from models import Participant
+
+        table = Participant.__table__
+        columns = sorted({column for pending in batch for column in pending.values})
+        rows = [{column: pending.values.get(column) for column in columns} for pending in batch]
+        connection = db.session.connection()
+
+        upsert = _UPSERT_INSERTS.get(connection.dialect.name)
+        if upsert is not None:
+            # No conflict target: any unique rule skips the row, including the
+            # UNIQUE(email) of a database not yet through `flask upgrade-db`
+            statement = (upsert(table).values(rows)
+                         .on_conflict_do_nothing()
+                         .returning(table.c.event_id, table.c.email))
+            inserted = {tuple(row) for row in connection.execute(statement)}
+        else:
+            connection.execute(insert(table).values(rows))
+            inserted = {(row['event_id'], row['email']) for row in rows}
+
+        record_changes(db.session, {event_id for event_id, _ in inserted})
+        db.session.commit()
+
+        # The first row for an email wins; repeats in the same batch are duplicates
+        for pending in batch:
+            key = (pending.values.get('event_id'), pending.values.get('email'))
+            if key in inserted:
+                inserted.discard(key)
+                pending.result = CREATED
+            else:
+                pending.result = DUPLICATE
+
+    def metric_lines(self):
+        return self.registrations.render() + self.batch_sizes.render()
+
+
+# Global registration writer
+registration_batcher = RegistrationBatcher()
@@ -1,21 +1,36 @@
-from flask import render_template, request, redirect, url_for, flash, jsonify
+from flask import render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
 from app import app, db
-from models import Participant, Team
-from team_matcher import TeamMatcher
+from models import Event, Participant, Team
 from ai_assistant import get_ai_suggestion, get_project_ideas, get_team_formation_advice, \
-    get_comprehensive_hackathon_help, get_hackathon_resources
+    get_comprehensive_hackathon_help, get_hackathon_resources, project_ideas_for, \
+    team_suggestion_data, team_suggestions_for
+from exports import export_chunks, ExportError, EXPORT_FORMATS
+from events import current_event, event_stats, find_event, refresh_balance_scores, run_matching
+from stats_stream import stats_broker
+from data_version import conditional_on_data_version
+from fragment_cache import fragment_cache, LazyValue
+from semantic_cache import answer_cache
+from instrumentation import instrumentation
+from rate_limit import rate_limited
+from registrations import registration_batcher, DUPLICATE, PENDING
+from read_replica import replica_reads
+from recommendations import recommender, MODES, SIMILAR
+from streaming_assignment import streaming_assigner
 from datetime import datetime
 
 
 @app.route('/')
+@replica_reads
 def index():
-    participant_count = Participant.query.count()
+    event = current_event()
+    participant_count = LazyValue(lambda: Participant.query.filter_by(event_id=event.id).count())
 
-    # Get some stats for the dashboard
-    developers = Participant.query.filter_by(role='Developer').count()
-    designers = Participant.query.filter_by(role='Designer').count()
+    # Get some stats for the dashboard (only queried if the page fragment isn't cached)
+    developers = LazyValue(lambda: Participant.query.filter_by(event_id=event.id, role='Developer').count())
+    designers = LazyValue(lambda: Participant.query.filter_by(event_id=event.id, role='Designer').count())
 
     return render_template('index.html',
+                           event=event,
                            participant_count=participant_count,
                            developer_count=developers,
                            designer_count=designers)
@@ -24,6 +39,8 @@ def index():
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     if request.method == 'POST':
+        # Resolved outside the try so an unknown event is a 404, not an error flash
+        event = current_event()
         try:
             # Parse skills and interests from comma-separated strings
             skills_str = request.form.get('skills', '')
@@ -32,7 +49,8 @@ def register():
             skills = [skill.strip() for skill in skills_str.split(',') if skill.strip()]
             interests = [interest.strip() for interest in interests_str.split(',') if interest.strip()]
 
-            participant = Participant(
+            result = registration_batcher.register(dict(
+                event_id=event.id,
                 name=request.form['name'],
                 email=request.form['email'],
                 role=request.form['role'],
@@ -43,12 +61,21 @@ def register():
                 availability=request.form['availability'],
                 github_url=request.form.get('github_url', ''),
                 linkedin_url=request.form.get('linkedin_url', '')
-            )
-
-            db.session.add(participant)
-            db.session.commit()
-
-            flash('Registration successful! You can now be matched with teams.', 'success')
+            ))
+
+            if result == DUPLICATE:
+                flash('This email is already registered for this event! Please use a different email.', 'error')
+                return render_template('register.html')
+            if result == PENDING:
+                flash('Registration received! It will appear in the participant list shortly.', 'success')
+                return redirect(url_for('participants'))
+
+            team = streaming_assigner.place(event.id, request.form['email']) \
+                if streaming_assigner.enabled else None
+            if team is not None:
+                flash(f'Registration successful! You have joined {team.name}.', 'success')
+            else:
+                flash('Registration successful! You can now be matched with teams.', 'success')
             return redirect(url_for('participants'))
 
         except Exception as e:
@@ -59,15 +86,21 @@ def register():
 
 
 @app.route('/participants')
+@conditional_on_data_version
+@replica_reads
 def participants():
-    participants = Participant.query.all()
-    return render_template('participants.html', participants=participants)
+    event = current_event()
+    participants = LazyValue(lambda: Participant.query.filter_by(event_id=event.id).all())
+    return render_template('participants.html', participants=participants, event=event)
 
 
 @app.route('/teams')
+@conditional_on_data_version
+@replica_reads
 def teams():
-    teams = Team.query.all()
-    return render_template('teams.html', teams=teams)
+    event = current_event()
+    teams = Team.query.filter_by(event_id=event.id).all()
+    return render_template('teams.html', teams=teams, event=event)
 
 
 @app.route('/hackathon-portals')
@@ -83,16 +116,10 @@ def connect():
 @app.route('/simple_register', methods=['GET', 'POST'])
 def simple_register():
     if request.method == 'POST':
+        event = current_event()
         try:
             email = request.form['email']
 
-            # Check if email already exists
-            existing_participant = Participant.query.filter_by(email=email).first()
-            if existing_participant:
-                flash('This email is already registered! Please use a different email or check the participants list.',
-                      'error')
-                return render_template('simple_register.html')
-
             # Parse skills and interests from comma-separated strings
             skills_str = request.form.get('skills', '')
             interests_str = request.form.get('interests', '')
@@ -100,7 +127,10 @@ def simple_register():
             skills = [skill.strip() for skill in skills_str.split(',') if skill.strip()]
             interests = [interest.strip() for interest in interests_str.split(',') if interest.strip()]
 
-            participant = Participant(
+            # Saved with other registrations arriving at the same moment; an
+            # email already registered for the event comes back as DUPLICATE
+            result = registration_batcher.register(dict(
+                event_id=event.id,
                 name=request.form['name'],
                 email=email,
                 role=request.form['role'],
@@ -109,29 +139,38 @@ def simple_register():
                 interests=interests,
                 preferred_team_size=int(request.form.get('preferred_team_size', 4)),
                 availability=request.form['availability']
-            )
+            ))
 
-            db.session.add(participant)
-            db.session.commit()
+            if result == DUPLICATE:
+                flash('This email is already registered! Please use a different email or check the participants list.',
+                      'error')
+                return render_template('simple_register.html')
+            if result == PENDING:
+                flash('Registration received! It will appear in the list shortly.', 'success')
+                return redirect(url_for('simple_participants'))
 
-            flash('Registration successful!', 'success')
+            team = streaming_assigner.place(event.id, email) if streaming_assigner.enabled else None
+            if team is not None:
+                flash(f'Registration successful! You have joined {team.name}.', 'success')
+            else:
+                flash('Registration successful!', 'success')
             return redirect(url_for('simple_participants'))
 
         except Exception as e:
             db.session.rollback()
-            # Handle specific database errors
-            if "duplicate key value violates unique constraint" in str(e) and "email" in str(e):
-                flash('This email is already registered! Please use a different email.', 'error')
-            else:
-                flash(f'Registration failed. Please try again.', 'error')
+            print(f"Registration error: {e}")
+            flash('Registration failed. Please try again.', 'error')
 
     return render_template('simple_register.html')
 
 
 @app.route('/simple_participants')
+@conditional_on_data_version
+@replica_reads
 def simple_participants():
-    participants = Participant.query.all()
-    return render_template('simple_participants.html', participants=participants)
+    event = current_event()
+    participants = Participant.query.filter_by(event_id=event.id).all()
+    return render_template('simple_participants.html', participants=participants, event=event)
 
 
 @app.route('/project-ideas')
@@ -140,88 +179,13 @@ def project_ideas():
 
 
 @app.route('/generate-project-ideas', methods=['POST'])
+@rate_limited
 def generate_project_ideas():
     try:
         data = request.get_json()
 
-        # Build prompt based on user preferences
-        prompt = "Generate 3 innovative hackathon project ideas with the following preferences:\n"
-
-        if data.get('technology'):
-            prompt += f"Technology focus: {data['technology']}\n"
-        if data.get('team_size'):
-            prompt += f"Team size: {data['team_size']} members\n"
-        if data.get('experience'):
-            prompt += f"Experience level: {data['experience']}\n"
-        if data.get('duration'):
-            prompt += f"Project duration: {data['duration']}\n"
-        if data.get('skills'):
-            prompt += f"Skills/interests: {data['skills']}\n"
-
-        prompt += """
-For each idea, provide:
-1. Title (creative and catchy)
-2. Description (2-3 sentences)
-3. Category (e.g., Social Impact, FinTech, Health, etc.)
-4. Difficulty level (Beginner, Intermediate, Advanced)
-5. Tech stack (3-5 technologies)
-6. Team roles needed (2-4 roles)
-7. Key features (3-4 main features)
-
-Format as JSON array with this structure:
-[{
-  "title": "Project Name",
-  "description": "Brief description...",
-  "category": "Category",
-  "difficulty": "Level",
-  "tech_stack": ["Tech1", "Tech2", "Tech3"],
-  "team_roles": ["Role1", "Role2", "Role3"],
-  "features": ["Feature1", "Feature2", "Feature3"]
-}]
-"""
-
-        # Get AI response
-        from ai_assistant import get_project_ideas
-        ai_response = get_project_ideas(prompt)
-
-        # Try to parse JSON response
-        try:
-            import json
-            ideas = json.loads(ai_response)
-            if not isinstance(ideas, list):
-                raise ValueError("Response is not a list")
-        except:
-            # Fallback ideas if AI response fails
-            ideas = [
-                {
-                    "title": "SmartGarden IoT",
-                    "description": "Automated plant care system using sensors and AI to optimize watering, lighting, and nutrients for indoor gardens.",
-                    "category": "IoT/GreenTech",
-                    "difficulty": "Intermediate",
-                    "tech_stack": ["Arduino", "Python", "React", "Firebase"],
-                    "team_roles": ["IoT Developer", "Web Developer", "Data Scientist"],
-                    "features": ["Sensor monitoring", "Mobile alerts", "Growth analytics", "Automated watering"]
-                },
-                {
-                    "title": "CommunityFund",
-                    "description": "Blockchain-based platform for transparent community fundraising with smart contracts and decentralized voting.",
-                    "category": "Blockchain/Social",
-                    "difficulty": "Advanced",
-                    "tech_stack": ["Solidity", "React", "Web3.js", "IPFS"],
-                    "team_roles": ["Blockchain Developer", "Frontend Developer", "UX Designer"],
-                    "features": ["Smart contracts", "Voting mechanism", "Fund tracking", "Community dashboard"]
-                },
-                {
-                    "title": "AI Meditation Guide",
-                    "description": "Personalized meditation app that adapts to user's stress levels and preferences using ML and biometric data.",
-                    "category": "Health/AI",
-                    "difficulty": "Intermediate",
-                    "tech_stack": ["Python", "TensorFlow", "React Native", "HealthKit"],
-                    "team_roles": ["AI Developer", "Mobile Developer", "UX Designer", "Health Expert"],
-                    "features": ["Stress detection", "Personalized sessions", "Progress tracking",
-                                 "Biometric integration"]
-                }
-            ]
+        # Ask for ideas matching the user's preferences as schema-validated JSON
+        ideas = project_ideas_for(data)
 
         return jsonify({"success": True, "ideas": ideas})
 
@@ -230,117 +194,38 @@ Format as JSON array with this structure:
 
 
 @app.route('/teams-view')
+@conditional_on_data_version
+@replica_reads
 def teams_view():
-    teams = Team.query.all()
-    available_count = Participant.query.filter_by(team_id=None).count()
+    event = current_event()
+
+    def load_teams():
+        teams = Team.query.filter_by(event_id=event.id).all()
+
+        # Get team members for each team
+        for team in teams:
+            team.members = Participant.query.filter_by(team_id=team.id).all()
+        return teams
 
-    # Get team members for each team
-    for team in teams:
-        team.members = Participant.query.filter_by(team_id=team.id).all()
+    teams = LazyValue(load_teams)
+    available_count = LazyValue(lambda: Participant.query.filter_by(event_id=event.id, team_id=None).count())
 
-    return render_template('teams_view.html', teams=teams, available_count=available_count)
+    return render_template('teams_view.html', teams=teams, available_count=available_count, event=event)
 
 
 @app.route('/ai-suggest-teams', methods=['POST'])
+@rate_limited
 def ai_suggest_teams():
+    event = current_event()
     try:
-        # Get all available participants (not in teams)
-        participants = Participant.query.filter_by(team_id=None).all()
+        # Get all available participants (not in teams) for this event
+        participants = Participant.query.filter_by(event_id=event.id, team_id=None).all()
 
         if len(participants) < 2:
             return jsonify({"success": False, "error": "Need at least 2 participants to suggest teams"})
 
-        # Build participant data for AI analysis
-        participant_data = []
-        for p in participants:
-            participant_data.append({
-                "name": p.name,
-                "email": p.email,
-                "role": p.role,
-                "experience_level": p.experience_level,
-                "skills": p.skills if p.skills else [],
-                "interests": p.interests if p.interests else [],
-                "preferred_team_size": p.preferred_team_size or 4,
-                "availability": p.availability
-            })
-
-        # Create AI prompt for team suggestions
-        prompt = f"""
-Analyze the following {len(participants)} hackathon participants and suggest optimal team combinations:
-
-Participants:
-"""
-
-        for p in participant_data:
-            prompt += f"""
-- {p['name']} ({p['role']}, {p['experience_level']})
-  Skills: {', '.join(p['skills'])}
-  Interests: {', '.join(p['interests'])}
-  Preferred team size: {p['preferred_team_size']}
-  Email: {p['email']}
-"""
-
-        prompt += """
-Please provide 2-3 different team combination suggestions. For each suggestion:
-
-1. List the team members
-2. Explain the reasoning (why these people work well together)
-3. Give a compatibility score (0-100%)
-4. Suggest a project idea that matches the team's combined skills
-
-Format as JSON:
-[{
-  "members": [{"name": "...", "role": "...", "experience_level": "...", "email": "...", "skills": [...]}],
-  "reasoning": "Why this team works well together...",
-  "compatibility_score": 85,
-  "project_suggestion": "A brief project idea..."
-}]
-"""
-
-        # Get AI response
-        from ai_assistant import get_ai_suggestion
-        ai_response = get_ai_suggestion(prompt)
-
-        # Try to parse JSON response
-        try:
-            import json
-            suggestions = json.loads(ai_response)
-            if not isinstance(suggestions, list):
-                raise ValueError("Response is not a list")
-        except:
-            # Fallback suggestions if AI response fails
-            suggestions = []
-
-            # Create simple suggestions based on role diversity
-            if len(participants) >= 2:
-                developers = [p for p in participant_data if p['role'] == 'Developer']
-                designers = [p for p in participant_data if p['role'] == 'Designer']
-                others = [p for p in participant_data if p['role'] not in ['Developer', 'Designer']]
-
-                # Suggestion 1: Mix of roles
-                team1 = []
-                if developers: team1.append(developers[0])
-                if designers: team1.append(designers[0])
-                if len(team1) < 4 and others: team1.extend(others[:2])
-                if len(team1) < 4 and len(developers) > 1: team1.append(developers[1])
-
-                if len(team1) >= 2:
-                    suggestions.append({
-                        "members": team1,
-                        "reasoning": "This team combines different roles for diverse skill coverage and balanced perspectives.",
-                        "compatibility_score": 75,
-                        "project_suggestion": "A web application that combines technical development with user-focused design."
-                    })
-
-                # Suggestion 2: Remaining participants
-                remaining = [p for p in participant_data if p not in team1]
-                if len(remaining) >= 2:
-                    suggestions.append({
-                        "members": remaining,
-                        "reasoning": "This team groups remaining participants with complementary skills and experience levels.",
-                        "compatibility_score": 70,
-                        "project_suggestion": "A project that leverages the unique combination of skills in this team."
-                    })
+        # Ask the AI for team combinations, falling back to role-diversity suggestions
+        suggestions = team_suggestions_for(team_suggestion_data(participants))
 
         return jsonify({"success": True, "suggestions": suggestions})
 
@@ -350,40 +235,23 @@ Format as JSON:
 
 @app.route('/generate-teams', methods=['POST'])
 def generate_teams():
+    event = current_event()
     try:
-        # Get unassigned participants
-        unassigned_participants = Participant.query.filter_by(team_id=None).all()
 
-        if len(unassigned_participants) < 2:
+        # Only this event's unassigned participants are matched
+        unassigned_count = Participant.query.filter_by(event_id=event.id, team_id=None).count()
+
+        if unassigned_count < 2:
             return jsonify({
                 'success': False,
                 'message': 'Need at least 2 unassigned participants to form teams'
             })
 
-        # Initialize team matcher
-        matcher = TeamMatcher()
-        generated_teams = matcher.create_balanced_teams(unassigned_participants)
-
-        teams_created = 0
-        for team_data in generated_teams:
-            # Create team
-            team = Team(
-                name=team_data['name'],
-                description=team_data['description'],
-                balance_score=team_data['balance_score'],
-                tech_stack=team_data['suggested_tech_stack']
-            )
-            db.session.add(team)
-            db.session.flush()  # Get team ID
-
-            # Assign participants to team
-            for participant_id in team_data['participant_ids']:
-                participant = Participant.query.get(participant_id)
-                if participant:
-                    participant.team_id = team.id
-
-            teams_created += 1
-
+        # Teams follow preferred sizes unless a fixed team_size is asked for
+        options = request.get_json(silent=True) or {}
+        team_size = options.get('team_size')
+        teams_created = run_matching(event.id, int(team_size) if team_size else None,
+                                     optimise=bool(options.get('optimise')))
         db.session.commit()
 
         return jsonify({
@@ -400,7 +268,29 @@ def generate_teams():
         })
 
 
+@app.route('/api/teams/refresh-scores', methods=['POST'])
+def refresh_team_scores():
+    """Recompute the current event's stored team balance scores from current members"""
+    event = current_event()
+    try:
+        updated = refresh_balance_scores(event.id)
+        db.session.commit()
+        return jsonify({
+            'success': True,
+            'message': f'Rescored {updated} teams',
+            'teams_updated': updated
+        })
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error refreshing scores: {str(e)}'
+        })
+
+
 @app.route('/api/ai-chat', methods=['POST'])
+@rate_limited
 def ai_chat():
     try:
         data = request.get_json()
@@ -443,15 +333,25 @@ def api_project_ideas():
         })
 
 
+_hackathon_resources_body = None
+
+
 @app.route('/api/hackathon-resources')
 def api_hackathon_resources():
     """Provide useful resources for hackathon participants"""
+    global _hackathon_resources_body
     try:
-        resources = get_hackathon_resources()
-        return jsonify({
-            'success': True,
-            'resources': resources
-        })
+        # The resource list is static: serialise it once and let clients cache it
+        if _hackathon_resources_body is None:
+            _hackathon_resources_body = jsonify({
+                'success': True,
+                'resources': get_hackathon_resources()
+            }).get_data()
+
+        response = Response(_hackathon_resources_body, mimetype='application/json')
+        response.add_etag()
+        response.headers['Cache-Control'] = 'public, max-age=86400'
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -460,6 +360,7 @@ def api_hackathon_resources():
 
 
 @app.route('/api/ai-help', methods=['POST'])
+@rate_limited
 def ai_help():
     """Enhanced AI help endpoint for specific hackathon questions"""
     try:
@@ -483,44 +384,146 @@ def ai_help():
 
 
 @app.route('/api/team-stats')
+@conditional_on_data_version
+@replica_reads
 def team_stats():
+    event = current_event()
     try:
-        teams = Team.query.all()
-        participants = Participant.query.all()
-
-        # Role distribution
-        role_counts = {}
-        for participant in participants:
-            role = participant.role
-            role_counts[role] = role_counts.get(role, 0) + 1
-
-        # Experience distribution
-        experience_counts = {}
-        for participant in participants:
-            exp = participant.experience_level
-            experience_counts[exp] = experience_counts.get(exp, 0) + 1
-
-        # Team size distribution
-        team_sizes = {}
-        for team in teams:
-            size = len(team.participants)
-            team_sizes[str(size)] = team_sizes.get(str(size), 0) + 1
+        return jsonify(event_stats(event.id))
 
+    except Exception as e:
         return jsonify({
-            'role_distribution': role_counts,
-            'experience_distribution': experience_counts,
-            'team_size_distribution': team_sizes,
-            'total_participants': len(participants),
-            'total_teams': len(teams),
-            'unassigned_participants': len([p for p in participants if p.team_id is None])
+            'success': False,
+            'message': f'Error fetching stats: {str(e)}'
+        })
+
+
+@app.route('/api/team-stats/stream')
+def team_stats_stream():
+    """
+    Server-sent events: a stats snapshot, then deltas as registrations and
+    teams change. Each response lasts a few seconds so it never pins a WSGI
+    worker; EventSource reconnects per its ``retry:``. asgi.py serves the
+    long-lived version.
+    """
+    event = current_event()
+    response = Response(stats_broker.stream(event.id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
+
+
+@app.route('/api/participants/<int:participant_id>/recommendations')
+@replica_reads
+def participant_recommendations(participant_id):
+    """People similar to a participant, or in other roles with shared interests (?mode=complementary)"""
+    mode = request.args.get('mode', SIMILAR)
+    if mode not in MODES:
+        return jsonify({
+            'success': False,
+            'message': f"mode must be one of: {', '.join(MODES)}"
+        }), 400
+
+    try:
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+        participant = db.session.get(Participant, participant_id)
+        if participant is None:
+            return jsonify({'success': False, 'message': 'Participant not found'}), 404
+
+        ranked = recommender.recommend(participant.event_id, participant_id, mode, limit) or []
+        found = {p.id: p for p in Participant.query.filter(
+            Participant.id.in_([pid for pid, _ in ranked])).all()}
+        recommendations = []
+        for pid, score in ranked:
+            if pid in found:
+                details = found[pid].to_dict()
+                details.pop('email')
+                details['score'] = score
+                recommendations.append(details)
+
+        return jsonify({
+            'success': True,
+            'participant_id': participant_id,
+            'mode': mode,
+            'recommendations': recommendations
         })
 
     except Exception as e:
         return jsonify({
             'success': False,
-            'message': f'Error fetching stats: {str(e)}'
+            'message': f'Error finding recommendations: {str(e)}'
+        })
+
+
+@app.route('/api/events', methods=['GET', 'POST'])
+def api_events():
+    """List events, or create one from a JSON body with name and slug"""
+    if request.method == 'GET':
+        return jsonify({
+            'success': True,
+            'events': [event.to_dict() for event in Event.query.order_by(Event.id).all()]
         })
 
+    try:
+        data = request.get_json() or {}
+        name = (data.get('name') or '').strip()
+        slug = (data.get('slug') or '').strip().lower()
+        if not name or not slug or slug.isdigit():
+            return jsonify({
+                'success': False,
+                'message': 'An event needs a name and a non-numeric slug'
+            }), 400
+        if find_event(slug):
+            return jsonify({
+                'success': False,
+                'message': f'Event {slug} already exists'
+            }), 409
+
+        event = Event(name=name, slug=slug, description=data.get('description'))
+        db.session.add(event)
+        db.session.commit()
+        return jsonify({'success': True, 'event': event.to_dict()}), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error creating event: {str(e)}'
+        })
+
+
+@app.route('/export/<kind>.<fmt>')
+@replica_reads
+def export_data(kind, fmt):
+    """Stream participants or teams as CSV, JSONL or Parquet"""
+    try:
+        chunks = export_chunks(kind, fmt, current_event().id)
+    except ExportError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+    response = Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename={kind}.{fmt}'
+    return response
+
+
+@app.route('/api/cache-stats')
+def cache_stats():
+    """Template fragment and AI answer cache hit rates"""
+    return jsonify({
+        'success': True,
+        'fragment_cache': fragment_cache.stats(),
+        'ai_answer_cache': answer_cache.stats()
+    })
+
+
+@app.route('/metrics')
+def metrics():
+    """Request, database, phase and cache metrics in Prometheus text format"""
+    return Response(instrumentation.render(), mimetype='text/plain; version=0.0.4')
+
 
 # Error handlers
 @app.errorhandler(404)
@@ -0,0 +1,248 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.neighbors import NearestNeighbors
+
+from text_terms import tokenize
+
+# Questions hash to this many term columns; collisions are negligible at cache sizes
+HASH_FEATURES = 2 ** 16
+
+# Nearest cached questions checked against the threshold and the specific-term rule
+NEIGHBOURS = 5
+
+
+def _as_terms(terms):
+    return terms
+
+
+# Term columns of already-tokenized questions: stateless, so a cached
+# question's columns never change as others come and go
+_vectorizer = HashingVectorizer(analyzer=_as_terms, n_features=HASH_FEATURES, binary=True,
+                                alternate_sign=False, norm=None)
+
+
+def question_terms(query):
+    """(sorted term columns, columns of its numbers) for a question"""
+    terms = tokenize(query)
+    numbers = [term for term in terms if not term.isalpha()]
+    columns = _vectorizer.transform([terms]).indices
+    return np.sort(columns), frozenset(_vectorizer.transform([numbers]).indices.tolist())
+
+
+def _binary_rows(rows):
+    """Binary term matrix with one row per array of term columns"""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(columns) for columns in rows], out=indptr[1:])
+    indices = np.concatenate(rows) if rows else np.empty(0, dtype=np.int32)
+    return csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(rows), HASH_FEATURES))
+
+
+class _Partition:
+    """
+    Cached answers for one context type, with a TF-IDF nearest-neighbour
+    index over their questions, rebuilt on the first lookup after a change.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()  # normalised query -> [columns, numbers, answer, stored_at], LRU first
+        self.stored = OrderedDict()  # normalised query -> stored_at, oldest first
+        self.keys = []
+        self.index = None  # (TfidfTransformer, NearestNeighbors, document frequency per column)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def add(self, key, entry):
+        self.entries.pop(key, None)
+        self.stored.pop(key, None)
+        self.entries[key] = entry
+        self.stored[key] = entry[3]
+        self.index = None
+
+    def remove(self, key):
+        del self.entries[key]
+        del self.stored[key]
+        self.index = None
+
+    def nearest(self, columns):
+        """[(similarity, key)] of the closest cached questions, most similar first"""
+        if self.index is None:
+            self.keys = list(self.entries)
+            binary = _binary_rows([self.entries[key][0] for key in self.keys])
+            tfidf = TfidfTransformer().fit(binary)
+            # Rows are unit length, so euclidean order is cosine order
+            neighbours = NearestNeighbors(algorithm='brute').fit(tfidf.transform(binary))
+            self.index = (tfidf, neighbours, np.bincount(binary.indices, minlength=HASH_FEATURES))
+        tfidf, neighbours, _ = self.index
+        distances, rows = neighbours.kneighbors(tfidf.transform(_binary_rows([columns])),
+                                                min(NEIGHBOURS, len(self.keys)))
+        return [(1.0 - distance * distance / 2, self.keys[row])
+                for distance, row in zip(distances[0], rows[0])]
+
+    def specific_terms_match(self, columns, numbers, entry):
+        """
+        False if the questions differ in a number, or if each has a term
+        the other lacks that no other cached question uses: a swapped
+        technology, topic or place ("React" for "Vue"). The counts come
+        from the questions seen, so everyday words stop being specific as
+        the cache fills.
+        """
+        if numbers != entry[1]:
+            return False
+        columns, cached_columns = set(columns.tolist()), set(entry[0].tolist())
+        document_frequency = self.index[2]
+        query_only = any(document_frequency[column] == 0 for column in columns - cached_columns)
+        cached_only = any(document_frequency[column] == 1 for column in cached_columns - columns)
+        return not (query_only and cached_only)
+
+
+class SemanticCache:
+    """
+    Reuses AI answers for near-duplicate questions.
+
+    Questions are tokenized with text_terms (the knowledge base's
+    tokenizer: stemmed content words, synonyms folded, so "looking for
+    teammates" and "how do I find a team" are both {find, team}), hashed by
+    sklearn's HashingVectorizer and weighted by a TfidfTransformer fitted
+    on the cached questions of the same context type. A NearestNeighbors
+    index over those vectors returns the closest cached questions, and the
+    best one at or above ``threshold`` cosine similarity is reused unless
+    the two differ in a number or each has a term no other cached question
+    uses, so "React state tips" never gets the answer to "Vue state tips".
+
+    The index is brute force (sklearn's tree indexes don't take sparse
+    text vectors): about 3 ms a lookup at the default 2000 entries, most
+    of it sklearn's input checks, and about 10 ms to refit on the first
+    lookup after a put. Each partition keeps at most ``max_entries``
+    answers, evicting the least recently used, and answers expire after
+    ``ttl`` seconds.
+    """
+
+    def __init__(self, threshold=0.65, max_entries=2000, ttl=6 * 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = True
+        self._partitions = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('AI_CACHE_ENABLED', True)
+        self.threshold = app.config.get('AI_CACHE_THRESHOLD', self.threshold)
+        self.max_entries = app.config.get('AI_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('AI_CACHE_TTL', self.ttl)
+
+    @staticmethod
+    def _normalise(query):
+        return ' '.join(re.sub(r'[^\w\s]', ' ', query.lower()).split())
+
+    def _partition(self, context_type):
+        partition = self._partitions.get(context_type)
+        if partition is None:
+            partition = self._partitions[context_type] = _Partition()
+        return partition
+
+    def get(self, query, context_type):
+        """The cached answer for a query similar enough to ``query``, or None"""
+        if not self.enabled or not query or not query.strip():
+            return None
+        key = self._normalise(query)
+        columns, numbers = question_terms(query)
+
+        with self._lock:
+            partition = self._partition(context_type)
+            self._expire(partition, time.time())
+
+            entry = partition.entries.get(key)
+            if entry is None and partition.entries and len(columns):
+                for similarity, cached_key in partition.nearest(columns):
+                    if similarity < self.threshold:
+                        break
+                    candidate = partition.entries[cached_key]
+                    if partition.specific_terms_match(columns, numbers, candidate):
+                        key, entry = cached_key, candidate
+                        break
+
+            if entry is None:
+                partition.misses += 1
+                return None
+            partition.entries.move_to_end(key)
+            partition.hits += 1
+            return entry[2]
+
+    def put(self, query, context_type, answer):
+        if not self.enabled or not query or not query.strip() or not answer:
+            return
+        key = self._normalise(query)
+        columns, numbers = question_terms(query)
+        with self._lock:
+            partition = self._partition(context_type)
+            partition.add(key, [columns, numbers, answer, time.time()])
+            while len(partition.entries) > self.max_entries:
+                partition.remove(next(iter(partition.entries)))
+                partition.evictions += 1
+
+    def _expire(self, partition, now):
+        # Oldest first, so this stops at the first answer still fresh
+        while partition.stored:
+            key, stored_at = next(iter(partition.stored.items()))
+            if now - stored_at <= self.ttl:
+                break
+            partition.remove(key)
+            partition.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._partitions.clear()
+
+    def stats(self):
+        with self._lock:
+            partitions = {
+                context_type: {
+                    'entries': len(partition.entries),
+                    'hits': partition.hits,
+                    'misses': partition.misses,
+                    'evictions': partition.evictions,
+                    'hit_rate': round(partition.hits / (partition.hits + partition.misses), 4)
+                    if partition.hits + partition.misses else 0.0
+                }
+                for context_type, partition in sorted(self._partitions.items())
+            }
+        hits = sum(p['hits'] for p in partitions.values())
+        misses = sum(p['misses'] for p in partitions.values())
+        return {
+            'threshold': self.threshold,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            'partitions': partitions
+        }
+
+    def metric_lines(self):
+        """Cache stats as Prometheus exposition lines"""
+        partitions = self.stats()['partitions']
+        lines = ['# HELP hackhub_ai_cache_lookups_total AI answer cache lookups by result',
+                 '# TYPE hackhub_ai_cache_lookups_total counter']
+        for context_type, counts in partitions.items():
+            for result, key in (('hit', 'hits'), ('miss', 'misses')):
+                lines.append(f'hackhub_ai_cache_lookups_total'
+                             f'{{context_type="{context_type}",result="{result}"}} {counts[key]}')
+        lines.extend(['# HELP hackhub_ai_cache_entries Cached AI answers',
+                      '# TYPE hackhub_ai_cache_entries gauge'])
+        lines.extend(f'hackhub_ai_cache_entries{{context_type="{context_type}"}} {counts["entries"]}'
+                     for context_type, counts in partitions.items())
+        lines.extend(['# HELP hackhub_ai_cache_evictions_total AI answers evicted or expired',
+                      '# TYPE hackhub_ai_cache_evictions_total counter'])
+        lines.extend(f'hackhub_ai_cache_evictions_total{{context_type="{context_type}"}} {counts["evictions"]}'
+                     for context_type, counts in partitions.items())
+        return lines
+
+
+# Global cache instance
+answer_cache = SemanticCache()
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import threading
+
+from sqlalchemy import func, select
+
+from data_version import data_version
+from database import db, database_identity
+from instrumentation import Counter
+from models import Participant
+from participant_snapshot import ParticipantSnapshot
+
+
+class SnapshotStore:
+    """
+    Per-event ParticipantSnapshots persisted under instance/snapshots and
+    memory-mapped read-only.
+
+    Snapshots are stored per database (see database_identity) and keyed by
+    the data version's commit count together with the event's participant
+    count and highest participant id. The commit count stays valid across
+    worker restarts and is rebuilt only after participant or team data
+    changes (or a restart, which counts as one: writes made while the app
+    was down are not tracked). The count and id are re-read on every call
+    and checked against the snapshot opened, so a snapshot never outlives
+    the rows it was built from even when the counter is reset or shared
+    with another database. The first worker to need a missing snapshot builds
+    it from the database and publishes it with an atomic rename. Every
+    worker then maps the same files, so the arrays live once in the page
+    cache rather than once per process.
+    """
+
+    def __init__(self):
+        self.directory = None
+        self._lock = threading.Lock()
+        self._open = {}  # event id -> (key, snapshot)
+        self.loads = Counter('hackhub_snapshot_loads_total',
+                             'Participant snapshots served, by where they came from', ('source',))
+
+    def init_app(self, app):
+        self.directory = os.path.join(app.instance_path, 'snapshots', database_identity())
+        os.makedirs(self.directory, exist_ok=True)
+
+    def event_snapshot(self, event_id):
+        """Snapshot of all of an event's participants as of the current data version"""
+        if self.directory is None:
+            self.loads.inc('database')
+            return ParticipantSnapshot.load(event_id=event_id)
+
+        # Read the key before the rows: the rows are then at least this new
+        count, last_id = db.session.execute(
+            select(func.count(Participant.id), func.max(Participant.id))
+            .where(Participant.event_id == event_id)).one()
+        key = (data_version.commits(), count, last_id or 0)
+        with self._lock:
+            cached = self._open.get(event_id)
+        if cached is not None and cached[0] == key:
+            self.loads.inc('memory')
+            return cached[1]
+
+        path = os.path.join(self.directory, f'event-{event_id}', 'c{}-n{}-i{}'.format(*key))
+        try:
+            snapshot = ParticipantSnapshot.open(path)
+        except FileNotFoundError:
+            snapshot = None
+        if snapshot is not None and _describes(snapshot, key):
+            self.loads.inc('disk')
+        else:
+            snapshot = ParticipantSnapshot.load(event_id=event_id)
+            self.loads.inc('database')
+            if not _describes(snapshot, key):
+                # Rows changed between the key query and the load; serve them unpublished
+                return snapshot
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            self._publish(snapshot, path)
+            snapshot = ParticipantSnapshot.open(path)
+
+        with self._lock:
+            self._open[event_id] = (key, snapshot)
+        return snapshot
+
+    def _publish(self, snapshot, path):
+        event_directory = os.path.dirname(path)
+        os.makedirs(event_directory, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix='.build-', dir=event_directory)
+        try:
+            snapshot.save(staging)
+            os.rename(staging, path)
+        except OSError:
+            # Another worker published this version first
+            shutil.rmtree(staging, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+
+        # Older versions can go; processes still mapping them keep their pages
+        current = os.path.basename(path)
+        for name in os.listdir(event_directory):
+            if name != current and not name.startswith('.build-'):
+                shutil.rmtree(os.path.join(event_directory, name), ignore_errors=True)
+
+    def metric_lines(self):
+        return self.loads.render()
+
+
+def _describes(snapshot, key):
+    """Whether a snapshot holds as many participants, up to the same id, as the key says"""
+    _, count, last_id = key
+    return len(snapshot) == count and (int(snapshot.ids[-1]) if count else 0) == last_id
+
+
+# Global snapshot store
+snapshot_store = SnapshotStore()
@@ -125,7 +125,9 @@ class AIAssistant {
             if (data.success) {
                 this.addMessage('ai', data.response);
             } else {
-                this.addMessage('ai', 'Sorry, I encountered an error. Please try again.');
+                this.addMessage('ai', response.status === 429 && data.message
+                    ? data.message
+                    : 'Sorry, I encountered an error. Please try again.');
             }
         } catch (error) {
             console.error('AI Chat Error:', error);
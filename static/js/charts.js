@@ -612,29 +612,59 @@ function destroyChart(chartId) {
 }
 
 // Real-time chart updates
-function setupRealTimeCharts() {
-    // Check for data updates every 30 seconds
+let liveStats = null;
+
+function applyStatsMessage(message) {
+    if (message.type === 'snapshot' || liveStats === null) {
+        liveStats = message.stats;
+        return;
+    }
+
+    // Deltas carry only changed keys; nested distributions send null for removed entries
+    Object.entries(message.stats).forEach(([key, value]) => {
+        if (value !== null && typeof value === 'object' && !Array.isArray(value)) {
+            const merged = Object.assign({}, liveStats[key] || {});
+            Object.entries(value).forEach(([subKey, subValue]) => {
+                if (subValue === null) {
+                    delete merged[subKey];
+                } else {
+                    merged[subKey] = subValue;
+                }
+            });
+            liveStats[key] = merged;
+        } else {
+            liveStats[key] = value;
+        }
+    });
+}
+
+function refreshLiveCharts(data) {
+    // Update existing charts with new data
+    const roleChart = Chart.getChart('roleChart');
+    const experienceChart = Chart.getChart('experienceChart');
+
+    if (roleChart && Object.keys(data.role_distribution).length > 0) {
+        roleChart.data.labels = Object.keys(data.role_distribution);
+        roleChart.data.datasets[0].data = Object.values(data.role_distribution);
+        roleChart.update('none');
+    }
+
+    if (experienceChart && Object.keys(data.experience_distribution).length > 0) {
+        experienceChart.data.labels = Object.keys(data.experience_distribution);
+        experienceChart.data.datasets[0].data = Object.values(data.experience_distribution);
+        experienceChart.update('none');
+    }
+}
+
+function pollStats() {
+    // Fallback for browsers without EventSource: check every 30 seconds
     setInterval(async () => {
         try {
             const response = await fetch('/api/team-stats');
             const data = await response.json();
 
             if (data.success !== false) {
-                // Update existing charts with new data
-                const roleChart = Chart.getChart('roleChart');
-                const experienceChart = Chart.getChart('experienceChart');
-
-                if (roleChart && Object.keys(data.role_distribution).length > 0) {
-                    roleChart.data.labels = Object.keys(data.role_distribution);
-                    roleChart.data.datasets[0].data = Object.values(data.role_distribution);
-                    roleChart.update('none');
-                }
-
-                if (experienceChart && Object.keys(data.experience_distribution).length > 0) {
-                    experienceChart.data.labels = Object.keys(data.experience_distribution);
-                    experienceChart.data.datasets[0].data = Object.values(data.experience_distribution);
-                    experienceChart.update('none');
-                }
+                refreshLiveCharts(data);
             }
         } catch (error) {
             console.error('Error updating charts:', error);
@@ -642,6 +672,28 @@ function setupRealTimeCharts() {
     }, 30000);
 }
 
+function setupRealTimeCharts() {
+    if (!window.EventSource) {
+        pollStats();
+        return;
+    }
+
+    // The server pushes a snapshot, then deltas only when registrations or teams change
+    const source = new EventSource('/api/team-stats/stream');
+    source.addEventListener('stats', (event) => {
+        try {
+            applyStatsMessage(JSON.parse(event.data));
+            refreshLiveCharts(liveStats);
+        } catch (error) {
+            console.error('Error updating charts:', error);
+        }
+    });
+    source.onerror = () => {
+        // EventSource reconnects by itself; the next snapshot resyncs the charts
+        liveStats = null;
+    };
+}
+
 // Export chart as image
 function exportChart(chartId, filename = 'chart') {
     const canvas = document.getElementById(chartId);
@@ -0,0 +1,217 @@
+"""
+Live team stats over server-sent events.
+
+Under WSGI every open stream holds a worker (a process with gunicorn's
+sync workers, a thread with gthread), so StatsBroker.stream() closes after
+WSGI_STREAM_LIFETIME seconds and the ``retry:`` field tells EventSource to
+reconnect shortly after; each connection starts with a full snapshot, so
+nothing is lost in between. Long-lived streams are only served by the
+ASGI app (asgi.py, run under uvicorn or gunicorn's
+``uvicorn.workers.UvicornWorker``), where a waiting stream is a suspended
+coroutine rather than a worker.
+"""
+import asyncio
+import json
+import threading
+import time
+
+from database import db
+from data_changes import on_commit, ALL_EVENTS
+from events import event_stats
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15
+
+# Seconds between checks for writes committed by other worker processes
+SHARED_POLL_INTERVAL = 1.0
+
+# Seconds a WSGI stream stays open, and milliseconds EventSource waits to reconnect
+WSGI_STREAM_LIFETIME = 5
+WSGI_RETRY_MS = 2000
+
+# Async streams are closed after this long; EventSource reconnects on its own
+ASYNC_STREAM_LIFETIME = 600
+ASYNC_RETRY_MS = 5000
+
+
+def stats_delta(old, new):
+    """
+    Keys of ``new`` that differ from ``old``. Nested distributions are
+    diffed one level down, with removed entries sent as None.
+    """
+    delta = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            changes = {k: v for k, v in value.items() if previous.get(k) != v}
+            changes.update({k: None for k in previous if k not in value})
+            if changes:
+                delta[key] = changes
+        elif previous != value:
+            delta[key] = value
+    return delta
+
+
+class StatsBroker:
+    """
+    Fans per-event team stats out to server-sent-event streams.
+
+    Committed writes to participants or teams bump an event's version and
+    wake its streams. Stats are recomputed at most once per version, by
+    whichever stream wakes first, so idle dashboards cost no queries and a
+    change costs one aggregate query however many dashboards are open.
+    """
+
+    def __init__(self, compute_stats):
+        self._compute_stats = compute_stats
+        self._app = None
+        self._condition = threading.Condition()
+        self._versions = {}  # event id -> change counter
+        self._global_version = 0  # bumped when the changed events are unknown
+        self._cache = {}  # event id -> (version, stats)
+        self._compute_locks = {}
+        self._data_version = None
+        self._shared_seen = None
+
+    def init_app(self, app, data_version=None):
+        """
+        Subscribe to local commits. With a shared ``data_version`` counter,
+        writes committed by other worker processes are picked up too (as a
+        change to every event, since their event ids are not known here).
+        """
+        self._app = app
+        self._data_version = data_version
+        if data_version is not None:
+            self._shared_seen = data_version.current()[0]
+        on_commit(self.publish)
+
+    def publish(self, event_ids):
+        """Record that the given events' stats changed and wake their streams"""
+        with self._condition:
+            if event_ids is ALL_EVENTS:
+                self._global_version += 1
+            else:
+                for event_id in event_ids:
+                    self._versions[event_id] = self._versions.get(event_id, 0) + 1
+            if self._data_version is not None:
+                # Our own commit bumped the shared counter by exactly one; anything
+                # beyond that came from another worker and is left for _sync_shared
+                shared = self._data_version.current()[0]
+                if shared == self._shared_seen + 1:
+                    self._shared_seen = shared
+            self._condition.notify_all()
+
+    def _sync_shared(self):
+        """Treat a shared-counter move from another worker as a change to all events"""
+        if self._data_version is None:
+            return
+        shared = self._data_version.current()[0]
+        if shared != self._shared_seen:
+            self._shared_seen = shared
+            self._global_version += 1
+
+    def version(self, event_id):
+        return (self._global_version, self._versions.get(event_id, 0))
+
+    def stats(self, event_id):
+        """Current stats for an event, recomputing only if its version moved"""
+        version = self.version(event_id)
+        cached = self._cache.get(event_id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        lock = self._compute_locks.setdefault(event_id, threading.Lock())
+        with lock:
+            cached = self._cache.get(event_id)
+            if cached and cached[0] == version:
+                return cached[1]
+            with self._app.app_context():
+                try:
+                    stats = self._compute_stats(event_id)
+                finally:
+                    db.session.remove()  # Don't hold a pooled connection between updates
+            self._cache[event_id] = (version, stats)
+            return stats
+
+    def wait_for_change(self, event_id, seen_version, timeout):
+        """Block until the event's version differs from ``seen_version`` or timeout"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                self._sync_shared()
+                remaining = deadline - time.monotonic()
+                if self.version(event_id) != seen_version or remaining <= 0:
+                    return self.version(event_id)
+                # Wake at least once a second to check the shared counter (a memory read)
+                self._condition.wait(min(remaining, SHARED_POLL_INTERVAL))
+
+    def stream(self, event_id, lifetime=WSGI_STREAM_LIFETIME):
+        """
+        Generate an SSE stream: one full ``snapshot`` message, then ``delta``
+        messages holding only the changed stats keys, for ``lifetime``
+        seconds. The waiting blocks the calling thread, so keep it short.
+        """
+        yield f"retry: {WSGI_RETRY_MS}\n\n"
+
+        version = self.version(event_id)
+        current = self.stats(event_id)
+        yield self._message('snapshot', current)
+
+        closes_at = time.monotonic() + lifetime
+        while True:
+            remaining = closes_at - time.monotonic()
+            if remaining <= 0:
+                break
+            new_version = self.wait_for_change(event_id, version, min(remaining, HEARTBEAT_INTERVAL))
+            if new_version == version:
+                if remaining > HEARTBEAT_INTERVAL:
+                    yield ": keep-alive\n\n"
+                continue
+
+            version = new_version
+            latest = self.stats(event_id)
+            delta = stats_delta(current, latest)
+            current = latest
+            if delta:
+                yield self._message('delta', delta)
+
+    async def stream_async(self, event_id):
+        """
+        stream() for asyncio servers. Waiting polls the version counters (a
+        memory read) every SHARED_POLL_INTERVAL instead of holding a thread,
+        and stats are recomputed in a worker thread.
+        """
+        yield f"retry: {ASYNC_RETRY_MS}\n\n"
+
+        version = self.version(event_id)
+        current = await asyncio.to_thread(self.stats, event_id)
+        yield self._message('snapshot', current)
+
+        closes_at = time.monotonic() + ASYNC_STREAM_LIFETIME
+        quiet_since = time.monotonic()
+        while time.monotonic() < closes_at:
+            await asyncio.sleep(SHARED_POLL_INTERVAL)
+            with self._condition:
+                self._sync_shared()
+                new_version = self.version(event_id)
+            if new_version == version:
+                if time.monotonic() - quiet_since >= HEARTBEAT_INTERVAL:
+                    quiet_since = time.monotonic()
+                    yield ": keep-alive\n\n"
+                continue
+
+            version = new_version
+            quiet_since = time.monotonic()
+            latest = await asyncio.to_thread(self.stats, event_id)
+            delta = stats_delta(current, latest)
+            current = latest
+            if delta:
+                yield self._message('delta', delta)
+
+    @staticmethod
+    def _message(kind, payload):
+        return f"event: stats\ndata: {json.dumps({'type': kind, 'stats': payload})}\n\n"
+
+
+# Global broker instance
+stats_broker = StatsBroker(event_stats)
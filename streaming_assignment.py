@@ -0,0 +1,348 @@
+import os
+import threading
+import time
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sqlalchemy import func, select, update
+
+from database import db
+from instrumentation import Counter
+from participant_snapshot import EXPERIENCE_SCORES
+from snapshot_store import snapshot_store
+from team_matcher import TeamMatcher, TECH_STACK_SIZE, balance_scores
+
+JOINED = 'joined'
+FOUNDED = 'founded'
+
+# Open teams tried in order of gain before founding a new one
+CLAIM_ATTEMPTS = 3
+
+
+class _EventTeams:
+    """
+    Role, experience and skill tallies for every team of one event, one
+    row per team, so a newcomer's effect on each team is a few array ops.
+    """
+
+    def __init__(self, snapshot, team_ids, min_size, max_size):
+        self.built_at = time.monotonic()
+        self.team_ids = np.asarray(team_ids, dtype=np.int64)
+        self.roles = {name: code for code, name in enumerate(snapshot.role_names)}
+        self.role_names = list(snapshot.role_names)
+        self.skills = {name: code for code, name in enumerate(snapshot.skill_names)}
+        self.skill_names = list(snapshot.skill_names)
+
+        rows = np.flatnonzero(np.isin(snapshot.team_ids, self.team_ids))
+        teams = np.searchsorted(self.team_ids, snapshot.team_ids[rows])
+        count = len(self.team_ids)
+        experience = snapshot.experience[rows].astype(np.int64)
+
+        self.sizes = np.bincount(teams, minlength=count)
+        self.role_counts = np.zeros((count, max(len(self.role_names), 1)), dtype=np.int64)
+        np.add.at(self.role_counts, (teams, snapshot.role_codes[rows]), 1)
+        self.level_counts = np.zeros((count, 4), dtype=np.int64)
+        np.add.at(self.level_counts, (teams, experience), 1)
+        self.exp_sum = np.bincount(teams, weights=experience, minlength=count)
+        self.exp_sumsq = np.bincount(teams, weights=experience * experience, minlength=count)
+        membership = csr_matrix((np.ones(len(rows)), (teams, rows)), shape=(count, len(snapshot)))
+        self.skill_counts = np.asarray((membership @ snapshot.skills).todense(), dtype=np.int64)
+        if self.skill_counts.shape[1] == 0:
+            self.skill_counts = np.zeros((count, 1), dtype=np.int64)
+
+        # A team's capacity is its members' median preferred size, within the bounds
+        preferred = np.clip(snapshot.preferred_team_size[rows], min_size, max_size)
+        order = np.lexsort((preferred, teams))
+        bounds = np.searchsorted(teams[order], np.arange(count + 1))
+        self.capacity = np.full(count, max_size, dtype=np.int64)
+        for t in np.flatnonzero(self.sizes):
+            members = preferred[order[bounds[t]:bounds[t + 1]]]
+            self.capacity[t] = members[(len(members) - 1) // 2]
+
+    def profile(self, participant):
+        """
+        (role code, experience score, skill codes, skill counts) for a
+        Participant, growing the vocabularies. A skill listed twice counts
+        twice, as in the snapshot and _calculate_balance_score.
+        """
+        role = self.roles.get(participant.role)
+        if role is None:
+            role = self.roles[participant.role] = len(self.role_names)
+            self.role_names.append(participant.role)
+        if role >= self.role_counts.shape[1]:
+            self.role_counts = np.pad(self.role_counts,
+                                      ((0, 0), (0, role + 1 - self.role_counts.shape[1])))
+
+        skills = {}
+        for name in participant.skills or ():
+            code = self.skills.get(name)
+            if code is None:
+                code = self.skills[name] = len(self.skill_names)
+                self.skill_names.append(name)
+            skills[code] = skills.get(code, 0) + 1
+        if self.skill_names and len(self.skill_names) > self.skill_counts.shape[1]:
+            self.skill_counts = np.pad(self.skill_counts,
+                                       ((0, 0), (0, len(self.skill_names) - self.skill_counts.shape[1])))
+        experience = EXPERIENCE_SCORES.get(participant.experience_level, 1)
+        return (role, experience, np.array(list(skills), dtype=np.int64),
+                np.array(list(skills.values()), dtype=np.int64))
+
+    def scores(self, teams=slice(None)):
+        return balance_scores(self.sizes[teams],
+                              np.count_nonzero(self.role_counts[teams] > 0, axis=1),
+                              self.level_counts[teams], self.exp_sum[teams], self.exp_sumsq[teams],
+                              np.count_nonzero(self.skill_counts[teams] > 0, axis=1),
+                              self.skill_counts[teams].sum(axis=1))
+
+    def gains(self, teams, profile):
+        """Change in each of ``teams``' balance score if the participant joined it"""
+        role, experience, skills, skill_counts = profile
+        level_counts = self.level_counts[teams].copy()
+        level_counts[:, experience] += 1
+        after = balance_scores(
+            self.sizes[teams] + 1,
+            np.count_nonzero(self.role_counts[teams] > 0, axis=1) + (self.role_counts[teams, role] == 0),
+            level_counts,
+            self.exp_sum[teams] + experience,
+            self.exp_sumsq[teams] + experience * experience,
+            np.count_nonzero(self.skill_counts[teams] > 0, axis=1) +
+            np.count_nonzero(self.skill_counts[np.ix_(teams, skills)] == 0, axis=1),
+            self.skill_counts[teams].sum(axis=1) + skill_counts.sum())
+        return after - self.scores(teams)
+
+    def add_team(self, team_id, capacity):
+        self.team_ids = np.append(self.team_ids, team_id)
+        self.sizes = np.append(self.sizes, 0)
+        self.capacity = np.append(self.capacity, capacity)
+        self.exp_sum = np.append(self.exp_sum, 0.0)
+        self.exp_sumsq = np.append(self.exp_sumsq, 0.0)
+        for name in ('role_counts', 'level_counts', 'skill_counts'):
+            matrix = getattr(self, name)
+            setattr(self, name, np.vstack([matrix, np.zeros((1, matrix.shape[1]), matrix.dtype)]))
+        return len(self.team_ids) - 1
+
+    def add(self, t, profile):
+        role, experience, skills, skill_counts = profile
+        self.sizes[t] += 1
+        self.role_counts[t, role] += 1
+        self.level_counts[t, experience] += 1
+        self.exp_sum[t] += experience
+        self.exp_sumsq[t] += experience * experience
+        self.skill_counts[t, skills] += skill_counts
+
+    def team_fields(self, t):
+        """Balance score, tech stack and description for team row ``t``, as _create_teams_data makes them"""
+        counts = self.skill_counts[t]
+        top = [code for code in np.argsort(-counts, kind='stable')[:TECH_STACK_SIZE]
+               if counts[code] > 0]
+        roles = ", ".join(self.role_names[code] for code in np.flatnonzero(self.role_counts[t]))
+        return {
+            'balance_score': round(float(self.scores([t])[0]), 3),
+            'tech_stack': [self.skill_names[code] for code in top],
+            'description': f"A diverse team of {int(self.sizes[t])} members with roles in {roles}."
+        }
+
+
+class StreamingAssigner:
+    """
+    Places each new registrant straight into a team, so teams form as
+    people sign up instead of waiting for /generate-teams.
+
+    Per event it caches team tallies (_EventTeams) and scores the newcomer
+    against every open team with array ops. Open teams are those below
+    their capacity whose capacity matches the newcomer's preferred size.
+    The newcomer joins the one whose balance score rises most. A claim is a
+    conditional UPDATE that re-checks capacity in the database, so workers
+    with slightly stale caches cannot overfill a team. When no team has
+    room, the newcomer founds a new team of their preferred size. Caches
+    are rebuilt once they are ``state_ttl`` seconds old.
+
+    Every ``rebalance_interval`` seconds a background thread runs
+    refine_teams over each event that had placements. It only swaps
+    members between teams of equal size, so sizes stay as planned.
+
+    Off unless STREAMING_ASSIGNMENT is set.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.min_size = 2
+        self.max_size = 6
+        self.state_ttl = 5.0
+        self.rebalance_interval = 300.0
+        self._lock = threading.Lock()
+        self._states = {}
+        self._placed = set()
+        self._pid = None
+        self.placements = Counter('hackhub_streaming_placements_total',
+                                  'Registrants placed into teams on arrival', ('result',))
+        self.rebalance_moves = Counter('hackhub_streaming_rebalance_moves_total',
+                                       'Participants moved by periodic team rebalancing')
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('STREAMING_ASSIGNMENT', False)
+        self.min_size = app.config.get('TEAM_MIN_SIZE', self.min_size)
+        self.max_size = app.config.get('TEAM_MAX_SIZE', self.max_size)
+        self.state_ttl = app.config.get('STREAMING_STATE_TTL', self.state_ttl)
+        self.rebalance_interval = app.config.get('STREAMING_REBALANCE_INTERVAL', self.rebalance_interval)
+
+    def place(self, event_id, email):
+        """
+        Put a just-registered participant into a team and commit. Returns
+        the Team, or None if they already had one or placement failed (the
+        registration itself stands either way).
+
+        The lock only guards the cached tallies: queries, the claim and the
+        commit run outside it, since the claim's conditional UPDATE already
+        settles races between threads as it does between workers.
+        """
+        from models import Participant
+
+        try:
+            participant = Participant.query.filter_by(event_id=event_id, email=email).one()
+            if participant.team_id is not None:
+                return None
+            with self._lock:
+                self._start_rebalancer()
+            team = self._place(event_id, participant)
+            db.session.commit()
+            with self._lock:
+                self._placed.add(event_id)
+            return team
+        except Exception as e:
+            db.session.rollback()
+            with self._lock:
+                self._states.pop(event_id, None)
+            print(f"Streaming assignment error: {e}")
+            return None
+
+    def _state(self, event_id):
+        from models import Team
+
+        with self._lock:
+            state = self._states.get(event_id)
+        if state is None or time.monotonic() - state.built_at > self.state_ttl:
+            team_ids = db.session.execute(
+                select(Team.id).where(Team.event_id == event_id).order_by(Team.id)).scalars().all()
+            state = _EventTeams(snapshot_store.event_snapshot(event_id), team_ids,
+                                self.min_size, self.max_size)
+            with self._lock:
+                self._states[event_id] = state
+        return state
+
+    def _place(self, event_id, participant):
+        from models import Team
+
+        state = self._state(event_id)
+        preferred = int(np.clip(participant.preferred_team_size or 4, self.min_size, self.max_size))
+        with self._lock:
+            profile = state.profile(participant)
+            open_teams = np.flatnonzero((state.sizes < state.capacity) & (state.capacity == preferred))
+            if len(open_teams):
+                gains = state.gains(open_teams, profile)
+                open_teams = open_teams[np.argsort(-gains, kind='stable')][:CLAIM_ATTEMPTS]
+            candidates = [(int(t), int(state.team_ids[t]), int(state.capacity[t])) for t in open_teams]
+
+        for t, team_id, capacity in candidates:
+            if self._claim(participant, team_id, capacity):
+                return self._joined(state, t, profile, JOINED)
+            with self._lock:
+                state.sizes[t] = state.capacity[t]  # Filled by another worker
+
+        number = db.session.execute(
+            select(func.count(Team.id)).where(Team.event_id == event_id)).scalar() + 1
+        team = Team(event_id=event_id, name=f"Team {number}", tech_stack=[])
+        db.session.add(team)
+        db.session.flush()
+        participant.team_id = team.id
+        with self._lock:
+            t = state.add_team(team.id, preferred)
+        return self._joined(state, t, profile, FOUNDED)
+
+    @staticmethod
+    def _claim(participant, team_id, capacity):
+        """Assign the participant if the team is still below capacity; False if it is full"""
+        from models import Participant
+
+        # Counted through the (event_id, team_id) index
+        members = (select(func.count(Participant.id))
+                   .where(Participant.event_id == participant.event_id,
+                          Participant.team_id == team_id).scalar_subquery())
+        result = db.session.execute(
+            update(Participant)
+            .where(Participant.id == participant.id, Participant.team_id.is_(None), members < capacity)
+            .values(team_id=team_id)
+            .execution_options(synchronize_session=False))
+        return result.rowcount == 1
+
+    def _joined(self, state, t, profile, result):
+        from models import Team
+
+        # Rows are only ever appended to a state, so ``t`` still names the team
+        with self._lock:
+            state.add(t, profile)
+            fields = state.team_fields(t)
+        team = db.session.get(Team, int(state.team_ids[t]))
+        for name, value in fields.items():
+            setattr(team, name, value)
+        self.placements.inc(result)
+        return team
+
+    def _start_rebalancer(self):
+        # Started on first placement, and again in each forked worker process
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, daemon=True, name='team-rebalancer').start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.rebalance_interval)
+            with self._lock:
+                events, self._placed = self._placed, set()
+            for event_id in events:
+                with self.app.app_context():
+                    try:
+                        self.rebalance(event_id)
+                        db.session.commit()
+                    except Exception as e:
+                        db.session.rollback()
+                        print(f"Team rebalance error for event {event_id}: {e}")
+
+    def rebalance(self, event_id, time_budget=2.0):
+        """Swap members between an event's equal-sized teams for balance; returns participants moved"""
+        from models import Participant, Team
+
+        snapshot = snapshot_store.event_snapshot(event_id)
+        team_rows = snapshot.team_rows()
+        if len(team_rows) < 2:
+            return 0
+
+        teams = [{'participant_ids': snapshot.ids[rows].tolist()} for rows in team_rows.values()]
+        refined = TeamMatcher().refine_teams(teams, snapshot, keep_sizes=True,
+                                             time_budget=time_budget)
+
+        moves = []
+        for team_id, before, after in zip(team_rows, teams, refined):
+            joined = set(after['participant_ids']) - set(before['participant_ids'])
+            if joined:
+                moves.extend({'id': pid, 'team_id': team_id} for pid in joined)
+                team = db.session.get(Team, team_id)
+                team.balance_score = after['balance_score']
+                team.tech_stack = after['suggested_tech_stack']
+                team.description = after['description']
+        if moves:
+            db.session.execute(update(Participant), moves)
+
+        with self._lock:
+            self._states.pop(event_id, None)
+        self.rebalance_moves.inc(amount=len(moves))
+        return len(moves)
+
+    def metric_lines(self):
+        return self.placements.render() + self.rebalance_moves.render()
+
+
+# Global streaming assigner
+streaming_assigner = StreamingAssigner()
@@ -1,12 +1,342 @@
+import math
+import os
+import time
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import TfidfVectorizer, TfidfTransformer
 from sklearn.cluster import KMeans
 import random
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from participant_snapshot import EXPERIENCE_SCORES
+from instrumentation import timed
+
+# Skills suggested per team
+TECH_STACK_SIZE = 5
+
+
+# Arrays attached from shared memory inside optimisation worker processes
+_worker_arrays = {}
+_worker_segments = []
+
+
+def _attach_shared_arrays(specs):
+    """Process pool initializer: map the parent's arrays without copying them"""
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)  # One BLAS/OpenMP thread per worker process
+    except ImportError:
+        pass
+
+    for name, (segment_name, shape, dtype) in specs.items():
+        segment = shared_memory.SharedMemory(name=segment_name)
+        _worker_segments.append(segment)
+        _worker_arrays[name] = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+
+def _run_restart(restart_index, seed, num_teams, target_size):
+    """Run one randomised clustering restart inside a worker process"""
+    arrays = _worker_arrays
+    rng = np.random.default_rng([seed, restart_index])
+    kmeans = KMeans(n_clusters=num_teams,
+                    random_state=int(rng.integers(2**31 - 1)),
+                    n_init=1)
+    labels = kmeans.fit_predict(arrays['features'])
+    labels = _balance_labels(labels, num_teams, target_size)
+    score = _total_balance_score(labels, num_teams, arrays['roles'],
+                                 arrays['experience'], arrays['skill_indptr'],
+                                 arrays['skill_indices'], arrays['skill_counts'])
+    return score, restart_index, labels
+
+
+def _balance_labels(labels, num_teams, target_size):
+    """Array form of TeamMatcher._balance_teams, applied to cluster labels"""
+    labels = np.asarray(labels).copy()
+    members = [list(np.flatnonzero(labels == t)) for t in range(num_teams)]
+    order = sorted(range(num_teams), key=lambda t: len(members[t]))
+
+    for current, following in zip(order, order[1:]):
+        current_size = len(members[current])
+        next_size = len(members[following])
+        if next_size - current_size > 1 and next_size > target_size:
+            moved = members[following].pop()
+            members[current].append(moved)
+            labels[moved] = current
+
+    return labels
+
+
+def _rows_balance_score(rows, roles, experience, skill_indptr, skill_indices, skill_counts):
+    """Balance score of the participants at ``rows`` of the given columns"""
+    if len(rows) == 0:
+        return 0.0
+
+    # Role diversity score (0-1)
+    role_diversity = min(len(np.unique(roles[rows])) / min(4, len(rows)), 1.0)
+
+    # Experience diversity score (0-1)
+    experiences = experience[rows].astype(np.float64)
+    if len(np.unique(experiences)) > 1:
+        exp_diversity = float(np.std(experiences)) / experiences.max()
+    else:
+        exp_diversity = 0.5  # Neutral score for same experience level
+
+    # Skill complementarity score (0-1): distinct skills over skills listed
+    spans = [np.arange(skill_indptr[r], skill_indptr[r + 1]) for r in rows]
+    positions = np.concatenate(spans) if spans else np.empty(0, dtype=np.int64)
+    total_skills = int(skill_counts[positions].sum())
+    if total_skills > 0:
+        skill_diversity = len(np.unique(skill_indices[positions])) / total_skills
+    else:
+        skill_diversity = 0
+
+    return round(role_diversity * 0.4 + exp_diversity * 0.3 +
+                 skill_diversity * 0.3, 3)
+
+
+def _total_balance_score(labels, num_teams, roles, experience, skill_indptr, skill_indices,
+                         skill_counts):
+    """Sum of per-team balance scores for a labelling"""
+    skills = csr_matrix((skill_counts, skill_indices, skill_indptr),
+                        shape=(len(roles), int(skill_indices.max(initial=-1)) + 1))
+    scores = team_balance_scores(labels, num_teams, roles, experience, skills)
+    return float(np.round(scores, 3).sum())
+
+
+def _balance_from_tallies(size, distinct_roles, level_counts, exp_sum, exp_sumsq,
+                          unique_skills, total_skills):
+    """Unrounded _calculate_balance_score computed from running tallies"""
+    if size <= 0:
+        return 0.0
+
+    role_diversity = min(distinct_roles / min(4, size), 1.0)
+
+    # Experience scores are 1-3; level_counts[score] counts members at each
+    if (level_counts[1] > 0) + (level_counts[2] > 0) + (level_counts[3] > 0) > 1:
+        highest = 3 if level_counts[3] > 0 else 2
+        mean = exp_sum / size
+        exp_diversity = math.sqrt(max(exp_sumsq / size - mean * mean, 0.0)) / highest
+    else:
+        exp_diversity = 0.5
+
+    skill_diversity = unique_skills / total_skills if total_skills > 0 else 0
+
+    return role_diversity * 0.4 + exp_diversity * 0.3 + skill_diversity * 0.3
+
+
+def balance_scores(sizes, distinct_roles, level_counts, exp_sum, exp_sumsq, unique_skills,
+                   skill_totals):
+    """
+    _balance_from_tallies for many teams at once: every argument has one
+    entry per team, and level_counts is (teams, 4) indexed by experience score.
+    """
+    sizes = np.asarray(sizes, dtype=np.float64)
+    level_counts = np.asarray(level_counts)
+    members = np.maximum(sizes, 1)
+
+    role_diversity = np.minimum(distinct_roles / np.minimum(4, members), 1.0)
+
+    mixed = np.count_nonzero(level_counts[:, 1:4] > 0, axis=1) > 1
+    highest = np.where(level_counts[:, 3] > 0, 3, 2)
+    mean = exp_sum / members
+    spread = np.sqrt(np.maximum(exp_sumsq / members - mean * mean, 0.0)) / highest
+    exp_diversity = np.where(mixed, spread, 0.5)
+
+    skill_totals = np.asarray(skill_totals, dtype=np.float64)
+    skill_diversity = np.divide(unique_skills, skill_totals, out=np.zeros(len(sizes)),
+                                where=skill_totals > 0)
+
+    scores = role_diversity * 0.4 + exp_diversity * 0.3 + skill_diversity * 0.3
+    return np.where(sizes > 0, scores, 0.0)
+
+
+def team_balance_scores(labels, num_teams, roles, experience, skills):
+    """
+    Unrounded balance score of every team of a labelling, in one pass.
+
+    ``labels[i]`` is row i's team (0 to num_teams - 1, or -1 for none);
+    ``roles``, ``experience`` and ``skills`` are snapshot columns. Each
+    tally is one sparse team-membership product over all teams instead of
+    a per-team loop, and balance_scores scores them together.
+    """
+    labels = np.asarray(labels)
+    rows = np.flatnonzero(labels >= 0)
+    teams = labels[rows]
+    membership = csr_matrix((np.ones(len(rows)), (teams, rows)),
+                            shape=(num_teams, len(labels)))
+
+    def one_hot(codes, width):
+        return csr_matrix((np.ones(len(codes)), (np.arange(len(codes)), codes)),
+                          shape=(len(codes), width))
+
+    role_counts = membership @ one_hot(roles, int(roles.max(initial=0)) + 1)
+    level_counts = (membership @ one_hot(experience, 4)).toarray()
+    experience = experience.astype(np.float64)
+    team_skills = membership @ skills
+
+    return balance_scores(
+        np.bincount(teams, minlength=num_teams),
+        role_counts.getnnz(axis=1),
+        level_counts,
+        membership @ experience,
+        membership @ (experience * experience),
+        team_skills.getnnz(axis=1),
+        np.asarray(team_skills.sum(axis=1)).ravel())
+
+
+def plan_team_sizes(preferences, min_size, max_size):
+    """
+    Team sizes, in ascending order, for participants with the given
+    preferred team sizes, every size within [min_size, max_size].
+
+    Preferences are clamped to the bounds. For a given mix of sizes the
+    best placement pairs participants sorted by preference with team
+    slots sorted by size, at a cost of sum |preferred - actual|, so the
+    mix is chosen by dynamic programming over (largest size used,
+    participants placed): adding a team of size s places the next s
+    participants in that order. This finds the cheapest mix exactly in
+    O(participants x sizes). Everyone is placed unless no mix within the
+    bounds adds up to the number of participants; then as many as
+    possible are, leaving out those who prefer the largest teams.
+    """
+    preferences = np.sort(np.clip(np.asarray(preferences, dtype=np.int64), min_size, max_size))
+    count = len(preferences)
+    if count < min_size:
+        return []
+
+    # Least cost of placing the first t participants, using the sizes seen so far
+    best = np.full(count + 1, np.inf)
+    best[0] = 0.0
+    added = {}  # size -> teams of that size in the best plan for each t
+    for size in range(min_size, max_size + 1):
+        misfit = np.concatenate([[0], np.cumsum(np.abs(preferences - size))])
+        teams = np.zeros(count + 1, dtype=np.int64)
+        # A team of this size moves t to t + size, so each residue of t is a
+        # chain where the best plan is a running minimum
+        for first in range(min(size, count + 1)):
+            placed = np.arange(first, count + 1, size)
+            step = np.zeros(len(placed))
+            step[1:] = misfit[placed[1:]] - misfit[placed[1:] - size]
+            total = np.cumsum(step)
+            start_cost = best[placed] - total
+            running = np.minimum.accumulate(start_cost)
+            position = np.arange(len(placed))
+            started = np.maximum.accumulate(np.where(start_cost == running, position, 0))
+            best[placed] = running + total
+            teams[placed] = position - started
+        added[size] = teams
+
+    placed = int(np.flatnonzero(np.isfinite(best))[-1])
+    sizes = []
+    for size in range(max_size, min_size - 1, -1):
+        teams = int(added[size][placed])
+        sizes.extend([size] * teams)
+        placed -= teams * size
+    return sorted(sizes)
+
+
+class TeamAggregates:
+    """
+    Running role, experience and skill tallies for one team.
+
+    Members are profiles of the form (role code, experience score,
+    {skill id: count}, skill total), as ParticipantSnapshot.profile
+    returns. Adding, removing or scoring a hypothetical change costs
+    O(skills of the members involved), independent of the team's size.
+    """
+
+    def __init__(self, profiles=()):
+        self.size = 0
+        self.role_counts = {}
+        self.distinct_roles = 0
+        self.level_counts = [0, 0, 0, 0]  # Indexed by experience score (1-3)
+        self.exp_sum = 0
+        self.exp_sumsq = 0
+        self.skill_counts = {}
+        self.unique_skills = 0
+        self.skill_total = 0
+        for profile in profiles:
+            self.add(profile)
+
+    def add(self, profile):
+        self._apply(profile, 1)
+
+    def remove(self, profile):
+        self._apply(profile, -1)
+
+    def _apply(self, profile, sign):
+        role, experience, skills, skill_total = profile
+        self.size += sign
+
+        old = self.role_counts.get(role, 0)
+        self.role_counts[role] = old + sign
+        self.distinct_roles += (old + sign > 0) - (old > 0)
+
+        self.level_counts[experience] += sign
+        self.exp_sum += sign * experience
+        self.exp_sumsq += sign * experience * experience
+
+        for skill, count in skills.items():
+            old = self.skill_counts.get(skill, 0)
+            self.skill_counts[skill] = old + sign * count
+            self.unique_skills += (old + sign * count > 0) - (old > 0)
+        self.skill_total += sign * skill_total
+
+    def score(self):
+        return _balance_from_tallies(self.size, self.distinct_roles, self.level_counts,
+                                     self.exp_sum, self.exp_sumsq,
+                                     self.unique_skills, self.skill_total)
+
+    def score_with(self, add=None, remove=None):
+        """Score the team as if ``add`` joined and ``remove`` left, without changing it"""
+        size = self.size
+        distinct_roles = self.distinct_roles
+        level_counts = list(self.level_counts)
+        exp_sum, exp_sumsq = self.exp_sum, self.exp_sumsq
+        unique_skills, skill_total = self.unique_skills, self.skill_total
+        role_counts = self.role_counts
+        skill_counts = self.skill_counts
+        add_skills = add[2] if add is not None else {}
+        remove_skills = remove[2] if remove is not None else {}
+
+        if remove is not None:
+            role, experience, skills, total = remove
+            size -= 1
+            level_counts[experience] -= 1
+            exp_sum -= experience
+            exp_sumsq -= experience * experience
+            skill_total -= total
+            if role_counts.get(role, 0) == 1 and (add is None or add[0] != role):
+                distinct_roles -= 1
+            for skill, count in skills.items():
+                old = skill_counts.get(skill, 0)
+                if old == count and skill not in add_skills:
+                    unique_skills -= 1
+
+        if add is not None:
+            role, experience, skills, total = add
+            size += 1
+            level_counts[experience] += 1
+            exp_sum += experience
+            exp_sumsq += experience * experience
+            skill_total += total
+            if role_counts.get(role, 0) == 0:
+                distinct_roles += 1
+            for skill in skills:
+                if skill not in remove_skills and skill_counts.get(skill, 0) == 0:
+                    unique_skills += 1
+
+        return _balance_from_tallies(size, distinct_roles, level_counts, exp_sum, exp_sumsq,
+                                     unique_skills, skill_total)
 
 
 class TeamMatcher:
+    """
+    Team formation over ParticipantSnapshot columns.
+
+    Participants are addressed by snapshot row; generated team data refers
+    to them by participant id.
+    """
 
     def __init__(self):
         self.role_weights = {
@@ -19,104 +349,346 @@ class TeamMatcher:
             ['Digital Marketing', 'Growth Hacker', 'Content Creator']
         }
 
-        self.experience_scores = {
-            'Beginner': 1,
-            'Intermediate': 2,
-            'Advanced': 3
-        }
+        self.experience_scores = EXPERIENCE_SCORES
 
-    def create_balanced_teams(self, participants, target_team_size=4):
+    def create_balanced_teams(self, snapshot, target_team_size=4, refine=True):
         """
         Create balanced teams using clustering and optimization algorithms
         """
-        if len(participants) < 2:
+        if len(snapshot) < 2:
             return []
 
         # Convert participants to feature vectors
-        feature_matrix = self._create_feature_matrix(participants)
+        with timed('matcher.features'):
+            feature_matrix = self._create_feature_matrix(snapshot)
 
         # Determine optimal number of teams
-        num_teams = max(1, len(participants) // target_team_size)
+        num_teams = max(1, len(snapshot) // target_team_size)
 
         # Use K-means clustering for initial grouping
-        if len(participants) > num_teams:
-            kmeans = KMeans(n_clusters=num_teams,
-                            random_state=42,
-                            n_init='auto')
-            cluster_labels = kmeans.fit_predict(feature_matrix)
+        with timed('matcher.clustering'):
+            if len(snapshot) > num_teams:
+                kmeans = KMeans(n_clusters=num_teams,
+                                random_state=42,
+                                n_init='auto')
+                cluster_labels = kmeans.fit_predict(feature_matrix)
+            else:
+                # If we have fewer participants than desired teams, put everyone in one team
+                cluster_labels = np.zeros(len(snapshot), dtype=np.int64)
+                num_teams = 1
+
+        with timed('matcher.balancing'):
+            teams = self._teams_from_labels(snapshot, cluster_labels, num_teams)
+
+            # Balance teams by redistributing if necessary
+            teams = self._balance_teams(teams, target_team_size)
+
+        # Improve balance with swaps and moves between teams
+        if refine:
+            with timed('matcher.refine'):
+                teams = self.refine_teams(teams, snapshot,
+                                          max_size=target_team_size + 1)
         else:
-            # If we have fewer participants than desired teams, put everyone in one team
-            cluster_labels = [0] * len(participants)
-            num_teams = 1
-
-        # Group participants by cluster
-        teams = []
-        for cluster_id in range(num_teams):
-            cluster_participants = [
-                participants[i] for i in range(len(participants))
-                if cluster_labels[i] == cluster_id
-            ]
-
-            if cluster_participants:
-                team_data = self._create_team_data(cluster_participants,
-                                                   len(teams) + 1)
-                teams.append(team_data)
-
-        # Balance teams by redistributing if necessary
-        teams = self._balance_teams(teams, target_team_size)
+            # _balance_teams moved members without rescoring
+            self.score_teams(snapshot, teams)
 
         return teams
 
-    def _create_feature_matrix(self, participants):
+    def create_capacitated_teams(self, snapshot, min_size=2, max_size=6, refine=True,
+                                 time_budget=None):
+        """
+        Create teams sized by participants' preferred_team_size, never
+        smaller than ``min_size`` or larger than ``max_size``.
+
+        plan_team_sizes picks the mix of team sizes that minimises the
+        total |preferred - actual| size, and participants fill those slots
+        in preference order, which is the placement that cost assumes.
+        Within each run of equal-sized teams members are dealt round-robin
+        in (role, experience) order, so roles and levels spread across
+        teams, and refine_teams then swaps members between teams of the
+        same size for balance, which keeps every size as planned.
+        Participants who cannot be placed without breaking the bounds stay
+        unassigned.
+        """
+        sizes = plan_team_sizes(snapshot.preferred_team_size, min_size, max_size)
+        if not sizes:
+            return []
+
+        with timed('matcher.assignment'):
+            preferred = np.clip(snapshot.preferred_team_size, min_size, max_size)
+            order = np.lexsort((snapshot.experience, snapshot.role_codes, preferred))
+
+            members = []
+            start = 0
+            sizes = np.array(sizes)
+            for size in np.unique(sizes):
+                count = int(np.count_nonzero(sizes == size))
+                block = order[start:start + size * count]
+                start += size * count
+                block = block[np.lexsort((snapshot.experience[block], snapshot.role_codes[block]))]
+                members.extend(block[t::count] for t in range(count))
+
+        if refine and len(members) > 1:
+            with timed('matcher.refine'):
+                return self.refine_teams(
+                    [{'participant_ids': snapshot.ids[rows].tolist()} for rows in members],
+                    snapshot, keep_sizes=True, time_budget=time_budget)
+
+        return self._create_teams_data(snapshot, members)
+
+    def _teams_from_labels(self, snapshot, labels, num_teams):
+        """Team data for each non-empty cluster, numbered in cluster order"""
+        labels = np.asarray(labels)
+        order = np.argsort(labels, kind='stable')
+        bounds = np.searchsorted(labels[order], np.arange(num_teams + 1))
+
+        members = [order[bounds[cluster_id]:bounds[cluster_id + 1]]
+                   for cluster_id in range(num_teams)]
+        return self._create_teams_data(snapshot, [rows for rows in members if len(rows)])
+
+    def optimise_teams(self,
+                       snapshot,
+                       target_team_size=4,
+                       restarts=32,
+                       workers=None,
+                       time_budget=None,
+                       seed=42):
+        """
+        Search many randomised clusterings in parallel and keep the most balanced.
+
+        Restarts are dispatched in rounds of ``workers`` tasks to a process
+        pool that maps the feature arrays from shared memory instead of
+        receiving a pickled copy per task. All ``restarts`` run; each is
+        seeded from (seed, restart index) and ties go to the lowest index,
+        so a given seed always yields the same teams, whatever the worker
+        count.
+
+        ``time_budget`` (seconds) is opt-in: with it no new round starts
+        once the budget is spent, which makes the result depend on machine
+        speed and load, so it is not reproducible.
+        """
+        if len(snapshot) < 2:
+            return []
+
+        num_teams = max(1, len(snapshot) // target_team_size)
+        if len(snapshot) <= num_teams or num_teams == 1:
+            return self.create_balanced_teams(snapshot, target_team_size)
+
+        workers = workers or os.cpu_count() or 1
+        with timed('matcher.features'):
+            features = self._create_feature_matrix(snapshot)
+        arrays = {
+            'features': features,
+            'roles': snapshot.role_codes,
+            'experience': snapshot.experience,
+            'skill_indptr': snapshot.skills.indptr,
+            'skill_indices': snapshot.skills.indices,
+            'skill_counts': snapshot.skills.data,
+        }
+
+        segments = []
+        specs = {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                segments.append(segment)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+                specs[name] = (segment.name, array.shape, array.dtype.str)
+
+            best = None
+            started = time.monotonic()
+            with timed('matcher.search'), ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_attach_shared_arrays,
+                                     initargs=(specs,)) as pool:
+                for round_start in range(0, restarts, workers):
+                    if (time_budget is not None and best is not None
+                            and time.monotonic() - started > time_budget):
+                        break
+                    futures = [
+                        pool.submit(_run_restart, index, seed, num_teams, target_team_size)
+                        for index in range(round_start, min(round_start + workers, restarts))
+                    ]
+                    for future in futures:
+                        score, index, labels = future.result()
+                        if best is None or score > best[0]:
+                            best = (score, index, labels)
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+        teams = self._teams_from_labels(snapshot, best[2], num_teams)
+        with timed('matcher.refine'):
+            return self.refine_teams(teams, snapshot, max_size=target_team_size + 1)
+
+    def refine_teams(self,
+                     teams,
+                     snapshot,
+                     min_size=2,
+                     max_size=None,
+                     candidates=4,
+                     max_passes=20,
+                     tolerance=0.01,
+                     time_budget=None,
+                     seed=42,
+                     keep_sizes=False):
+        """
+        Local search over pairwise swaps and single moves between teams.
+
+        Each team keeps a TeamAggregates tally, so evaluating a swap or move
+        is an O(1) delta on role counts, skill multiset counts and experience
+        sums rather than a rescore of the whole team. Every pass visits each
+        participant once (in seeded random order), tries ``candidates``
+        random other teams (and up to ``candidates`` swap partners in each)
+        and applies the best improving swap or move.
+        Moves must keep both teams within [min_size, max_size]; swaps never
+        change sizes. With ``keep_sizes`` there are no moves and members are
+        only swapped between teams of the same size, so every team keeps its
+        size and members keep the size they were placed by.
+        This is an early-stopping heuristic, not a search to a local
+        optimum: it stops once a pass raises the total score by less than
+        ``tolerance`` of itself, or after ``max_passes``, and improving
+        moves may remain (each pass only samples candidates). With
+        ``tolerance=0`` it runs until a pass applies no move, which is
+        still only optimal over the sampled candidates and takes several
+        times longer (about 2 minutes instead of 5 seconds on 10k
+        participants). The result depends only on the input and ``seed``;
+        an optional ``time_budget`` in seconds also stops it early, at the
+        cost of reproducibility.
+        Team data is rebuilt for the final membership.
+        """
+        if len(teams) < 2:
+            return teams
+
+        rows = {pid: snapshot.index_of(pid)
+                for team in teams for pid in team['participant_ids']}
+        profiles = {pid: snapshot.profile(row) for pid, row in rows.items()}
+        members = [list(team['participant_ids']) for team in teams]
+        assignment = {pid: t for t, team_members in enumerate(members) for pid in team_members}
+        tallies = [TeamAggregates(profiles[pid] for pid in team_members)
+                   for team_members in members]
+        scores = [tally.score() for tally in tallies]
+        max_size = max_size or max(len(team_members) for team_members in members)
+
+        rng = random.Random(seed)
+        order = sorted(assignment)
+        # Teams each team may exchange members with
+        if keep_sizes:
+            by_size = {}
+            for t, team_members in enumerate(members):
+                by_size.setdefault(len(team_members), []).append(t)
+            peers = [by_size[len(team_members)] for team_members in members]
+        else:
+            peers = [range(len(teams))] * len(teams)
+        started = time.monotonic()
+
+        for _ in range(max_passes):
+            pass_gain = 0.0
+            rng.shuffle(order)
+            for pid in order:
+                a = assignment[pid]
+                profile = profiles[pid]
+                tally_a = tallies[a]
+                best_gain, best_move = 1e-9, None
+
+                for b in rng.sample(peers[a], min(candidates, len(peers[a]))):
+                    if b == a:
+                        continue
+                    tally_b = tallies[b]
+                    current = scores[a] + scores[b]
+
+                    if not keep_sizes and tally_a.size - 1 >= min_size and tally_b.size + 1 <= max_size:
+                        gain = (tally_a.score_with(remove=profile) +
+                                tally_b.score_with(add=profile) - current)
+                        if gain > best_gain:
+                            best_gain, best_move = gain, (b, None)
+
+                    partners = members[b]
+                    if len(partners) > candidates:
+                        partners = rng.sample(partners, candidates)
+                    for other in partners:
+                        other_profile = profiles[other]
+                        gain = (tally_a.score_with(add=other_profile, remove=profile) +
+                                tally_b.score_with(add=profile, remove=other_profile) - current)
+                        if gain > best_gain:
+                            best_gain, best_move = gain, (b, other)
+
+                if best_move is None:
+                    continue
+
+                b, other = best_move
+                tallies[a].remove(profile)
+                tallies[b].add(profile)
+                members[a].remove(pid)
+                members[b].append(pid)
+                assignment[pid] = b
+                if other is not None:
+                    tallies[b].remove(profiles[other])
+                    tallies[a].add(profiles[other])
+                    members[b].remove(other)
+                    members[a].append(other)
+                    assignment[other] = a
+                scores[a] = tallies[a].score()
+                scores[b] = tallies[b].score()
+                pass_gain += best_gain
+
+            if pass_gain <= tolerance * sum(scores):
+                break
+            if time_budget is not None and time.monotonic() - started > time_budget:
+                break
+
+        kept = [t for t, team_members in enumerate(members) if team_members]
+        return self._create_teams_data(
+            snapshot, [np.array([rows[pid] for pid in members[t]]) for t in kept],
+            balance_scores=[round(scores[t], 3) for t in kept])
+
+    def _create_feature_matrix(self, snapshot):
         """
         Create feature matrix for participants using skills, role, and experience
         """
-        # Combine all skills and interests for TF-IDF
-        text_features = []
-        role_features = []
-        experience_features = []
-
-        for participant in participants:
-            # Text features from skills and interests
-            skills_text = ' '.join(
-                participant.skills) if participant.skills else ''
-            interests_text = ' '.join(
-                participant.interests) if participant.interests else ''
-            combined_text = f"{skills_text} {interests_text}"
-            text_features.append(combined_text)
-
-            # Role features (one-hot encoded)
-            role_features.append(participant.role)
-
-            # Experience features (numerical)
-            experience_features.append(
-                self.experience_scores.get(participant.experience_level, 1))
-
-        # Create TF-IDF vectors for skills and interests
-        if any(text_features):
-            vectorizer = TfidfVectorizer(max_features=50, stop_words='english')
-            try:
-                sparse_matrix = vectorizer.fit_transform(text_features)
-                # Convert sparse matrix to dense numpy array
-                from scipy.sparse import issparse
-                if issparse(sparse_matrix):
-                    text_vectors = sparse_matrix.toarray()
-                else:
-                    text_vectors = np.array(sparse_matrix)
-            except Exception:
-                text_vectors = np.zeros((len(participants), 1))
+        # TF-IDF over the words of each participant's skills and interests.
+        # Each distinct skill/interest string is tokenised once, then
+        # participant word counts are a sparse product with those tokens.
+        analyzer = TfidfVectorizer(stop_words='english').build_analyzer()
+        term_ids = {}
+
+        def token_matrix(names):
+            indptr, indices = [0], []
+            for name in names:
+                for token in analyzer(name):
+                    indices.append(term_ids.setdefault(token, len(term_ids)))
+                indptr.append(len(indices))
+            return indptr, indices
+
+        skill_tokens = token_matrix(snapshot.skill_names)
+        interest_tokens = token_matrix(snapshot.interest_names)
+
+        if term_ids:
+            def as_csr(tokens, rows):
+                indptr, indices = tokens
+                return csr_matrix((np.ones(len(indices)), indices, indptr),
+                                  shape=(rows, len(term_ids)))
+
+            counts = (snapshot.skills @ as_csr(skill_tokens, len(snapshot.skill_names)) +
+                      snapshot.interests @ as_csr(interest_tokens, len(snapshot.interest_names)))
+            counts = csr_matrix(counts)
+
+            # Keep the 50 most frequent terms, as TfidfVectorizer(max_features=50) does
+            frequencies = np.asarray(counts.sum(axis=0)).ravel()
+            if len(frequencies) > 50:
+                keep = np.sort(np.argsort(-frequencies, kind='stable')[:50])
+                counts = counts[:, keep]
+            text_vectors = TfidfTransformer().fit_transform(counts).toarray()
         else:
-            text_vectors = np.zeros((len(participants), 1))
+            text_vectors = np.zeros((len(snapshot), 1))
 
         # Create role vectors (simple one-hot)
-        unique_roles = list(set(role_features))
-        role_vectors = np.zeros((len(participants), len(unique_roles)))
-        for i, role in enumerate(role_features):
-            if role in unique_roles:
-                role_vectors[i, unique_roles.index(role)] = 1
+        role_vectors = np.zeros((len(snapshot), len(snapshot.role_names)))
+        role_vectors[np.arange(len(snapshot)), snapshot.role_codes] = 1
 
         # Combine all features
-        experience_vectors = np.array(experience_features).reshape(-1, 1)
+        experience_vectors = snapshot.experience.astype(np.float64).reshape(-1, 1)
 
         # Normalize experience to 0-1 range
         if experience_vectors.max() > experience_vectors.min():
@@ -129,85 +701,101 @@ class TeamMatcher:
 
         return feature_matrix
 
-    def _create_team_data(self, participants, team_number):
+    def _create_teams_data(self, snapshot, members, balance_scores=None):
         """
-        Create team data structure with balance metrics
+        Create team data structures with balance metrics for several teams,
+        numbered from 1 in the order given.
+
+        ``members`` holds one array of snapshot rows per non-empty team, and
+        no row may be in two teams. Skill counts for all teams come from one
+        team-membership x skill sparse product. A single sort of its entries
+        (by team, count descending, then skill) ranks every team's skills,
+        so picking the tech stacks needs no loop over teams. Balance scores
+        are computed in one batched pass unless the caller already tracks
+        them.
         """
-        # Calculate balance score
-        balance_score = self._calculate_balance_score(participants)
-
-        # Generate team name
-        roles = list(set([p.role for p in participants]))
-        team_name = f"Team {team_number}"
-        if len(roles) <= 2:
-            team_name = f"Team {roles[0][:4]}{team_number}"
-
-        # Collect all skills for tech stack suggestion
-        all_skills = []
-        for p in participants:
-            all_skills.extend(p.skills if p.skills else [])
-
-        # Get most common skills as suggested tech stack
-        skill_counts = defaultdict(int)
-        for skill in all_skills:
-            skill_counts[skill] += 1
-
-        suggested_tech_stack = sorted(skill_counts.keys(),
-                                      key=lambda x: skill_counts[x],
-                                      reverse=True)[:5]
-
-        # Create description
-        role_summary = ", ".join(list(set([p.role for p in participants])))
-        description = f"A diverse team of {len(participants)} members with roles in {role_summary}."
-
-        return {
-            'name': team_name,
-            'description': description,
-            'participant_ids': [p.id for p in participants],
-            'balance_score': balance_score,
-            'suggested_tech_stack': suggested_tech_stack
-        }
+        num_teams = len(members)
+        sizes = np.array([len(rows) for rows in members], dtype=np.int64)
+        rows = np.concatenate(members).astype(np.int64) if members else np.empty(0, np.int64)
+        teams = np.repeat(np.arange(num_teams), sizes)
+
+        if balance_scores is None:
+            labels = np.full(len(snapshot), -1, dtype=np.int64)
+            labels[rows] = teams
+            balance_scores = np.round(team_balance_scores(
+                labels, num_teams, snapshot.role_codes, snapshot.experience,
+                snapshot.skills), 3).tolist()
+
+        # Most common skills per team as the suggested tech stack
+        membership = csr_matrix((np.ones(len(rows)), (teams, rows)),
+                                shape=(num_teams, len(snapshot)))
+        team_skills = csr_matrix(membership @ snapshot.skills)
+        entry_teams = np.repeat(np.arange(num_teams), np.diff(team_skills.indptr))
+        ranked = np.lexsort((team_skills.indices, -team_skills.data, entry_teams))
+        top = ranked[np.arange(len(ranked)) - team_skills.indptr[entry_teams[ranked]]
+                     < TECH_STACK_SIZE]
+        stack_bounds = np.searchsorted(entry_teams[top], np.arange(num_teams + 1)).tolist()
+        stack_skills = team_skills.indices[top].tolist()
+
+        # Each team's distinct roles in order of first appearance
+        member_roles = snapshot.role_codes[rows]
+        by_role = np.lexsort((np.arange(len(rows)), member_roles, teams))
+        first = np.ones(len(by_role), dtype=bool)
+        first[1:] = ((teams[by_role][1:] != teams[by_role][:-1]) |
+                     (member_roles[by_role][1:] != member_roles[by_role][:-1]))
+        firsts = np.sort(by_role[first])
+        role_bounds = np.searchsorted(teams[firsts], np.arange(num_teams + 1)).tolist()
+        team_roles = member_roles[firsts].tolist()
+
+        ids = snapshot.ids[rows].tolist()
+        member_bounds = np.concatenate([[0], np.cumsum(sizes)]).tolist()
+        sizes = sizes.tolist()
+
+        teams_data = []
+        for t in range(num_teams):
+            team_number = t + 1
+            roles = [snapshot.role_names[code]
+                     for code in team_roles[role_bounds[t]:role_bounds[t + 1]]]
+
+            # Generate team name
+            team_name = f"Team {team_number}"
+            if len(roles) <= 2:
+                team_name = f"Team {roles[0][:4]}{team_number}"
+
+            # Create description
+            role_summary = ", ".join(roles)
+            description = f"A diverse team of {sizes[t]} members with roles in {role_summary}."
+
+            teams_data.append({
+                'name': team_name,
+                'description': description,
+                'participant_ids': ids[member_bounds[t]:member_bounds[t + 1]],
+                'balance_score': balance_scores[t],
+                'suggested_tech_stack': [snapshot.skill_names[code] for code in
+                                         stack_skills[stack_bounds[t]:stack_bounds[t + 1]]]
+            })
+        return teams_data
+
+    def score_teams(self, snapshot, teams):
+        """Set every team's balance_score from its current participant_ids, in one pass"""
+        if not teams:
+            return teams
+        labels = np.full(len(snapshot), -1, dtype=np.int64)
+        for t, team in enumerate(teams):
+            labels[snapshot.rows_for(team['participant_ids'])] = t
+        scores = team_balance_scores(labels, len(teams), snapshot.role_codes,
+                                     snapshot.experience, snapshot.skills)
+        for team, score in zip(teams, np.round(scores, 3).tolist()):
+            team['balance_score'] = score
+        return teams
 
-    def _calculate_balance_score(self, participants):
+    def _calculate_balance_score(self, snapshot, rows):
         """
         Calculate team balance score based on role diversity, experience mix, and skill overlap
         """
-        if not participants:
-            return 0.0
-
-        # Role diversity score (0-1)
-        unique_roles = set([p.role for p in participants])
-        role_diversity = min(
-            len(unique_roles) / min(4, len(participants)), 1.0)
-
-        # Experience diversity score (0-1)
-        experiences = [
-            self.experience_scores.get(p.experience_level, 1)
-            for p in participants
-        ]
-        if len(set(experiences)) > 1:
-            exp_diversity = float(np.std(experiences)) / max(
-                experiences) if max(experiences) > 0 else 0
-        else:
-            exp_diversity = 0.5  # Neutral score for same experience level
-
-        # Skill complementarity score (0-1)
-        all_skills = []
-        for p in participants:
-            all_skills.extend(p.skills if p.skills else [])
-
-        if all_skills:
-            unique_skills = len(set(all_skills))
-            total_skills = len(all_skills)
-            skill_diversity = unique_skills / total_skills if total_skills > 0 else 0
-        else:
-            skill_diversity = 0
-
-        # Combine scores with weights
-        balance_score = (role_diversity * 0.4 + exp_diversity * 0.3 +
-                         skill_diversity * 0.3)
-
-        return round(balance_score, 3)
+        skills = snapshot.skills
+        return _rows_balance_score(np.asarray(rows), snapshot.role_codes, snapshot.experience,
+                                   skills.indptr, skills.indices, skills.data)
 
     def _balance_teams(self, teams, target_size):
         """
@@ -233,57 +821,58 @@ class TeamMatcher:
                 moved_participant = next_team['participant_ids'].pop()
                 current_team['participant_ids'].append(moved_participant)
 
-                # Recalculate balance scores would require participant objects
-                # For simplicity, we'll keep the existing scores
-
         return teams
 
-    def suggest_team_for_participant(self, participant, existing_teams):
+    def suggest_team_for_participant(self, snapshot, row, team_rows):
         """
         Suggest the best team for a new participant to join
+
+        Args:
+            snapshot (ParticipantSnapshot): columns covering the participant and team members
+            row (int): the participant's snapshot row
+            team_rows (dict): team id -> array of member rows
+
+        Returns:
+            int: id of the best team, or None
         """
-        if not existing_teams:
+        if not team_rows:
             return None
 
         best_team = None
         best_score = -1
 
-        for team in existing_teams:
-            if len(team.participants) >= 5:  # Don't suggest overfull teams
+        for team_id, member_rows in team_rows.items():
+            if len(member_rows) >= 5:  # Don't suggest overfull teams
                 continue
 
             # Calculate compatibility score
             compatibility_score = self._calculate_team_compatibility(
-                participant, team.participants)
+                snapshot, row, member_rows)
 
             if compatibility_score > best_score:
                 best_score = compatibility_score
-                best_team = team
+                best_team = team_id
 
         return best_team
 
-    def _calculate_team_compatibility(self, participant, team_members):
+    def _calculate_team_compatibility(self, snapshot, row, member_rows):
         """
         Calculate how well a participant would fit with a team
         """
-        if not team_members:
+        if len(member_rows) == 0:
             return 1.0
 
         # Role complementarity
-        team_roles = set([member.role for member in team_members])
-        role_bonus = 0.3 if participant.role not in team_roles else 0.1
+        team_roles = snapshot.role_codes[member_rows]
+        role_bonus = 0.3 if snapshot.role_codes[row] not in team_roles else 0.1
 
         # Skill overlap (some overlap is good, but not too much)
-        participant_skills = set(
-            participant.skills) if participant.skills else set()
-        team_skills = set()
-        for member in team_members:
-            if member.skills:
-                team_skills.update(member.skills)
-
-        if participant_skills and team_skills:
-            overlap = len(participant_skills & team_skills)
-            total_unique = len(participant_skills | team_skills)
+        participant_skills = snapshot.skill_codes(row)
+        team_skills = snapshot.skills[member_rows].indices
+
+        if len(participant_skills) and len(team_skills):
+            overlap = len(np.intersect1d(participant_skills, team_skills))
+            total_unique = len(np.union1d(participant_skills, team_skills))
             skill_score = overlap / total_unique if total_unique > 0 else 0
             # Optimal overlap is around 30-50%
             if 0.3 <= skill_score <= 0.5:
@@ -296,15 +885,8 @@ class TeamMatcher:
             skill_bonus = 0.1
 
         # Experience balance
-        team_experiences = [
-            self.experience_scores.get(member.experience_level, 1)
-            for member in team_members
-        ]
-        participant_exp = self.experience_scores.get(
-            participant.experience_level, 1)
-
-        avg_team_exp = np.mean(team_experiences)
-        exp_diff = abs(participant_exp - avg_team_exp)
+        avg_team_exp = float(snapshot.experience[member_rows].mean())
+        exp_diff = abs(int(snapshot.experience[row]) - avg_team_exp)
         exp_bonus = max(0.1, 0.4 - float(exp_diff * 0.1))
 
         total_score = role_bonus + skill_bonus + exp_bonus
@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The app configures itself from the environment on import, so point it at a
+# scratch database and instance directory before anything imports it; the
+# data version counter and snapshots then never touch ./instance
+_db_dir = tempfile.mkdtemp(prefix='hackhub-tests-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'hackhub.db')
+os.environ['INSTANCE_PATH'] = os.path.join(_db_dir, 'instance')
+os.environ['RATE_LIMIT_ENABLED'] = '0'
+os.environ.setdefault('AI_CACHE_ENABLED', '0')
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app as flask_app
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+
+@pytest.fixture
+def db(app):
+    """The app's database, emptied before each test"""
+    from app import db as database
+    with app.app_context():
+        database.session.remove()
+        database.drop_all()
+        database.create_all()
+        yield database
+        database.session.remove()
+
+
+@pytest.fixture
+def client(app, db):
+    return app.test_client()
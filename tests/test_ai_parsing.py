@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+from ai_parsing import ParseStats, ProjectIdea, TeamSuggestion, extract_json, parse_model_list
+import ai_parsing
+
+IDEA = {'title': 'EcoTrack', 'description': 'Carbon tracker', 'tech_stack': ['React', 'Flask']}
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    stats = ParseStats()
+    monkeypatch.setattr(ai_parsing, 'parse_stats', stats)
+    return stats
+
+
+@pytest.mark.parametrize('text, expected, how', [
+    (json.dumps([IDEA]), [IDEA], 'clean'),
+    ('```json\n' + json.dumps([IDEA]) + '\n```', [IDEA], 'extracted'),
+    ('Here are some ideas [1]: ' + json.dumps({'ideas': [IDEA]}) + ' Enjoy!',
+     {'ideas': [IDEA]}, 'extracted'),
+    ('[' + json.dumps(IDEA) + ', {"title": "Half', [IDEA], 'partial'),
+    ('No JSON here at all.', None, None),
+    ('', None, None),
+])
+def test_extract_json(text, expected, how):
+    assert extract_json(text) == (expected, how)
+
+
+def test_parse_model_list_outcomes(stats):
+    assert [idea.title for idea in parse_model_list(json.dumps([IDEA]), ProjectIdea, 'ideas')] == ['EcoTrack']
+    assert parse_model_list(json.dumps({'ideas': [IDEA, {'description': 'no title'}]}),
+                            ProjectIdea, 'ideas')[0].title == 'EcoTrack'
+    assert parse_model_list('prose only', ProjectIdea, 'ideas') == []
+    assert len(parse_model_list('```\n' + json.dumps(IDEA) + '\n```', ProjectIdea, 'ideas')) == 1
+
+    assert stats.outcomes == {('ideas', 'clean'): 1, ('ideas', 'partial'): 1,
+                              ('ideas', 'failed'): 1, ('ideas', 'repaired'): 1}
+    assert stats.dropped == {'ideas': 1}
+
+
+def test_list_fields_accept_strings():
+    idea = ProjectIdea.model_validate({'title': 'X', 'tech_stack': 'React, Flask; Postgres'})
+    assert idea.tech_stack == ['React', 'Flask', 'Postgres']
+
+
+@pytest.mark.parametrize('raw, score', [
+    (85, 85), ('85%', 85), (0.85, 85), ('0.5', 50),
+    (1, 1), (1.0, 1), (0, 0), (None, 0), (150, 100), (-5, 0), ('n/a', 0),
+])
+def test_compatibility_score(raw, score):
+    suggestion = TeamSuggestion.model_validate({'members': ['Ada'], 'compatibility_score': raw})
+    assert suggestion.compatibility_score == pytest.approx(score)
+
+
+def test_local_fallback_is_not_a_failed_parse(stats, monkeypatch):
+    import ai_assistant
+    monkeypatch.setattr(ai_assistant, 'parse_stats', stats)
+    monkeypatch.setattr(ai_assistant.gemini_assistant, 'client', None)
+
+    def generate():
+        raise AssertionError('nothing to generate without Gemini')
+
+    assert ai_assistant._structured_list(generate, ProjectIdea, 'project_ideas') == []
+    assert stats.outcomes == {('project_ideas', 'fallback'): 1}
+    assert ai_assistant.project_ideas_for({}) == ai_assistant.FALLBACK_PROJECT_IDEAS
@@ -0,0 +1,45 @@
+from data_changes import _listeners
+from data_version import DataVersion, data_version
+from models import Participant
+
+
+def _participant(email):
+    return Participant(name='Ada', email=email, role='developer', skills=[], interests=[],
+                       experience_level='beginner', availability='full-time')
+
+
+def test_etag_names_the_counter(client, db):
+    # The first request creates the default event, which changes the version
+    client.get('/teams')
+    response = client.get('/teams')
+    etag = response.headers['ETag']
+    assert f'-{data_version.identity}-' in etag
+
+    assert client.get('/teams', headers={'If-None-Match': etag}).status_code == 304
+    # A tag from another node or database never matches
+    other = etag.replace(data_version.identity, 'elsewhere')
+    assert client.get('/teams', headers={'If-None-Match': other}).status_code == 200
+
+
+def test_database_store_is_shared_between_nodes(app, db):
+    app.config['DATA_VERSION_STORE'] = 'database'
+    nodes = [DataVersion(), DataVersion()]
+    try:
+        for node in nodes:
+            node.init_app(app)
+        assert nodes[0].identity == nodes[1].identity
+        before = nodes[1].current()[0]
+        commits = nodes[1].commits()
+
+        db.session.add(_participant('ada@example.com'))
+        db.session.commit()
+
+        # Each registered node bumps once per commit; both read the same row
+        assert nodes[0].current() == nodes[1].current()
+        assert nodes[1].current()[0] == before + 2
+        assert nodes[1].commits() == commits + 2
+    finally:
+        app.config['DATA_VERSION_STORE'] = 'file'
+        for node in nodes:
+            if node.bump in _listeners:
+                _listeners.remove(node.bump)
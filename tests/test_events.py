@@ -0,0 +1,66 @@
+from models import Event, Participant
+
+
+def test_unknown_event_is_not_found(client):
+    response = client.post('/generate-teams?event=no-such-event', json={})
+    assert response.status_code == 404
+
+    response = client.get('/api/team-stats?event=no-such-event')
+    assert response.status_code == 404
+
+
+def test_generate_teams_for_known_event(client, db):
+    event = Event(name='Spring', slug='spring')
+    db.session.add(event)
+    db.session.commit()
+
+    response = client.post('/generate-teams?event=spring', json={})
+    assert response.status_code == 200
+    assert response.get_json()['success'] is False  # no participants yet
+    assert Participant.query.count() == 0
+
+
+def test_upgrade_db_adopts_unscoped_rows(app, db):
+    from database import schema_is_current
+    db.session.add(Participant(name='Ada', email='ada@example.com', role='developer',
+                               skills=[], interests=[], experience_level='beginner',
+                               availability='full-time'))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['upgrade-db'])
+    assert result.exit_code == 0, result.output
+    assert schema_is_current()
+    participant = Participant.query.one()
+    assert participant.event.slug == 'main'
+
+
+def test_runtime_state_is_outside_the_repository(app):
+    from conftest import ROOT
+    assert not app.instance_path.startswith(ROOT)
+
+
+def test_default_event_is_created_on_the_primary(app, db, tmp_path):
+    from flask import g
+    from sqlalchemy import create_engine
+    from database import REPLICA_BIND
+    from data_version import data_version
+    from events import get_default_event
+
+    # A replica that hasn't caught up with the default event's creation yet
+    replica = create_engine('sqlite:///' + str(tmp_path / 'replica.db'))
+    db.metadata.create_all(replica)
+    db.engines[REPLICA_BIND] = replica
+    try:
+        version = data_version.current()[0]
+        for _ in range(2):
+            with app.test_request_context():
+                g.read_replica = True
+                event = get_default_event()
+                assert event.slug == 'main'
+                assert g.read_replica is True
+        assert Event.query.filter_by(slug='main').count() == 1
+        # Creating an event is a data change
+        assert data_version.current()[0] == version + 1
+    finally:
+        del db.engines[REPLICA_BIND]
+        replica.dispose()
@@ -0,0 +1,19 @@
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+
+def test_failed_query_leaves_no_timing_behind(app, db):
+    with app.test_request_context():
+        app.preprocess_request()
+        connection = db.session.connection()
+        with pytest.raises(OperationalError):
+            connection.execute(text('SELECT * FROM no_such_table'))
+        assert connection.info.get('query_start') == []
+
+        before = g._timings['db_count']
+        db.session.rollback()
+        db.session.execute(text('SELECT 1'))
+        assert g._timings['db_count'] == before + 1
+        assert db.session.connection().info.get('query_start') == []
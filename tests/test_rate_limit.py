@@ -0,0 +1,93 @@
+import pytest
+
+import rate_limit
+from rate_limit import AdmissionGate, MemoryBucketStore, RateLimiter, SQLiteBucketStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, 'monotonic', clock)
+    monkeypatch.setattr(rate_limit.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path, clock):
+    if request.param == 'sqlite':
+        return SQLiteBucketStore(str(tmp_path / 'buckets.sqlite'))
+    return MemoryBucketStore()
+
+
+def test_bucket_allows_burst_then_waits(store, clock):
+    for _ in range(3):
+        assert store.take('k', 3, 1.0) == 0
+    assert store.take('k', 3, 1.0) == pytest.approx(1.0)
+    # Other keys have their own bucket
+    assert store.take('other', 3, 1.0) == 0
+
+
+def test_bucket_refills_up_to_capacity(store, clock):
+    for _ in range(2):
+        store.take('k', 2, 0.5)
+    clock.now += 2  # one token back
+    assert store.take('k', 2, 0.5) == 0
+    assert store.take('k', 2, 0.5) == pytest.approx(2.0)
+
+    clock.now += 3600  # long idle: full again, but never above capacity
+    assert store.take('k', 2, 0.5) == 0
+    assert store.take('k', 2, 0.5) == 0
+    assert store.take('k', 2, 0.5) > 0
+
+
+def test_limiter_checks_session_and_ip(clock):
+    limiter = RateLimiter()
+    limiter.session_limit = (2, 60)
+    limiter.ip_limit = (3, 60)
+
+    assert limiter.check('a', '10.0.0.1') == 0
+    assert limiter.check('a', '10.0.0.1') == 0
+    assert limiter.check('a', '10.0.0.1') > 0  # session bucket empty
+    # That rejection didn't spend the IP's third token
+    assert limiter.check('b', '10.0.0.1') == 0
+    assert limiter.check('c', '10.0.0.1') > 0  # IP bucket empty
+    assert limiter.check('c', '10.0.0.2') == 0
+    assert limiter.rejected == {'session': 1, 'ip': 1}
+
+
+def test_client_ip_behind_proxies():
+    limiter = RateLimiter()
+    assert limiter.client_ip('10.0.0.9', '203.0.113.7') == '203.0.113.7'
+    # Only the trusted proxy's entry counts, not what the client put in front
+    assert limiter.client_ip('10.0.0.9', 'spoofed, 203.0.113.7') == '203.0.113.7'
+    assert limiter.client_ip('10.0.0.9', None) == '10.0.0.9'
+
+    limiter.trusted_proxies = 2
+    assert limiter.client_ip('10.0.0.9', 'spoofed, 203.0.113.7, 10.0.0.5') == '203.0.113.7'
+    assert limiter.client_ip('10.0.0.9', '203.0.113.7') == '10.0.0.9'
+
+    limiter.trusted_proxies = 0
+    assert limiter.client_ip('10.0.0.9', '203.0.113.7') == '10.0.0.9'
+
+
+def test_wsgi_app_trusts_the_same_proxies(app):
+    from rate_limit import rate_limiter
+    assert app.wsgi_app.x_for == rate_limiter.trusted_proxies == app.config['TRUSTED_PROXIES']
+
+
+def test_admission_gate_rejects_when_queue_full():
+    gate = AdmissionGate(max_concurrent=1, max_queue=0, max_wait=0.01)
+    assert gate.acquire()
+    assert not gate.acquire()
+    gate.release()
+    assert gate.acquire()
+    gate.release()
+    assert gate.active == 0
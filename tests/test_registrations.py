@@ -0,0 +1,113 @@
+import time
+
+import pytest
+from sqlalchemy import inspect, text
+
+from database import schema_is_current, upgrade_schema
+from events import adopt_unscoped_rows, get_default_event
+from models import Event, Participant
+from registrations import CREATED, DUPLICATE, PENDING, registration_batcher
+
+# The tables as the first release created them: no events, emails unique overall
+LEGACY_SCHEMA = [
+    '''CREATE TABLE team (
+        id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, description TEXT, project_idea TEXT,
+        tech_stack JSON, balance_score FLOAT, created_at DATETIME, PRIMARY KEY (id))''',
+    '''CREATE TABLE participant (
+        id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, email VARCHAR(120) NOT NULL,
+        role VARCHAR(50) NOT NULL, experience_level VARCHAR(20) NOT NULL, skills JSON NOT NULL,
+        interests JSON NOT NULL, preferred_team_size INTEGER, availability VARCHAR(50) NOT NULL,
+        github_url VARCHAR(200), linkedin_url VARCHAR(200), created_at DATETIME,
+        team_id INTEGER, PRIMARY KEY (id), UNIQUE (email),
+        FOREIGN KEY(team_id) REFERENCES team (id))''',
+    '''INSERT INTO participant (id, name, email, role, experience_level, skills, interests,
+        preferred_team_size, availability)
+        VALUES (1, 'Ada', 'ada@example.com', 'Developer', 'Advanced', '["Python"]', '["AI"]',
+                4, 'Full-time')''',
+]
+
+
+def _row(event, email, name='Grace'):
+    return dict(event_id=event.id, name=name, email=email, role='Designer',
+                experience_level='Beginner', skills=['Figma'], interests=['Health'],
+                preferred_team_size=4, availability='Full-time')
+
+
+@pytest.fixture(params=[True, False], ids=['batched', 'unbatched'])
+def batching(request, monkeypatch):
+    monkeypatch.setattr(registration_batcher, 'enabled', request.param)
+
+
+def test_slow_write_is_pending_not_failed(db, monkeypatch):
+    event = get_default_event()
+    monkeypatch.setattr(registration_batcher, 'enabled', True)
+    monkeypatch.setattr(registration_batcher, 'timeout', 0)
+
+    # The request stops waiting, but the row stays queued and is written
+    assert registration_batcher.register(_row(event, 'grace@example.com')) == PENDING
+    deadline = time.monotonic() + 5
+    while Participant.query.filter_by(email='grace@example.com').count() == 0:
+        assert time.monotonic() < deadline
+        db.session.rollback()
+        time.sleep(0.01)
+
+    # Submitting it again is harmless
+    monkeypatch.setattr(registration_batcher, 'timeout', 10.0)
+    assert registration_batcher.register(_row(event, 'grace@example.com')) == DUPLICATE
+    assert Participant.query.filter_by(email='grace@example.com').count() == 1
+
+
+@pytest.fixture
+def legacy_db(db):
+    db.session.remove()
+    db.drop_all()
+    with db.engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.execute(text(statement))
+    db.create_all()  # what importing the app does: adds the event table only
+    return db
+
+
+def test_created_then_duplicate(db, batching):
+    event = get_default_event()
+    other = Event(name='Autumn', slug='autumn')
+    db.session.add(other)
+    db.session.commit()
+
+    assert registration_batcher.register(_row(event, 'grace@example.com')) == CREATED
+    assert registration_batcher.register(_row(event, 'grace@example.com', 'Again')) == DUPLICATE
+    # Emails are unique per event
+    assert registration_batcher.register(_row(other, 'grace@example.com')) == CREATED
+    assert Participant.query.filter_by(email='grace@example.com').count() == 2
+
+
+def test_register_against_legacy_unique_email(legacy_db, batching):
+    # A database that only got the new nullable columns, still with UNIQUE(email)
+    legacy_db.session.execute(text('ALTER TABLE participant ADD COLUMN event_id INTEGER'))
+    legacy_db.session.commit()
+    event = get_default_event()
+
+    assert registration_batcher.register(_row(event, 'grace@example.com')) == CREATED
+    assert registration_batcher.register(_row(event, 'grace@example.com')) == DUPLICATE
+    assert registration_batcher.register(_row(event, 'ada@example.com')) == DUPLICATE
+
+
+def test_upgrade_scopes_emails_to_events(legacy_db, batching):
+    assert not schema_is_current()
+    upgrade_schema()
+    adopt_unscoped_rows()
+    assert schema_is_current()
+
+    uniques = inspect(legacy_db.engine).get_unique_constraints('participant')
+    uniques += [index for index in inspect(legacy_db.engine).get_indexes('participant')
+                if index['unique']]
+    assert [sorted(unique['column_names']) for unique in uniques] == [['email', 'event_id']]
+
+    ada = Participant.query.one()
+    assert (ada.name, ada.email, ada.event.slug) == ('Ada', 'ada@example.com', 'main')
+
+    other = Event(name='Autumn', slug='autumn')
+    legacy_db.session.add(other)
+    legacy_db.session.commit()
+    assert registration_batcher.register(_row(ada.event, 'ada@example.com')) == DUPLICATE
+    assert registration_batcher.register(_row(other, 'ada@example.com')) == CREATED
@@ -0,0 +1,217 @@
+"""
+The answer cache's threshold is set on CALIBRATION: labelled questions a
+user might ask and questions already in the cache, marked True when the
+cached answer serves both. Every calibration pair must be classified
+correctly at the default threshold (AI_CACHE_THRESHOLD), which sits midway
+between the two classes' scores (test_calibration_margin).
+
+HELD_OUT pairs were written before the threshold was chosen and never used
+to choose it. They measure how it generalises: at 0.65, 15 of 20 are
+classified correctly and 5 of 10 paraphrases are reused; no different
+question gets a cached answer.
+"""
+import pytest
+from sklearn.metrics.pairwise import cosine_similarity
+
+from semantic_cache import SemanticCache, _binary_rows, question_terms
+
+# (question, cached question, same answer?)
+CALIBRATION = [
+    ("How do I find a team?", "looking for teammates", True),
+    ("How can I find teammates for the hackathon?", "how do I find a team", True),
+    ("Where do I look for team members?", "How can I find a team?", True),
+    ("I'm a beginner, any advice?", "tips for first-time hackers", True),
+    ("What tips do you have for beginners?", "any advice for a newbie?", True),
+    ("How should we split work in a four person team?", "how to divide tasks in a team of 4", True),
+    ("How do I deploy a Flask app quickly?", "how to host a flask application", True),
+    ("What's the fastest way to deploy a Flask app?", "how do I deploy a flask app?", True),
+    ("Any tips for a three minute demo?", "tips for a 3 minute pitch", True),
+    ("How do I give a good pitch?", "tips for the presentation", True),
+    ("How do I prepare for a hackathon?", "how should I get ready for a hackathon", True),
+    ("What should I do to prepare for the hackathon?", "hackathon preparation tips", True),
+    ("How are projects judged?", "what are the judging criteria?", True),
+    ("Give me project ideas", "suggest some project ideas", True),
+    ("Give me project ideas", "I need an idea for our project", True),
+    ("What can we build with React?", "What can we build with React?", True),
+    ("How do I manage state in React?", "state management in react", True),
+    ("How do I manage state in React?", "How do I manage state in Vue?", False),
+    ("React vs Vue for a hackathon?", "Vue or Angular for a hackathon?", False),
+    ("How do I deploy a Flask app?", "How do I deploy a Django app?", False),
+    ("How do I deploy to AWS?", "How do I deploy to Heroku?", False),
+    ("Project ideas for healthcare", "Project ideas for education", False),
+    ("Project ideas with machine learning", "project ideas using ML", True),
+    ("Project ideas with machine learning", "project ideas using blockchain", False),
+    ("How do I find a team?", "How do I pitch our project?", False),
+    ("How do I find a team?", "How do I build a team website?", False),
+    ("Tips for a 3 minute demo", "Tips for a 5 minute demo", False),
+    ("What should I bring to a hackathon?", "what do I need to bring to the hackathon", True),
+    ("How do I connect Python to PostgreSQL?", "connecting python with postgres", True),
+    ("How do I connect Python to PostgreSQL?", "How do I connect Node to PostgreSQL?", False),
+    ("How do I use the OpenAI API?", "How do I use the Gemini API?", False),
+    ("What is the best database for a hackathon?", "which database should we use for a hackathon", True),
+    ("How do I avoid common hackathon mistakes?", "common hackathon pitfalls to avoid", True),
+    ("How do we win a hackathon?", "how to win hackathons", True),
+    ("How do we win a hackathon?", "How do we register for the hackathon?", False),
+    ("What roles should a team have?", "which roles do we need in our team", True),
+    ("How do I learn JavaScript fast?", "how to learn JS quickly", True),
+    ("How do I learn JavaScript fast?", "how to learn TypeScript quickly", False),
+    ("How do I make a mobile app?", "how to build an app for android", False),
+    ("How do I make a mobile app?", "how to create a mobile application", True),
+    ("How do I stay awake during the hackathon?", "how do I sleep during the hackathon", False),
+    ("Can I participate remotely?", "Can I join online?", True),
+    ("How do I pitch our project?", "How do I find a project idea?", False),
+    ("How do we win a hackathon?", "How do we prepare for a hackathon?", False),
+    ("How do I submit my project?", "How do I pitch my project?", False),
+    ("How do I learn to code?", "How do I learn design?", False),
+    ("What roles should a team have?", "How do we split work in a team?", False),
+    ("When is the submission deadline?", "How do I submit our project?", False),
+]
+
+# Not used to choose the threshold
+HELD_OUT = [
+    ("Where can I find people to team up with?", "how do I find teammates", True),
+    ("Any advice for someone at their first hackathon?", "beginner hackathon tips", True),
+    ("How should we divide the work between us?", "how do we split tasks in our team", True),
+    ("How can I deploy my Django app?", "how do I host a django application", True),
+    ("What makes a good demo?", "how do I give a good presentation", True),
+    ("How do I get ready for the hackathon?", "how to prepare for a hackathon", True),
+    ("What do the judges look for?", "how is the judging done", True),
+    ("Can you suggest a project idea?", "give me some project ideas", True),
+    ("How do I call a REST API from React?", "calling an api in react", True),
+    ("Can I take part online?", "is remote participation allowed", True),
+    ("How do I use Firebase authentication?", "How do I use Supabase authentication?", False),
+    ("Project ideas for climate change", "Project ideas for finance", False),
+    ("How do I deploy to Vercel?", "How do I deploy to Netlify?", False),
+    ("Tips for a 2 minute pitch", "Tips for a 10 minute pitch", False),
+    ("How do I train a model in PyTorch?", "How do I train a model in TensorFlow?", False),
+    ("How do I find a team?", "How do I find the venue?", False),
+    ("What should our team name be?", "What should our team build?", False),
+    ("How do I learn Python?", "How do I learn Rust?", False),
+    ("How do we pitch to the judges?", "How do we contact the organisers?", False),
+    ("How do I set up a database?", "How do I set up authentication?", False),
+]
+
+# Unrelated questions cached alongside each pair, so term weights and counts are realistic
+BACKGROUND = [
+    "What time does the hackathon end?",
+    "Is food provided at the venue?",
+    "How big can teams be?",
+    "Is there wifi at the venue?",
+    "Can we use code we wrote before the event?",
+    "What are the prizes?",
+    "Do I need a laptop?",
+    "How long should the pitch be?",
+    "Where is the opening ceremony?",
+    "Can I change teams after registering?",
+    "Are there mentors we can talk to?",
+    "What APIs are available to use?",
+    "Do we keep the rights to our project?",
+    "Is there a place to sleep overnight?",
+    "Can I work on a project alone?",
+    "What should our project include to win?",
+    "How do we get help with a bug?",
+    "What happens at the closing ceremony?",
+    "Is there a code of conduct?",
+    "Can we use open source libraries?",
+    "Who are the judges this year?",
+    "How many projects can a team submit?",
+    "Do we need a working demo or are slides enough?",
+    "Where do I park?",
+    "Can I bring a friend who isn't registered?",
+    "Is the hackathon beginner friendly?",
+    "What is the theme of the hackathon?",
+    "How do I reset my password on the portal?",
+]
+
+
+def _cache_with(question, threshold=None):
+    cache = SemanticCache() if threshold is None else SemanticCache(threshold=threshold)
+    for background in BACKGROUND:
+        cache.put(background, 'hackathon', 'background: ' + background)
+    cache.put(question, 'hackathon', 'target')
+    return cache
+
+
+def _score(query, cached):
+    """(cosine similarity, passes the specific-term rule) of a question and a cached one"""
+    cache = _cache_with(cached)
+    partition = cache._partitions['hackathon']
+    columns, numbers = question_terms(query)
+    entry = partition.entries[cache._normalise(cached)]
+    partition.nearest(columns)  # fits the index
+    tfidf = partition.index[0]
+    similarity = cosine_similarity(tfidf.transform(_binary_rows([columns])),
+                                   tfidf.transform(_binary_rows([entry[0]])))[0, 0]
+    return similarity, partition.specific_terms_match(columns, numbers, entry)
+
+
+def _reused(query, cached):
+    similarity, allowed = _score(query, cached)
+    return allowed and similarity >= SemanticCache().threshold
+
+
+@pytest.mark.parametrize('query, cached, same', CALIBRATION)
+def test_labelled_pairs(query, cached, same):
+    assert _reused(query, cached) == same
+
+
+def test_calibration_margin():
+    threshold = SemanticCache().threshold
+    scores = [(_score(query, cached), same) for query, cached, same in CALIBRATION]
+    paraphrases = [similarity for (similarity, _), same in scores if same]
+    # Different questions the specific-term rule lets through: only the score separates them
+    others = [similarity for (similarity, allowed), same in scores if allowed and not same]
+    assert min(paraphrases) - threshold >= 0.05
+    assert threshold - max(others) >= 0.05
+
+
+def test_held_out_pairs():
+    decisions = [(_reused(query, cached), same) for query, cached, same in HELD_OUT]
+    correct = sum(reused == same for reused, same in decisions)
+    right_when_reused = [same for reused, same in decisions if reused]
+    # The rates measured when the threshold was set; a regression fails here
+    assert correct >= 15
+    assert right_when_reused and all(right_when_reused)
+
+
+def test_lookup_returns_the_cached_answer():
+    cache = _cache_with("how do I host a flask application")
+    assert cache.get("How do I deploy a Flask app quickly?", 'hackathon') == 'target'
+    assert cache.get("How do I deploy a Django app?", 'hackathon') is None
+
+
+def test_default_threshold_matches_config(app):
+    assert app.config['AI_CACHE_THRESHOLD'] == SemanticCache().threshold
+
+
+def test_specific_terms_must_match():
+    # Close by cosine, but a React answer is wrong for a Vue question
+    cache = _cache_with("How do I manage state in React?", threshold=0.1)
+    assert cache.get("How do I manage state in Vue?", 'hackathon') is None
+    assert cache.get("state management in react", 'hackathon') == 'target'
+
+
+def test_partitions_lru_and_ttl(monkeypatch):
+    import semantic_cache
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache.time, 'time', lambda: now[0])
+    cache = SemanticCache(max_entries=2, ttl=60)
+    cache.put("How do I find a team?", 'hackathon', 'team answer')
+    assert cache.get("looking for teammates", 'general') is None  # other context type
+
+    cache.put("How do I deploy a Flask app?", 'hackathon', 'deploy answer')
+    assert cache.get("how to find teammates", 'hackathon') == 'team answer'  # now most recent
+    cache.put("Give me project ideas", 'hackathon', 'ideas answer')
+    assert cache.get("How do I deploy a Flask app?", 'hackathon') is None  # evicted
+    assert cache.get("How do I find a team?", 'hackathon') == 'team answer'
+
+    now[0] += 61
+    assert cache.get("How do I find a team?", 'hackathon') is None
+    assert cache.stats()['partitions']['hackathon']['entries'] == 0
+
+
+def test_questions_without_content_words_need_an_exact_match():
+    cache = SemanticCache()
+    cache.put("Help!", 'general', 'help answer')
+    assert cache.get("help", 'general') == 'help answer'
+    assert cache.get("What?", 'general') is None
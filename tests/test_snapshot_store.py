@@ -0,0 +1,58 @@
+import os
+
+from sqlalchemy import delete
+
+from data_version import data_version
+from database import database_identity
+from models import Event, Participant
+from participant_snapshot import ParticipantSnapshot
+from snapshot_store import snapshot_store
+
+
+def _event_with_participants(db, count):
+    event = Event(name='Spring', slug='spring')
+    db.session.add(event)
+    db.session.flush()
+    for i in range(count):
+        db.session.add(Participant(name=f'P{i}', email=f'p{i}@example.com', role='developer',
+                                   skills=['python'], interests=[], experience_level='beginner',
+                                   availability='full-time', event_id=event.id))
+    db.session.commit()
+    return event
+
+
+def test_snapshots_are_stored_per_database(db):
+    event = _event_with_participants(db, 3)
+    snapshot_store.event_snapshot(event.id)
+    assert os.path.basename(snapshot_store.directory) == database_identity()
+    last_id = max(p.id for p in Participant.query)
+    assert os.listdir(os.path.join(snapshot_store.directory, f'event-{event.id}')) == \
+        [f'c{data_version.commits()}-n3-i{last_id}']
+
+
+def test_snapshot_follows_rows_changed_behind_the_counter(db):
+    event = _event_with_participants(db, 3)
+    assert len(snapshot_store.event_snapshot(event.id)) == 3
+
+    # A write from outside the app (another tool, a restored backup) never bumps the counter
+    with db.engine.begin() as connection:
+        connection.execute(delete(Participant.__table__).where(Participant.email == 'p2@example.com'))
+    snapshot = snapshot_store.event_snapshot(event.id)
+    assert len(snapshot) == 2
+    assert sorted(snapshot.ids.tolist()) == sorted(p.id for p in Participant.query)
+
+
+def test_snapshot_on_disk_is_checked_against_the_database(db):
+    event = _event_with_participants(db, 3)
+    snapshot_store.event_snapshot(event.id)
+    snapshot_store._open.clear()
+
+    # Stand-in for a snapshot left under the same key by different rows
+    directory = os.path.join(snapshot_store.directory, f'event-{event.id}')
+    path = os.path.join(directory, os.listdir(directory)[0])
+    stale = ParticipantSnapshot.load(event_id=event.id).select([0])
+    for name in os.listdir(path):
+        os.remove(os.path.join(path, name))
+    stale.save(path)
+
+    assert len(snapshot_store.event_snapshot(event.id)) == 3
@@ -0,0 +1,40 @@
+import json
+import time
+
+from stats_stream import StatsBroker, WSGI_RETRY_MS, stats_delta
+
+
+def _broker(app, stats):
+    broker = StatsBroker(lambda event_id: dict(stats))
+    broker._app = app
+    return broker
+
+
+def test_wsgi_stream_is_short_lived(app):
+    broker = _broker(app, {'participants': 3})
+    started = time.monotonic()
+    messages = list(broker.stream(1, lifetime=0.3))
+
+    assert time.monotonic() - started < 2
+    assert messages[0] == f"retry: {WSGI_RETRY_MS}\n\n"
+    snapshot = json.loads(messages[1].split('data: ', 1)[1])
+    assert snapshot == {'type': 'snapshot', 'stats': {'participants': 3}}
+
+
+def test_stream_sends_deltas(app):
+    stats = {'participants': 3, 'roles': {'developer': 3}}
+    broker = _broker(app, stats)
+    stream = broker.stream(1, lifetime=5)
+    next(stream), next(stream)  # retry, snapshot
+
+    stats['participants'] = 4
+    stats['roles'] = {'developer': 3, 'designer': 1}
+    broker.publish([1])
+    delta = json.loads(next(stream).split('data: ', 1)[1])
+    assert delta == {'type': 'delta', 'stats': {'participants': 4, 'roles': {'designer': 1}}}
+
+
+def test_stats_delta_marks_removed_entries():
+    old = {'total': 2, 'roles': {'developer': 1, 'designer': 1}}
+    new = {'total': 2, 'roles': {'developer': 2}}
+    assert stats_delta(old, new) == {'roles': {'developer': 2, 'designer': None}}
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate_participants, snapshot_rows
+from participant_snapshot import ParticipantSnapshot
+from streaming_assignment import _EventTeams
+from team_matcher import TeamMatcher
+
+
+@pytest.fixture(scope='module')
+def participants():
+    people = generate_participants(60, 11)
+    # Some registrations list a skill twice
+    for person in people[::3]:
+        person['skills'] = person['skills'] + person['skills'][:1]
+    return people
+
+
+def test_gains_match_full_score(participants):
+    matcher = TeamMatcher()
+    rows = snapshot_rows(participants)
+    # The first 48 sit in 12 teams of 4; the rest arrive one at a time
+    seated = [row[:-1] + (i // 4 + 1 if i < 48 else None,) for i, row in enumerate(rows)]
+    snapshot = ParticipantSnapshot.from_rows(seated)
+    state = _EventTeams(snapshot, np.arange(1, 13), 2, 6)
+    members = {t: list(range(4 * t, 4 * t + 4)) for t in range(12)}
+    every_team = np.arange(12)
+
+    for row in range(48, 60):
+        profile = state.profile(SimpleNamespace(**participants[row]))
+        before = [matcher._calculate_balance_score(snapshot, np.array(members[t])) for t in every_team]
+        after = [matcher._calculate_balance_score(snapshot, np.array(members[t] + [row]))
+                 for t in every_team]
+        # _calculate_balance_score rounds to 3 places
+        assert state.gains(every_team, profile) == pytest.approx(np.subtract(after, before), abs=2e-3)
+
+        t = row % 12
+        state.add(t, profile)
+        members[t].append(row)
+        assert state.team_fields(t)['balance_score'] == after[t]
+
+
+def test_suggest_team_for_participant(participants):
+    matcher = TeamMatcher()
+    snapshot = ParticipantSnapshot.from_rows(snapshot_rows(participants))
+    team_rows = {1: np.arange(0, 4), 2: np.arange(4, 9), 3: np.arange(9, 12)}
+
+    suggested = matcher.suggest_team_for_participant(snapshot, 20, team_rows)
+    # Full teams (5 or more) are never suggested
+    assert suggested in (1, 3)
+    scores = {team: matcher._calculate_team_compatibility(snapshot, 20, team_rows[team])
+              for team in (1, 3)}
+    assert scores[suggested] == max(scores.values())
+    assert matcher.suggest_team_for_participant(snapshot, 20, {}) is None
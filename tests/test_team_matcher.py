@@ -0,0 +1,198 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate_participants, snapshot_rows
+from participant_snapshot import ParticipantSnapshot
+from team_matcher import TeamAggregates, TeamMatcher, team_balance_scores
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    return ParticipantSnapshot.from_rows(snapshot_rows(generate_participants(120, 7)))
+
+
+def _memberships(teams):
+    return [sorted(team['participant_ids']) for team in teams]
+
+
+def test_optimise_teams_is_reproducible(snapshot):
+    matcher = TeamMatcher()
+    first = matcher.optimise_teams(snapshot, 4, restarts=4, workers=2, seed=3)
+    second = matcher.optimise_teams(snapshot, 4, restarts=4, workers=2, seed=3)
+    assert _memberships(first) == _memberships(second)
+
+    # Every restart runs, so the worker count doesn't change the winner either
+    single = matcher.optimise_teams(snapshot, 4, restarts=4, workers=1, seed=3)
+    assert _memberships(single) == _memberships(first)
+
+
+def test_team_aggregates_match_full_score(snapshot):
+    matcher = TeamMatcher()
+    rng = random.Random(0)
+    for _ in range(50):
+        rows = rng.sample(range(len(snapshot)), rng.randint(1, 7))
+        tally = TeamAggregates(snapshot.profile(row) for row in rows)
+        # _calculate_balance_score rounds to 3 places
+        assert round(tally.score(), 3) == matcher._calculate_balance_score(snapshot, np.array(rows))
+
+
+def test_team_balance_scores_match_full_score(snapshot):
+    matcher = TeamMatcher()
+    rng = np.random.default_rng(2)
+    num_teams = 30
+    # Some rows unassigned (-1), and team sizes from empty to crowded
+    labels = rng.integers(-1, num_teams, len(snapshot))
+    scores = team_balance_scores(labels, num_teams, snapshot.role_codes, snapshot.experience,
+                                 snapshot.skills)
+    assert scores.shape == (num_teams,)
+    for team in range(num_teams):
+        rows = np.flatnonzero(labels == team)
+        if len(rows):
+            assert round(float(scores[team]), 3) == matcher._calculate_balance_score(snapshot, rows)
+        else:
+            assert scores[team] == 0
+
+
+def test_team_aggregates_deltas(snapshot):
+    rng = random.Random(1)
+    for _ in range(200):
+        rows = rng.sample(range(len(snapshot)), rng.randint(2, 6) + 1)
+        outsider, members = rows[0], rows[1:]
+        leaver = rng.choice(members)
+        tally = TeamAggregates(snapshot.profile(row) for row in members)
+        before = tally.score()
+
+        def rebuilt(team_rows):
+            return TeamAggregates(snapshot.profile(row) for row in team_rows).score()
+
+        stayers = [row for row in members if row != leaver]
+        joined = members + [outsider]
+        assert tally.score_with(add=snapshot.profile(outsider)) == pytest.approx(rebuilt(joined))
+        assert tally.score_with(remove=snapshot.profile(leaver)) == pytest.approx(rebuilt(stayers))
+        assert tally.score_with(add=snapshot.profile(outsider), remove=snapshot.profile(leaver)) == \
+            pytest.approx(rebuilt(stayers + [outsider]))
+
+        # Hypotheticals leave the tally alone; add then remove restores it
+        assert tally.score() == before
+        tally.add(snapshot.profile(outsider))
+        assert tally.score() == pytest.approx(rebuilt(joined))
+        tally.remove(snapshot.profile(outsider))
+        assert tally.score() == pytest.approx(before)
+
+
+def _total_score(matcher, snapshot, teams):
+    return sum(matcher._calculate_balance_score(snapshot, snapshot.rows_for(team['participant_ids']))
+               for team in teams)
+
+
+def test_refine_teams_improves_and_keeps_everyone(snapshot):
+    matcher = TeamMatcher()
+    ids = snapshot.ids.tolist()
+    teams = [{'participant_ids': ids[i:i + 4]} for i in range(0, len(ids), 4)]
+
+    refined = matcher.refine_teams(teams, snapshot, min_size=3, max_size=5)
+
+    assert sorted(pid for team in refined for pid in team['participant_ids']) == sorted(ids)
+    assert all(3 <= len(team['participant_ids']) <= 5 for team in refined)
+    assert _total_score(matcher, snapshot, refined) >= _total_score(matcher, snapshot, teams)
+    # Stored scores are those of the final membership
+    for team in refined:
+        expected = matcher._calculate_balance_score(snapshot, snapshot.rows_for(team['participant_ids']))
+        assert team['balance_score'] == pytest.approx(expected, abs=1e-3)
+
+
+def test_refine_teams_keep_sizes(snapshot):
+    matcher = TeamMatcher()
+    ids = snapshot.ids.tolist()
+    sizes = [3, 5] * (len(ids) // 8)
+    teams, start = [], 0
+    for size in sizes:
+        teams.append({'participant_ids': ids[start:start + size]})
+        start += size
+
+    refined = matcher.refine_teams(teams, snapshot, keep_sizes=True)
+
+    assert sorted(len(team['participant_ids']) for team in refined) == sorted(sizes)
+    assert _total_score(matcher, snapshot, refined) >= _total_score(matcher, snapshot, teams)
+
+
+def test_refine_teams_without_tolerance_reaches_swap_optimum(snapshot):
+    matcher = TeamMatcher()
+    ids = snapshot.ids.tolist()
+    teams = [{'participant_ids': ids[i:i + 4]} for i in range(0, len(ids), 4)]
+
+    # Sampling every team and partner makes each pass exhaustive
+    refined = matcher.refine_teams(teams, snapshot, candidates=len(teams), max_passes=200,
+                                   tolerance=0, keep_sizes=True)
+
+    tallies = [TeamAggregates(snapshot.profile(snapshot.index_of(pid))
+                              for pid in team['participant_ids']) for team in refined]
+    for a, b in itertools.combinations(range(len(refined)), 2):
+        current = tallies[a].score() + tallies[b].score()
+        for x in refined[a]['participant_ids']:
+            for y in refined[b]['participant_ids']:
+                px, py = (snapshot.profile(snapshot.index_of(pid)) for pid in (x, y))
+                swapped = (tallies[a].score_with(add=py, remove=px) +
+                           tallies[b].score_with(add=px, remove=py))
+                assert swapped <= current + 1e-9
+
+
+def _misfit(preferences, sizes, min_size, max_size):
+    """Sorted-pairing cost of a size mix, over the participants it places"""
+    preferences = np.sort(np.clip(preferences, min_size, max_size))
+    slots = np.repeat(sizes, sizes)
+    return int(np.abs(preferences[:len(slots)] - slots).sum())
+
+
+def _all_mixes(total, sizes):
+    if total == 0:
+        yield []
+    for i, size in enumerate(sizes):
+        if size <= total:
+            for rest in _all_mixes(total - size, sizes[i:]):
+                yield [size] + rest
+
+
+@pytest.mark.parametrize('preferences, expected', [
+    ([3] * 4 + [4] * 4 + [5] * 4, [3, 4, 5]),
+    ([4] * 8, [4, 4]),
+    ([2] * 6 + [6] * 6, [2, 2, 2, 6]),
+    ([5] * 7, [2, 5]),
+    ([1, 1, 9, 9, 9, 9, 9, 9], [2, 6]),
+])
+def test_plan_team_sizes_examples(preferences, expected):
+    from team_matcher import plan_team_sizes
+    assert plan_team_sizes(preferences, 2, 6) == expected
+
+
+def test_plan_team_sizes_is_optimal():
+    from team_matcher import plan_team_sizes
+    rng = np.random.default_rng(5)
+    for _ in range(150):
+        min_size, max_size = sorted(rng.choice(np.arange(2, 7), 2, replace=False))
+        # Mixed histograms: a few popular preferences plus some outliers
+        peaks = rng.integers(1, 8, size=rng.integers(1, 4))
+        preferences = np.concatenate([np.full(rng.integers(0, 6), peak) for peak in peaks] +
+                                     [rng.integers(1, 8, size=rng.integers(0, 4))])
+        if len(preferences) == 0:
+            continue
+        sizes = plan_team_sizes(preferences, min_size, max_size)
+
+        allowed = list(range(min_size, max_size + 1))
+        mixes = [mix for total in range(len(preferences), -1, -1)
+                 for mix in _all_mixes(total, allowed)]
+        placed = max((sum(mix) for mix in mixes), default=0)
+        assert sum(sizes) == placed
+        assert all(min_size <= size <= max_size for size in sizes)
+        assert _misfit(preferences, sizes, min_size, max_size) == min(
+            _misfit(preferences, mix, min_size, max_size)
+            for mix in mixes if sum(mix) == placed)
+
+
+def test_plan_team_sizes_when_nobody_fits():
+    from team_matcher import plan_team_sizes
+    assert plan_team_sizes([4], 2, 6) == []
+    assert plan_team_sizes([4] * 10, 4, 4) == [4, 4]
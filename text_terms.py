@@ -0,0 +1,72 @@
+"""
+Tokenizer shared by the knowledge base (BM25 over the assistants' canned
+snippets) and the AI answer cache (TF-IDF over user questions), so both
+read the same text as the same terms.
+"""
+import re
+
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+# Words, plus technology names like c++, c# and node.js
+_TOKEN = re.compile(r'[a-z0-9][a-z0-9+#]*(?:\.[a-z]+)?')
+
+# sklearn's list drops some words that carry the meaning of a hackathon question
+STOP_WORDS = (ENGLISH_STOP_WORDS - frozenset(
+    'find first last system interest front back top bottom name detail move fire'.split())) | \
+    frozenset('please really just way ways quick quickly fast faster fastest easy easily '
+              'good best better great nice use using used suggest tip tips advice suggestion '
+              'suggestions guidance'.split())
+
+# Phrases and words with the same meaning here, folded to one term
+PHRASES = [(re.compile(r'\b' + pattern + r'\b'), term) for pattern, term in (
+    (r'machine learning|deep learning', 'ml'), (r'artificial intelligence', 'ai'),
+    (r'team ?mates?|team up', 'team'), (r'first[ -]tim(?:e|ers?)', 'beginner'),
+    (r'take part', 'join'), (r'node\.?js', 'node'), (r'react\.?js', 'react'),
+    (r'js', 'javascript'), (r'postgre(?:s|sql)', 'postgres'),
+)]
+SYNONYMS = {
+    'one': '1', 'two': '2', 'three': '3', 'four': '4', 'five': '5', 'ten': '10',
+    'teammate': 'team', 'partner': 'team', 'group': 'team', 'member': 'team',
+    'look': 'find', 'search': 'find', 'participate': 'join', 'attend': 'join',
+    'online': 'remote', 'remotely': 'remote', 'virtual': 'remote', 'divide': 'split', 'task': 'work',
+    'hack': 'hackathon', 'hacker': 'hackathon',
+    'presentation': 'pitch', 'present': 'pitch', 'demo': 'pitch',
+    'host': 'deploy', 'ship': 'deploy', 'publish': 'deploy',
+    'novice': 'beginner', 'newbie': 'beginner', 'newcomer': 'beginner',
+    'application': 'app', 'programming': 'code', 'coding': 'code',
+    'create': 'build', 'make': 'build', 'develop': 'build',
+    'ready': 'prepare', 'jury': 'judge', 'criteria': 'judge', 'pitfall': 'mistake',
+}
+
+
+def stem(word):
+    """Crude suffix stripping so "teams"/"team" and "deploying"/"deploy" match"""
+    for suffix, replacement in (('ation', ''), ('ment', ''), ('ies', 'y'), ('ing', ''), ('ed', ''),
+                                ('es', ''), ('s', '')):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            if suffix == 's' and word.endswith(('ss', 'us', 'is')):
+                break
+            word = word[:-len(suffix)] + replacement
+            if suffix in ('ing', 'ed') and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]
+            break
+    return word[:-1] if len(word) > 3 and word.endswith('e') else word
+
+
+_STEMMED_SYNONYMS = {stem(word): stem(term) for word, term in SYNONYMS.items()
+                     if not term.isdigit()}
+
+
+def tokenize(text):
+    """Stemmed content words of ``text``, synonyms folded, in order"""
+    text = text.lower()
+    for pattern, term in PHRASES:
+        text = pattern.sub(term, text)
+    terms = []
+    for token in _TOKEN.findall(text):
+        token = SYNONYMS.get(token, token)
+        if token in STOP_WORDS or (len(token) < 2 and not token.isdigit()):
+            continue
+        term = stem(token)
+        terms.append(_STEMMED_SYNONYMS.get(term, term))
+    return terms